@@ -2,9 +2,13 @@ import fitz  # PyMuPDF
 import pytesseract
 from pytesseract import Output
 from PIL import Image
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import hashlib
 import json
 import os
 import sys
+import threading
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__)) # Diretório base do script
 DIR_SRC = os.path.dirname(BASE_DIR) # Diretório src
@@ -15,51 +19,196 @@ DIR_DATA = os.path.join(DIR_PAI, "data") # Diretório para armazenamento de dado
 DIR_DATA_RAW = os.path.join(DIR_DATA, "raw") 
 DIR_DATA_PROCESSED =  os.path.join(DIR_DATA, "processed") # Diretório dos dados extraídos dos PDFs (pymu)
 DIR_LOGS =  os.path.join(DIR_DATA, "logs") # Diretório de logs
+DIR_OCR_CACHE = os.path.join(DIR_DATA, "ocr_cache") # Cache de OCR por imagem (hash do conteúdo)
 
 from src.utils.logging_config import log_config
 logging = log_config(DIR_LOGS, "pdf_parser")
 
-def extract_text_from_pdf(pdf_path):
+# Configurações do OCR por regiões
+OCR_MODOS = ("pagina", "regioes")  # "pagina": OCR da página inteira sem texto; "regioes": OCR dos blocos de imagem
+OCR_DPI = 300  # Resolução de renderização das regiões de imagem
+OCR_MIN_LADO = 24  # Lado mínimo (em pontos) de uma região para valer o OCR (ignora ícones e ornamentos)
+OCR_MAX_WORKERS = os.cpu_count() or 4  # Processos do Tesseract executados em paralelo
+
+_ocr_cache = {}  # Cache em memória: chave -> texto
+_ocr_cache_lock = threading.Lock()
+
+def _ler_cache_ocr(chave):
+    """Retorna o texto em cache para a chave (memória e depois disco) ou None."""
+    with _ocr_cache_lock:
+        if chave in _ocr_cache:
+            return _ocr_cache[chave]
+    caminho = os.path.join(DIR_OCR_CACHE, f"{chave}.txt")
+    if os.path.exists(caminho):
+        with open(caminho, "r", encoding="utf-8") as f:
+            texto = f.read()
+        with _ocr_cache_lock:
+            _ocr_cache[chave] = texto
+        return texto
+    return None
+
+def _gravar_cache_ocr(chave, texto):
+    """Grava o texto do OCR no cache em memória e em disco."""
+    with _ocr_cache_lock:
+        _ocr_cache[chave] = texto
+    try:
+        os.makedirs(DIR_OCR_CACHE, exist_ok=True)
+        caminho = os.path.join(DIR_OCR_CACHE, f"{chave}.txt")
+        temporario = f"{caminho}.{threading.get_ident()}.tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            f.write(texto)
+        os.replace(temporario, caminho)
+    except Exception as e:
+        logging.warning(f"Não foi possível gravar o cache de OCR {chave}: {e}")
+
+def _ocr_imagem(img):
+    """Executa o Tesseract sobre uma imagem PIL."""
+    return pytesseract.image_to_string(img, lang="por", output_type=Output.STRING).strip()
+
+def _renderizar(page, dpi, clip=None):
+    """Renderiza a página (ou apenas a região `clip`) como imagem PIL RGB."""
+    pix = page.get_pixmap(dpi=dpi, clip=clip)
+    return Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+
+def _renderizar_regiao(page, dpi, clip):
     """
-    Extrai texto de um PDF. Usa PyMuPDF para PDFs pesquisáveis e Tesseract OCR para imagens.
+    Renderiza uma região da página e calcula a chave de cache do OCR.
+
+    A chave é o hash dos pixels renderizados e das dimensões do recorte: o que o Tesseract recebe,
+    incluindo tamanho e qualquer texto ou vetor desenhado sobre a imagem.
+    """
+    pix = page.get_pixmap(dpi=dpi, clip=clip)
+    digest = hashlib.sha256(pix.samples).hexdigest()
+    chave = f"{digest}_{pix.width}x{pix.height}"
+    return Image.frombytes("RGB", [pix.width, pix.height], pix.samples), chave
+
+def ocr_regioes_imagem(page, executor, dpi=OCR_DPI):
+    """
+    Aplica OCR apenas nos blocos de imagem de uma página.
+
+    As regiões são localizadas pelo PyMuPDF e renderizadas na resolução `dpi`. O Tesseract roda
+    em paralelo no `executor` e os resultados ficam em cache pelo hash da região renderizada,
+    de modo que diagramas repetidos entre manuais (no mesmo tamanho e com o mesmo conteúdo
+    sobreposto) são processados uma única vez.
 
     Args:
-        pdf_path (str): Caminho para o arquivo PDF.
+        page (fitz.Page): Página do PDF.
+        executor (ThreadPoolExecutor): Pool onde o Tesseract é executado.
+        dpi (int): Resolução de renderização das regiões.
 
     Returns:
-        list: Lista de dicionários contendo número da página e texto extraído.
+        list: Textos reconhecidos, na ordem de leitura (de cima para baixo, da esquerda para a direita).
+    """
+    regioes = []
+    for info in page.get_image_info():
+        bbox = fitz.Rect(info["bbox"]) & page.rect
+        if bbox.is_empty or bbox.width < OCR_MIN_LADO or bbox.height < OCR_MIN_LADO:
+            continue
+        regioes.append(bbox)
+
+    regioes.sort(key=lambda r: (round(r.y0), r.x0))
+
+    resultados = []
+    chaves_vistas = set()
+    for bbox in regioes:
+        # A renderização fica na thread principal: o PyMuPDF não é thread-safe
+        img, chave = _renderizar_regiao(page, dpi, bbox)
+        if chave in chaves_vistas:  # Mesma região repetida na página
+            continue
+        chaves_vistas.add(chave)
+        texto = _ler_cache_ocr(chave)
+        resultados.append((chave, texto if texto is not None else executor.submit(_ocr_imagem, img)))
+
+    textos = []
+    for chave, resultado in resultados:
+        if not isinstance(resultado, str):
+            resultado = resultado.result()
+            _gravar_cache_ocr(chave, resultado)
+        if resultado:
+            textos.append(resultado)
+    return textos
+
+def iter_pages_from_pdf(pdf_path, ocr_mode="pagina", ocr_dpi=OCR_DPI, ocr_workers=OCR_MAX_WORKERS,
+                        raise_errors=False):
     """
+    Extrai o texto de um PDF página a página, sem acumular o documento em memória.
+
+    Cada página é entregue assim que é processada, permitindo que as etapas seguintes
+    (gravação, limpeza) comecem antes do fim da extração.
+
+    Args:
+        pdf_path (str): Caminho para o arquivo PDF.
+        ocr_mode (str): "pagina" aplica OCR na página inteira apenas quando não há texto;
+            "regioes" aplica OCR nos blocos de imagem de todas as páginas (ver `ocr_regioes_imagem`).
+        ocr_dpi (int): Resolução usada no OCR por regiões.
+        ocr_workers (int): Número de execuções paralelas do Tesseract no OCR por regiões.
+        raise_errors (bool): Se True, um erro em uma página interrompe a extração (usado pelas tarefas
+            do pipeline, que precisam falhar para serem repetidas); se False, a página sai vazia com "error".
+
+    Yields:
+        dict: Dicionário com número da página e texto extraído.
+    """
+    if ocr_mode not in OCR_MODOS:
+        raise ValueError(f"ocr_mode deve ser um de {OCR_MODOS}, recebido: {ocr_mode}")
+
     logging.info(f"Iniciando extração de texto para {pdf_path}")
     pdf_document = fitz.open(pdf_path)
-    extracted_data = []
-
-    for page_num in range(len(pdf_document)):
-        try:
-            page = pdf_document[page_num]
-            text = page.get_text("text")  # Extrai texto pesquisável
-
-            # Verifica se a página possui texto extraível
-            if not text.strip():
-                logging.info(f"Página {page_num + 1} sem texto. Aplicando OCR...")
-                pix = page.get_pixmap()
-                img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-                text = pytesseract.image_to_string(img, lang="por", output_type=Output.STRING)
-
-            extracted_data.append({
-                "page": page_num + 1,
-                "text": text.strip()
-            })
-        except Exception as e:
-            logging.error(f"Erro ao processar a página {page_num + 1} do arquivo {pdf_path}: {e}")
-            extracted_data.append({
-                "page": page_num + 1,
-                "text": "",
-                "error": str(e)
-            })
-
-    pdf_document.close()
+    executor = ThreadPoolExecutor(max_workers=ocr_workers) if ocr_mode == "regioes" else None
+    try:
+        for page_num in range(len(pdf_document)):
+            try:
+                page = pdf_document[page_num]
+                text = page.get_text("text")  # Extrai texto pesquisável
+
+                if executor is not None:
+                    textos_ocr = ocr_regioes_imagem(page, executor, dpi=ocr_dpi)
+                    if textos_ocr:
+                        logging.info(f"Página {page_num + 1}: OCR em {len(textos_ocr)} região(ões) de imagem.")
+                        text = "\n\n".join([text.strip()] + textos_ocr)
+                    elif not text.strip():
+                        logging.info(f"Página {page_num + 1} sem texto e sem imagens. Aplicando OCR na página...")
+                        text = _ocr_imagem(_renderizar(page, ocr_dpi))
+
+                # Verifica se a página possui texto extraível
+                elif not text.strip():
+                    logging.info(f"Página {page_num + 1} sem texto. Aplicando OCR...")
+                    pix = page.get_pixmap()
+                    img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+                    text = pytesseract.image_to_string(img, lang="por", output_type=Output.STRING)
+
+                yield {
+                    "page": page_num + 1,
+                    "text": text.strip()
+                }
+            except Exception as e:
+                logging.error(f"Erro ao processar a página {page_num + 1} do arquivo {pdf_path}: {e}")
+                if raise_errors:
+                    raise
+                yield {
+                    "page": page_num + 1,
+                    "text": "",
+                    "error": str(e)
+                }
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True)
+        pdf_document.close()
     logging.info(f"Extração concluída para {pdf_path}")
-    return extracted_data
+
+def extract_text_from_pdf(pdf_path, ocr_mode="pagina", ocr_dpi=OCR_DPI, ocr_workers=OCR_MAX_WORKERS):
+    """
+    Extrai texto de um PDF. Usa PyMuPDF para PDFs pesquisáveis e Tesseract OCR para imagens.
+
+    Args:
+        pdf_path (str): Caminho para o arquivo PDF.
+        ocr_mode (str): Modo de OCR ("pagina" ou "regioes"), ver `iter_pages_from_pdf`.
+        ocr_dpi (int): Resolução usada no OCR por regiões.
+        ocr_workers (int): Número de execuções paralelas do Tesseract no OCR por regiões.
+
+    Returns:
+        list: Lista de dicionários contendo número da página e texto extraído.
+    """
+    return list(iter_pages_from_pdf(pdf_path, ocr_mode, ocr_dpi, ocr_workers))
 
 def save_as_json(data, output_path):
     """
@@ -76,7 +225,45 @@ def save_as_json(data, output_path):
     except Exception as e:
         logging.error(f"Erro ao salvar arquivo JSON em {output_path}: {e}")
 
+def save_as_jsonl(pages, output_path, raise_errors=False):
+    """
+    Salva as páginas em formato JSON Lines, uma página por linha, à medida que chegam.
+
+    Cada linha é descarregada no disco logo após ser escrita, de modo que um consumidor
+    pode ler a página 1 enquanto as páginas seguintes ainda estão sendo extraídas.
+
+    Args:
+        pages (iterable): Páginas extraídas (por exemplo, de `iter_pages_from_pdf`).
+        output_path (str): Caminho para salvar o arquivo JSONL.
+        raise_errors (bool): Se True, o erro é registrado e repassado ao chamador.
+
+    Returns:
+        int: Quantidade de páginas gravadas.
+    """
+    total = 0
+    try:
+        with open(output_path, "w", encoding="utf-8") as f:
+            for page in pages:
+                f.write(json.dumps(page, ensure_ascii=False) + "\n")
+                f.flush()
+                total += 1
+        logging.info(f"{total} páginas salvas em {output_path}")
+    except Exception as e:
+        logging.error(f"Erro ao salvar arquivo JSONL em {output_path}: {e}")
+        if raise_errors:
+            raise
+    return total
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extração de texto dos PDFs em data/raw.")
+    parser.add_argument("--stream", action="store_true",
+                        help="Grava as páginas incrementalmente em JSON Lines (.jsonl), com memória constante.")
+    parser.add_argument("--ocr", choices=OCR_MODOS, default="pagina",
+                        help="'pagina': OCR da página inteira sem texto; 'regioes': OCR dos blocos de imagem.")
+    parser.add_argument("--ocr-dpi", type=int, default=OCR_DPI, help="Resolução das regiões no OCR por regiões.")
+    parser.add_argument("--ocr-workers", type=int, default=OCR_MAX_WORKERS, help="Execuções paralelas do Tesseract.")
+    args = parser.parse_args()
+
     # Configuração de diretórios
     input_dir = DIR_DATA_RAW
     output_dir = DIR_DATA_PROCESSED
@@ -85,11 +272,17 @@ if __name__ == "__main__":
     for pdf_file in os.listdir(input_dir):
         if pdf_file.endswith(".pdf"):
             pdf_path = os.path.join(input_dir, pdf_file)
-            output_path = os.path.join(output_dir, pdf_file.replace(".pdf", ".json"))
+            extensao = ".jsonl" if args.stream else ".json"
+            output_path = os.path.join(output_dir, pdf_file.replace(".pdf", extensao))
 
             try:
                 logging.info(f"Processando arquivo {pdf_file}...")
-                extracted_data = extract_text_from_pdf(pdf_path)
-                save_as_json(extracted_data, output_path)
+                paginas = iter_pages_from_pdf(pdf_path, args.ocr, args.ocr_dpi, args.ocr_workers)
+                if args.stream:
+                    if save_as_jsonl(paginas, output_path) == 0:
+                        logging.warning(f"Nenhuma página extraída de {pdf_file}.")
+                else:
+                    extracted_data = list(paginas)
+                    save_as_json(extracted_data, output_path)
             except Exception as e:
                 logging.error(f"Erro ao processar {pdf_file}: {e}")
\ No newline at end of file
@@ -2,7 +2,6 @@ import os
 import base64
 import logging
 from time import sleep
-from openai import OpenAI
 from dotenv import load_dotenv
 import sys
 
@@ -10,7 +9,6 @@ import sys
 load_dotenv()  # Carrega as variáveis 
 
 # Configurações da OpenAI
-cliente = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 modelo = "gpt-4o-mini"
 
 # Definição dos diretórios principais 
@@ -25,7 +23,9 @@ DIR_VISION = os.path.join(DIR_DATA, "outputs_vision")  # Saída do processamento
 DIR_LOGS =  os.path.join(DIR_DATA, "logs") # Diretório de logs
 
 from src.utils.logging_config import log_config
+from src.utils.openai_client import get_cliente
 logging = log_config(DIR_LOGS, "vision")
+from src.refine.dedup import carregar_grupos, eh_representante, membros_para_replicar, separar_chave
 
 # Função para codificar imagens em Base64
 def encodar_imagem(caminho_imagem):
@@ -64,7 +64,7 @@ def analisar_imagem(caminho_imagem):
     """
 
     try:
-        resposta = cliente.chat.completions.create(
+        resposta = get_cliente().chat.completions.create(
             model=modelo,
             messages=[
                 {
@@ -105,38 +105,67 @@ def salvar_resultado(nome_do_arquivo, conteudo):
     except Exception as e:
         logging.error(f"Erro ao salvar o arquivo {nome_do_arquivo}: {e}")
 
+# Função para processar as imagens de um PDF
+def processar_subpasta(subpasta, grupos=None, retomar=False):
+    """
+    Analisa todas as imagens de uma subpasta de DIR_PDF_TO_IMAGE e salva as descrições em DIR_VISION.
+
+    Args:
+        subpasta (str): Nome da subpasta (nome do PDF sem extensão).
+        grupos (dict): Grupos de páginas quase duplicadas (ver `carregar_grupos`). Carregados se None.
+        retomar (bool): Se True, imagens que já possuem descrição salva não são reenviadas ao Vision.
+    """
+    if grupos is None:
+        grupos = carregar_grupos()
+    subpasta_path = os.path.join(DIR_PDF_TO_IMAGE, subpasta)
+    logging.info(f"Processando subpasta: {subpasta}")
+
+    # Cria a pasta correspondente em DIR_VISION, se não existir
+    vision_output_path = os.path.join(DIR_VISION, subpasta)
+    os.makedirs(vision_output_path, exist_ok=True)
+
+    # Itera por todos os arquivos de imagem na subpasta
+    for arquivo in os.listdir(subpasta_path):
+        if arquivo.lower().endswith((".jpg", ".jpeg", ".png")):
+            chave = os.path.splitext(arquivo)[0]
+            if retomar and os.path.exists(os.path.join(vision_output_path, f"{chave}_description.txt")):
+                continue  # Descrição já gerada por uma execução anterior
+            if not eh_representante(grupos, chave):
+                logging.info(f"Página {chave} é duplicata de {grupos[chave][0]}. Pulando.")
+                continue
+            caminho_imagem = os.path.join(subpasta_path, arquivo)
+            try:
+                # Processa a imagem e salva o resultado
+                descricao, _ = analisar_imagem(caminho_imagem)
+                if descricao:
+                    nome_do_arquivo = os.path.join(
+                        vision_output_path, 
+                        f"{chave}_description.txt"
+                    )
+                    salvar_resultado(nome_do_arquivo, descricao)
+
+                    # Replica a descrição para as páginas quase duplicadas
+                    for membro in membros_para_replicar(grupos, chave):
+                        base_membro, _ = separar_chave(membro)
+                        pasta_membro = os.path.join(DIR_VISION, base_membro)
+                        os.makedirs(pasta_membro, exist_ok=True)
+                        salvar_resultado(os.path.join(pasta_membro, f"{membro}_description.txt"), descricao)
+            except Exception as e:
+                logging.error(f"Erro no processamento da imagem {arquivo}: {e}")
+            sleep(1)  # Aguarda para respeitar limites de requisição
+
+
 # Função principal
 if __name__ == "__main__":
     total_custo = 0  # Controle de custo fictício (não utilizado neste script)
 
     logging.info("Início do processamento de imagens para análise.")
+    grupos = carregar_grupos()  # Páginas quase duplicadas (src/refine/dedup.py); vazio se não houver
     try:
         # Itera por todas as subpastas em DIR_PDF_TO_IMAGE
         for subpasta in os.listdir(DIR_PDF_TO_IMAGE):
-            subpasta_path = os.path.join(DIR_PDF_TO_IMAGE, subpasta)
-            if os.path.isdir(subpasta_path):  # Verifica se o caminho é uma pasta
-                logging.info(f"Processando subpasta: {subpasta}")
-
-                # Cria a pasta correspondente em DIR_VISION, se não existir
-                vision_output_path = os.path.join(DIR_VISION, subpasta)
-                os.makedirs(vision_output_path, exist_ok=True)
-
-                # Itera por todos os arquivos de imagem na subpasta
-                for arquivo in os.listdir(subpasta_path):
-                    if arquivo.lower().endswith((".jpg", ".jpeg", ".png")):
-                        caminho_imagem = os.path.join(subpasta_path, arquivo)
-                        try:
-                            # Processa a imagem e salva o resultado
-                            descricao, _ = analisar_imagem(caminho_imagem)
-                            if descricao:
-                                nome_do_arquivo = os.path.join(
-                                    vision_output_path, 
-                                    f"{os.path.splitext(arquivo)[0]}_description.txt"
-                                )
-                                salvar_resultado(nome_do_arquivo, descricao)
-                        except Exception as e:
-                            logging.error(f"Erro no processamento da imagem {arquivo}: {e}")
-                        sleep(1)  # Aguarda para respeitar limites de requisição
+            if os.path.isdir(os.path.join(DIR_PDF_TO_IMAGE, subpasta)):  # Verifica se o caminho é uma pasta
+                processar_subpasta(subpasta, grupos)
     except Exception as e:
         logging.critical(f"Erro crítico durante o processamento: {e}")
 
@@ -0,0 +1,200 @@
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Parâmetros padrão (sobrescritos pela seção "loadtest.fake_openai" do config.json)
+DEFAULT_FAKE_OPENAI_CONFIG = {
+    "latency_median_ms": 800,  # Mediana do tempo até o primeiro token (distribuição log-normal)
+    "latency_sigma": 0.5,      # Dispersão da log-normal: valores maiores alongam a cauda
+    "tokens_per_s": 60,        # Velocidade de geração após o primeiro token
+    "max_tokens": 120,         # Tokens da resposta quando a requisição não limita
+    "rate_429": 0.0,           # Fração das requisições respondidas com 429
+    "max_in_flight": None,     # Requisições simultâneas acima deste limite recebem 429 (None: sem limite)
+    "retry_after_s": 1,        # Cabeçalho Retry-After das respostas 429
+    "seed": 0,                 # Semente das latências e da injeção de 429
+}
+
+# Vocabulário das respostas: o texto é escolhido pelo hash da requisição (mesma entrada, mesma saída)
+VOCABULARIO = (
+    "o torque de aperto recomendado para a roda é de 120 Nm verifique o nível do fluido de freio "
+    "substitua o filtro a cada 10000 km utilize óleo sintético 5W30 conforme a especificação do fabricante "
+    "a pressão dos pneus deve ser ajustada com o veículo frio consulte a tabela de manutenção periódica"
+).split()
+
+
+def get_fake_openai_config(config):
+    fake_config = dict(DEFAULT_FAKE_OPENAI_CONFIG)
+    fake_config.update((config.get("loadtest") or {}).get("fake_openai") or {})
+    return fake_config
+
+
+def resposta_deterministica(corpo, max_tokens):
+    """Texto da resposta derivado do hash das mensagens e do modelo (independe da ordem de chegada)."""
+    chave = json.dumps([corpo.get("model"), corpo.get("messages")], sort_keys=True, ensure_ascii=False)
+    rng = random.Random(hashlib.sha256(chave.encode("utf-8")).hexdigest())
+    n_tokens = max(1, min(max_tokens, rng.randint(max_tokens // 2, max_tokens)))
+    return [rng.choice(VOCABULARIO) for _ in range(n_tokens)]
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    """
+    Servidor local compatível com POST /v1/chat/completions da OpenAI, para testes de carga.
+
+    A latência até o primeiro token segue uma log-normal; a resposta é transmitida (stream=true, SSE)
+    ou devolvida inteira no ritmo de `tokens_per_s`. Requisições podem receber 429 por sorteio
+    (`rate_429`) ou por excesso de concorrência (`max_in_flight`). GET /stats devolve os contadores.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, endereco, config=None):
+        super().__init__(endereco, FakeOpenAIHandler)
+        self.config = dict(DEFAULT_FAKE_OPENAI_CONFIG)
+        self.config.update(config or {})
+        self._rng = random.Random(self.config["seed"])
+        self._lock = threading.Lock()
+        self.stats = {"requisicoes": 0, "respostas_429": 0, "em_andamento": 0, "max_em_andamento": 0}
+
+    @property
+    def url(self):
+        host, porta = self.server_address[:2]
+        return f"http://{host}:{porta}/v1"
+
+    def admitir(self):
+        """Registra a requisição e sorteia (latência em s, recusar com 429)."""
+        with self._lock:
+            self.stats["requisicoes"] += 1
+            latencia = self._rng.lognormvariate(0, self.config["latency_sigma"]) * self.config["latency_median_ms"]
+            limite = self.config["max_in_flight"]
+            recusar = (self._rng.random() < self.config["rate_429"]
+                       or (limite is not None and self.stats["em_andamento"] >= limite))
+            if recusar:
+                self.stats["respostas_429"] += 1
+            else:
+                self.stats["em_andamento"] += 1
+                self.stats["max_em_andamento"] = max(self.stats["max_em_andamento"], self.stats["em_andamento"])
+        return latencia / 1000, recusar
+
+    def liberar(self):
+        with self._lock:
+            self.stats["em_andamento"] -= 1
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.stats)
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):  # Sem log por requisição: distorceria o teste
+        pass
+
+    def _json(self, status, dados, cabecalhos=None):
+        corpo = json.dumps(dados, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(corpo)))
+        for chave, valor in (cabecalhos or {}).items():
+            self.send_header(chave, valor)
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/stats"):
+            return self._json(200, self.server.snapshot())
+        self._json(404, {"error": {"message": "Not found", "type": "invalid_request_error"}})
+
+    def do_POST(self):
+        corpo = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            return self._json(404, {"error": {"message": "Not found", "type": "invalid_request_error"}})
+
+        latencia, recusar = self.server.admitir()
+        if recusar:
+            return self._json(
+                429,
+                {"error": {"message": "Rate limit reached (fake).", "type": "rate_limit_error",
+                           "code": "rate_limit_exceeded"}},
+                {"Retry-After": str(self.server.config["retry_after_s"])},
+            )
+        try:
+            config = self.server.config
+            tokens = resposta_deterministica(corpo, corpo.get("max_tokens") or config["max_tokens"])
+            intervalo = 1 / config["tokens_per_s"]
+            identificador = f"chatcmpl-fake-{self.server.snapshot()['requisicoes']}"
+            time.sleep(latencia)
+            if corpo.get("stream"):
+                self._stream(corpo, identificador, tokens, intervalo)
+            else:
+                time.sleep(intervalo * len(tokens))
+                self._json(200, {
+                    "id": identificador,
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": corpo.get("model", "fake"),
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": " ".join(tokens)}}],
+                    "usage": {"prompt_tokens": len(json.dumps(corpo.get("messages", []))) // 4,
+                              "completion_tokens": len(tokens),
+                              "total_tokens": len(json.dumps(corpo.get("messages", []))) // 4 + len(tokens)},
+                })
+        finally:
+            self.server.liberar()
+
+    def _stream(self, corpo, identificador, tokens, intervalo):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def enviar(delta, finish_reason=None):
+            chunk = {"id": identificador, "object": "chat.completion.chunk", "created": int(time.time()),
+                     "model": corpo.get("model", "fake"),
+                     "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+            self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        enviar({"role": "assistant", "content": ""})
+        for i, token in enumerate(tokens):
+            enviar({"content": token if i == 0 else f" {token}"})
+            time.sleep(intervalo)
+        enviar({}, "stop")
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+def iniciar_servidor(config=None, host="127.0.0.1", porta=0):
+    """Inicia o servidor em uma thread (porta 0: livre, escolhida pelo sistema) e o devolve."""
+    servidor = FakeOpenAIServer((host, porta), config)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor local compatível com a API de chat da OpenAI.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8089)
+    parser.add_argument("--latencia-ms", type=float, default=DEFAULT_FAKE_OPENAI_CONFIG["latency_median_ms"])
+    parser.add_argument("--sigma", type=float, default=DEFAULT_FAKE_OPENAI_CONFIG["latency_sigma"])
+    parser.add_argument("--tokens-por-s", type=float, default=DEFAULT_FAKE_OPENAI_CONFIG["tokens_per_s"])
+    parser.add_argument("--taxa-429", type=float, default=DEFAULT_FAKE_OPENAI_CONFIG["rate_429"])
+    parser.add_argument("--max-em-andamento", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=DEFAULT_FAKE_OPENAI_CONFIG["seed"])
+    args = parser.parse_args()
+
+    servidor = FakeOpenAIServer((args.host, args.porta), {
+        "latency_median_ms": args.latencia_ms, "latency_sigma": args.sigma, "tokens_per_s": args.tokens_por_s,
+        "rate_429": args.taxa_429, "max_in_flight": args.max_em_andamento, "seed": args.seed,
+    })
+    print(f"Servidor fake da OpenAI em {servidor.url} (OPENAI_BASE_URL)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        servidor.shutdown()
@@ -0,0 +1,327 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+import urllib.request
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+# Diretórios principais
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # Diretório base do script
+DIR_SRC = os.path.dirname(BASE_DIR)  # Diretório src
+DIR_PAI = os.path.dirname(DIR_SRC)  # Diretório pai
+if DIR_PAI not in sys.path:  # Adicionando o diretório pai no path do script
+    sys.path.append(DIR_PAI)
+DIR_DATA = os.path.join(DIR_PAI, "data")  # Diretório de dados
+DIR_LOADTEST = os.path.join(DIR_DATA, "loadtest")  # Relatórios dos testes de carga
+
+from src.loadtest.fake_openai import get_fake_openai_config, iniciar_servidor
+
+# Parâmetros padrão (sobrescritos pela seção "loadtest" do config.json)
+DEFAULT_LOADTEST_CONFIG = {
+    "qps": [1, 2, 4, 8, 16],   # Taxas de chegada testadas, em ordem crescente
+    "duracao_s": 30,           # Duração de cada etapa
+    "max_concurrency": 64,     # Requisições simultâneas do gerador de carga
+    "n_documentos": 500,       # Páginas sintéticas indexadas no Qdrant em memória (cenário "qa")
+    "tamanho_imagem_kb": 200,  # Tamanho da imagem enviada no cenário "vision"
+    "saturacao": {
+        "min_vazao": 0.9,      # Vazão abaixo desta fração da taxa de chegada
+        "max_erro": 0.01,      # Taxa de erro acima deste valor
+        "p95_fator": 2.0,      # p95 acima deste múltiplo do p95 da primeira etapa
+    },
+}
+CENARIOS = ("qa", "vision", "refinement")
+
+PERGUNTAS = [
+    "Qual o torque de aperto das rodas?",
+    "Qual fluido de freio devo usar?",
+    "Qual a capacidade de óleo do motor?",
+    "Qual a pressão recomendada dos pneus?",
+    "A cada quantos km troco o filtro de ar?",
+    "Qual a especificação do fluido de arrefecimento?",
+]
+
+
+def get_loadtest_config(config):
+    loadtest_config = dict(DEFAULT_LOADTEST_CONFIG)
+    loadtest_config.update({k: v for k, v in (config.get("loadtest") or {}).items() if k != "fake_openai"})
+    loadtest_config["saturacao"] = {**DEFAULT_LOADTEST_CONFIG["saturacao"], **loadtest_config.get("saturacao", {})}
+    return loadtest_config
+
+
+def apontar_para_openai(url):
+    """
+    Direciona os clientes da OpenAI (SDK e LangChain) para `url`; deve ser chamada antes do primeiro uso.
+
+    As novas tentativas automáticas são desativadas: um 429 conta como erro da requisição, em vez de
+    ser escondido na latência.
+    """
+    os.environ["OPENAI_BASE_URL"] = url
+    os.environ["OPENAI_API_BASE"] = url
+    os.environ["OPENAI_API_KEY"] = "loadtest"
+    os.environ["OPENAI_MAX_RETRIES"] = "0"
+
+
+def stats_do_servidor(url):
+    """Contadores do servidor fake (GET /stats), ou None para uma API real."""
+    try:
+        with urllib.request.urlopen(f"{url}/stats", timeout=2) as resposta:
+            return json.loads(resposta.read())
+    except Exception:
+        return None
+
+
+# Cenários: cada um prepara os recursos e devolve a função executada por requisição. Arquivos
+# temporários criados pelo cenário são registrados em `temporarios` e removidos ao fim do teste.
+def cenario_qa(loadtest_config, temporarios, embeddings_tipo="fake", stream=False):
+    """
+    Caminho de perguntas e respostas do retrievel.py: embedding, busca e cadeia RAG com o LLM.
+
+    A collection é criada no Qdrant em modo memória com páginas sintéticas (ou com as páginas
+    refinadas em data/, se existirem), sem tocar no Qdrant compartilhado.
+    """
+    from langchain_core.documents import Document
+    from langchain_qdrant import QdrantVectorStore
+    from src.models.batch_qa import build_answer_chain
+    from src.models.rag_common import create_embeddings, create_llm, format_docs
+
+    if embeddings_tipo == "fake":
+        from langchain_core.embeddings import DeterministicFakeEmbedding
+        embeddings = DeterministicFakeEmbedding(size=1024)
+    else:
+        embeddings = create_embeddings()
+
+    n_documentos = loadtest_config["n_documentos"]
+    documentos = [
+        Document(page_content=f"Página {i}. {PERGUNTAS[i % len(PERGUNTAS)]} Consulte a tabela {i % 37}.",
+                 metadata={"source": f"sintetico_{i}.json", "arquivo_id": i % 8})
+        for i in range(n_documentos)
+    ]
+    vectorstore = QdrantVectorStore.from_documents(documentos, embeddings, location=":memory:",
+                                                   collection_name="loadtest")
+    cadeia = build_answer_chain(create_llm())
+
+    def executar(i):
+        pergunta = PERGUNTAS[i % len(PERGUNTAS)]
+        vetor = embeddings.embed_query(pergunta)
+        docs = vectorstore.similarity_search_by_vector(vetor, k=4)
+        entrada = {"context": format_docs(docs), "question": pergunta}
+        if not stream:
+            return {"ok": bool(cadeia.invoke(entrada))}
+        inicio, primeiro_token, partes = time.perf_counter(), None, []
+        for parte in cadeia.stream(entrada):
+            if primeiro_token is None:
+                primeiro_token = (time.perf_counter() - inicio) * 1000
+            partes.append(parte)
+        return {"ok": bool(partes), "ttft_ms": primeiro_token}
+
+    return executar
+
+
+def cenario_vision(loadtest_config, temporarios, **_):
+    """Etapa do Vision (analisar_imagem) com uma imagem do tamanho configurado."""
+    from src.extract.vision import analisar_imagem
+
+    imagem = tempfile.NamedTemporaryFile(suffix=".jpg", delete=False)
+    temporarios.append(imagem.name)
+    imagem.write(os.urandom(loadtest_config["tamanho_imagem_kb"] * 1024))
+    imagem.close()
+
+    def executar(i):
+        conteudo, _ = analisar_imagem(imagem.name)
+        return {"ok": conteudo is not None}
+
+    return executar
+
+
+def cenario_refinement(loadtest_config, temporarios, **_):
+    """Etapa de unificação do data_refinement (enviar_para_openai) com uma página sintética."""
+    from src.refine.data_refinement import enviar_para_openai
+
+    contexto = json.dumps({"page": 1, "text": " ".join(PERGUNTAS) * 20}, ensure_ascii=False)
+    descricao = " ".join(reversed(PERGUNTAS)) * 20
+
+    def executar(i):
+        return {"ok": enviar_para_openai(f"{contexto} #{i}", descricao) is not None}
+
+    return executar
+
+
+FABRICAS = {"qa": cenario_qa, "vision": cenario_vision, "refinement": cenario_refinement}
+
+
+def percentis(valores):
+    import numpy as np
+    if not valores:
+        return {"p50": None, "p95": None, "p99": None}
+    p50, p95, p99 = np.percentile(valores, [50, 95, 99])
+    return {"p50": float(p50), "p95": float(p95), "p99": float(p99)}
+
+
+def executar_etapa(executar, qps, duracao_s, max_concurrency):
+    """
+    Gera carga em malha aberta: as requisições chegam a `qps` por segundo, independentemente das
+    respostas, com no máximo `max_concurrency` em execução. O atraso entre a chegada programada e o
+    início da execução mede a fila formada quando o sistema não acompanha a taxa de chegada.
+    """
+    n_requisicoes = max(1, int(qps * duracao_s))
+    amostras, lock = [], threading.Lock()
+
+    def tarefa(i, chegada):
+        inicio = time.perf_counter()
+        try:
+            resultado = executar(i)
+            erro = None if resultado.get("ok") else "sem resposta"
+        except Exception as e:
+            resultado, erro = {}, f"{type(e).__name__}: {e}"
+        fim = time.perf_counter()
+        with lock:
+            amostras.append({"latencia_ms": (fim - chegada) * 1000, "atraso_ms": (inicio - chegada) * 1000,
+                             "ttft_ms": resultado.get("ttft_ms"), "erro": erro})
+
+    inicio_etapa = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        for i in range(n_requisicoes):
+            chegada = inicio_etapa + i / qps
+            espera = chegada - time.perf_counter()
+            if espera > 0:
+                time.sleep(espera)
+            executor.submit(tarefa, i, chegada)
+    duracao_real = time.perf_counter() - inicio_etapa
+
+    sucessos = [a for a in amostras if a["erro"] is None]
+    erros = {}
+    for a in amostras:
+        if a["erro"]:
+            erros[a["erro"][:120]] = erros.get(a["erro"][:120], 0) + 1
+    return {
+        "qps_alvo": qps,
+        "requisicoes": len(amostras),
+        "vazao_qps": len(sucessos) / duracao_real,
+        "taxa_erro": 1 - len(sucessos) / len(amostras),
+        "latencia_ms": percentis([a["latencia_ms"] for a in sucessos]),
+        "atraso_fila_ms": percentis([a["atraso_ms"] for a in amostras]),
+        "ttft_ms": percentis([a["ttft_ms"] for a in sucessos if a["ttft_ms"] is not None]),
+        "erros": erros,
+    }
+
+
+def ponto_de_saturacao(etapas, criterios):
+    """
+    Primeira etapa em que a vazão deixa de acompanhar a taxa de chegada, os erros passam do limite
+    ou o p95 cresce além do fator sobre a primeira etapa. A capacidade é a taxa da etapa anterior.
+    """
+    referencia = etapas[0]["latencia_ms"]["p95"] if etapas else None
+    for i, etapa in enumerate(etapas):
+        motivos = []
+        if etapa["vazao_qps"] < criterios["min_vazao"] * etapa["qps_alvo"]:
+            motivos.append("vazão abaixo da taxa de chegada")
+        if etapa["taxa_erro"] > criterios["max_erro"]:
+            motivos.append("taxa de erro")
+        p95 = etapa["latencia_ms"]["p95"]
+        if referencia and p95 and p95 > criterios["p95_fator"] * referencia:
+            motivos.append("latência p95")
+        if motivos:
+            return {"qps_saturacao": etapa["qps_alvo"],
+                    "capacidade_qps": etapas[i - 1]["qps_alvo"] if i else None, "motivos": motivos}
+    return {"qps_saturacao": None, "capacidade_qps": etapas[-1]["qps_alvo"] if etapas else None, "motivos": []}
+
+
+def executar_teste(cenario, config, qps=None, duracao_s=None, max_concurrency=None, openai_url=None,
+                   fake_config=None, **opcoes):
+    """
+    Executa o cenário em etapas de taxa crescente e devolve o relatório.
+
+    Sem `openai_url`, inicia o servidor fake da OpenAI (src/loadtest/fake_openai.py) neste processo;
+    as etapas param na primeira que satura, já que as seguintes apenas aumentariam a fila.
+    """
+    loadtest_config = get_loadtest_config(config)
+    qps = qps or loadtest_config["qps"]
+    duracao_s = duracao_s or loadtest_config["duracao_s"]
+    max_concurrency = max_concurrency or loadtest_config["max_concurrency"]
+
+    servidor = None
+    if openai_url is None:
+        servidor = iniciar_servidor({**get_fake_openai_config(config), **(fake_config or {})})
+        openai_url = servidor.url
+    apontar_para_openai(openai_url)
+
+    temporarios = []
+    try:
+        executar = FABRICAS[cenario](loadtest_config, temporarios, **opcoes)
+        etapas = []
+        for taxa in sorted(qps):
+            antes = stats_do_servidor(openai_url)
+            etapa = executar_etapa(executar, taxa, duracao_s, max_concurrency)
+            depois = stats_do_servidor(openai_url)
+            if antes and depois:
+                etapa["respostas_429"] = depois["respostas_429"] - antes["respostas_429"]
+                etapa["max_em_andamento"] = depois["max_em_andamento"]
+            etapas.append(etapa)
+            print(f"{taxa:>6.1f} qps: vazão {etapa['vazao_qps']:.2f}/s, "
+                  f"p50 {etapa['latencia_ms']['p50'] or 0:.0f} ms, p95 {etapa['latencia_ms']['p95'] or 0:.0f} ms, "
+                  f"p99 {etapa['latencia_ms']['p99'] or 0:.0f} ms, erros {etapa['taxa_erro']:.1%}")
+            if ponto_de_saturacao(etapas, loadtest_config["saturacao"])["qps_saturacao"] is not None:
+                break
+    finally:
+        if servidor is not None:
+            servidor.shutdown()
+        for caminho in temporarios:
+            if os.path.exists(caminho):
+                os.remove(caminho)
+
+    return {
+        "cenario": cenario,
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "openai": "fake" if servidor is not None else openai_url,
+        "fake_openai": servidor.config if servidor is not None else None,
+        "duracao_s": duracao_s,
+        "max_concurrency": max_concurrency,
+        "opcoes": opcoes,
+        "etapas": etapas,
+        "saturacao": ponto_de_saturacao(etapas, loadtest_config["saturacao"]),
+    }
+
+
+def salvar_relatorio(relatorio):
+    os.makedirs(DIR_LOADTEST, exist_ok=True)
+    caminho = os.path.join(DIR_LOADTEST, f"{relatorio['cenario']}_{datetime.now():%Y%m%d_%H%M%S}.json")
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(relatorio, f, ensure_ascii=False, indent=4)
+    return caminho
+
+
+if __name__ == "__main__":
+    from src.models.rag_common import CONFIG
+
+    parser = argparse.ArgumentParser(description="Teste de carga com OpenAI fake e Qdrant em memória.")
+    parser.add_argument("cenario", choices=CENARIOS)
+    parser.add_argument("--qps", type=float, nargs="*", help="Taxas de chegada (padrão: config.json).")
+    parser.add_argument("--duracao", type=float, help="Duração de cada etapa, em segundos.")
+    parser.add_argument("--concorrencia", type=int, help="Requisições simultâneas do gerador de carga.")
+    parser.add_argument("--openai-url", help="API compatível já em execução (padrão: servidor fake local).")
+    parser.add_argument("--latencia-ms", type=float, help="Mediana da latência do servidor fake.")
+    parser.add_argument("--taxa-429", type=float, help="Fração de respostas 429 do servidor fake.")
+    parser.add_argument("--max-em-andamento", type=int, help="Limite de concorrência do servidor fake (429).")
+    parser.add_argument("--stream", action="store_true", help="Cenário qa com streaming (mede o TTFT).")
+    parser.add_argument("--embeddings", choices=("fake", "real"), default="fake",
+                        help="Cenário qa: embeddings determinísticos ou o modelo real.")
+    args = parser.parse_args()
+
+    fake_config = {chave: valor for chave, valor in {
+        "latency_median_ms": args.latencia_ms, "rate_429": args.taxa_429, "max_in_flight": args.max_em_andamento,
+    }.items() if valor is not None}
+    opcoes = {"embeddings_tipo": args.embeddings, "stream": args.stream} if args.cenario == "qa" else {}
+
+    relatorio = executar_teste(args.cenario, CONFIG, args.qps, args.duracao, args.concorrencia,
+                               args.openai_url, fake_config, **opcoes)
+    saturacao = relatorio["saturacao"]
+    if saturacao["qps_saturacao"] is None:
+        print(f"Sem saturação até {saturacao['capacidade_qps']} qps.")
+    else:
+        print(f"Saturação em {saturacao['qps_saturacao']} qps ({', '.join(saturacao['motivos'])}); "
+              f"capacidade: {saturacao['capacidade_qps']} qps.")
+    print(f"Relatório salvo em {salvar_relatorio(relatorio)}")
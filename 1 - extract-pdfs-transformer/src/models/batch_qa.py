@@ -0,0 +1,266 @@
+from __future__ import annotations
+
+import os
+import sys
+import json
+import time
+import argparse
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+# Qdrant e LangChain são importados no primeiro uso (o CLI responde a --help sem carregá-los)
+if TYPE_CHECKING:
+    from qdrant_client import models
+    from langchain_core.documents import Document
+
+# Diretórios principais
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # Diretório base do script
+DIR_SRC = os.path.dirname(BASE_DIR)  # Diretório src
+DIR_PAI = os.path.dirname(DIR_SRC)  # Diretório pai
+if DIR_PAI not in sys.path:  # Adicionando o diretório pai no path do script
+    sys.path.append(DIR_PAI)
+
+from src.models.router import QueryRouter
+from src.models.transformer_pipeline import get_extractive_qa
+from src.models.rag_common import (
+    COLLECTION_NAME, CONFIG, RAG_TEMPLATE, SUMMARY_TEMPLATE,
+    build_arquivo_filter, create_embeddings, create_llm, format_docs, get_search_params, is_overview_question,
+    open_vectorstore, with_condition, without_summaries
+)
+
+K = 4  # Documentos recuperados por pergunta
+K_RESUMOS = 3  # Resumos recuperados por pergunta de visão geral
+MAX_CONCORRENCIA = 8  # Chamadas simultâneas ao LLM
+TAMANHO_LOTE = 256  # Perguntas por lote no CLI (embedding + busca + LLM)
+
+
+def embed_questions(embeddings, perguntas: List[str]) -> List[List[float]]:
+    """Embeddings de todas as perguntas em uma única chamada (o modelo processa o lote de uma vez)."""
+    return embeddings.embed_documents(list(perguntas))
+
+
+def _qdrant_filter(filtro: Any) -> Optional[models.Filter]:
+    """Aceita o filtro no formato de dicionário usado no restante do projeto ou um models.Filter."""
+    from qdrant_client import models
+    if filtro is None or isinstance(filtro, models.Filter):
+        return filtro
+    return models.Filter.model_validate(filtro)
+
+
+def search_batch(vectorstore, vetores: List[List[float]], filtros: List[Any], k: int = K,
+                 search_params: Optional[models.SearchParams] = None) -> List[List[Document]]:
+    """
+    Busca os `k` documentos de cada vetor, com o filtro correspondente.
+
+    No Qdrant, todas as buscas vão em uma única requisição (query_batch_points). O índice local
+    roda em processo e não tem custo de requisição: as buscas são feitas em sequência.
+    Sem `search_params`, usa os da seção "search" do config.json.
+    """
+    from src.vector_store.local_index import LocalVectorStore
+    if isinstance(vectorstore, LocalVectorStore):
+        return [vectorstore.similarity_search_by_vector(v, k=k, filter=f) for v, f in zip(vetores, filtros)]
+
+    from qdrant_client import models
+    from langchain_core.documents import Document
+    if search_params is None:
+        search_params = get_search_params()
+
+    requisicoes = [
+        models.QueryRequest(
+            query=vetor,
+            filter=_qdrant_filter(filtro),
+            limit=k,
+            params=search_params,
+            using=vectorstore.vector_name or None,
+            with_payload=True,
+        )
+        for vetor, filtro in zip(vetores, filtros)
+    ]
+    respostas = vectorstore.client.query_batch_points(vectorstore.collection_name, requests=requisicoes)
+    return [
+        [
+            Document(
+                page_content=ponto.payload.get(vectorstore.content_payload_key, ""),
+                metadata=ponto.payload.get(vectorstore.metadata_payload_key, {}),
+            )
+            for ponto in resposta.points
+        ]
+        for resposta in respostas
+    ]
+
+
+def _rotear(router: Optional[QueryRouter], vetores: List[List[float]], filtros: List[Any]) -> List[Any]:
+    """Perguntas sem filtro são roteadas ao manual do centroide mais próximo, como no retrievel.py."""
+    if router is None:
+        return filtros
+    roteados = []
+    for vetor, filtro in zip(vetores, filtros):
+        rota = router.route(vetor) if filtro is None else None
+        roteados.append(QueryRouter.build_filter(rota) if rota else filtro)
+    return roteados
+
+
+def retrieve_batch(vectorstore, perguntas: List[str], vetores: List[List[float]], filtros: List[Any],
+                   k: int = K, search_params: Optional[models.SearchParams] = None,
+                   collection_name: str = COLLECTION_NAME,
+                   modo: Optional[str] = None) -> Tuple[List[List[Document]], List[bool]]:
+    """
+    Recupera o contexto de cada pergunta com o mesmo despacho do retrievel.py.
+
+    Perguntas de visão geral usam os resumos pré-calculados, quando houver; as demais buscam nos
+    trechos filhos de uma collection hierárquica (expandidos conforme `modo`) ou nas páginas, sem os
+    resumos. Devolve os documentos e, para cada pergunta, se o contexto veio dos resumos.
+    """
+    from src.vector_store.hierarchical import HierarchicalRetriever, is_hierarchical_collection
+    if search_params is None:
+        search_params = get_search_params()
+
+    documentos: List[Optional[List[Document]]] = [None] * len(perguntas)
+    visao_geral = [i for i, pergunta in enumerate(perguntas) if is_overview_question(pergunta)]
+    if visao_geral:
+        resumos = search_batch(vectorstore, [vetores[i] for i in visao_geral],
+                               [with_condition(filtros[i], "metadata.tipo", "resumo") for i in visao_geral],
+                               K_RESUMOS, search_params)
+        for i, docs in zip(visao_geral, resumos):
+            documentos[i] = docs or None  # sem resumos indexados, a pergunta segue para as páginas
+    de_resumos = [docs is not None for docs in documentos]
+
+    pendentes = [i for i, docs in enumerate(documentos) if docs is None]
+    if is_hierarchical_collection(collection_name):
+        hierarchical = HierarchicalRetriever.from_config(vectorstore, CONFIG, search_params, modo)
+        for i in pendentes:
+            documentos[i] = hierarchical.retrieve(vetores[i], filtros[i])
+    elif pendentes:
+        paginas = search_batch(vectorstore, [vetores[i] for i in pendentes],
+                               [without_summaries(filtros[i]) for i in pendentes], k, search_params)
+        for i, docs in zip(pendentes, paginas):
+            documentos[i] = docs
+    return documentos, de_resumos
+
+
+def build_answer_chain(model, template: str = RAG_TEMPLATE):
+    """Cadeia prompt -> LLM -> texto; recebe {"context": str, "question": str}."""
+    from langchain.prompts import ChatPromptTemplate
+    from langchain.schema.runnable import RunnableLambda
+
+    return (
+        ChatPromptTemplate.from_template(template)
+        | model
+        | RunnableLambda(lambda x: x.content if hasattr(x, 'content') else x)
+    )
+
+
+def answer_batch(perguntas: List[str], filtros: Optional[List[Any]] = None, embeddings=None, model=None,
+                 vectorstore=None, k: int = K, max_concorrencia: int = MAX_CONCORRENCIA,
+                 router: Optional[QueryRouter] = None, extractive_qa=None,
+                 collection_name: str = COLLECTION_NAME, modo: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Responde várias perguntas de uma vez, na ordem de entrada.
+
+    As perguntas são embedadas em um único lote e o contexto é recuperado como no retrievel.py (ver
+    `retrieve_batch`); as buscas planas vão em uma única requisição. As chamadas ao LLM são feitas em
+    paralelo, limitadas a `max_concorrencia`. Uma falha do LLM em uma pergunta não interrompe as
+    demais: o erro é devolvido no campo "erro" do resultado correspondente.
+
+    Com `extractive_qa` (ver src/models/transformer_pipeline.py), as perguntas respondidas com
+    confiança pelo QA extrativo local não chegam ao LLM ("origem": "extrativa"). Perguntas
+    respondidas a partir dos resumos vão sempre ao LLM, com o SUMMARY_TEMPLATE.
+    """
+    if not perguntas:
+        return []
+    filtros = list(filtros) if filtros is not None else [None] * len(perguntas)
+    if len(filtros) != len(perguntas):
+        raise ValueError("Informe um filtro (ou None) para cada pergunta.")
+    embeddings = embeddings or create_embeddings()
+    model = model or create_llm()
+    vectorstore = vectorstore or open_vectorstore(embeddings)
+
+    vetores = embed_questions(embeddings, perguntas)
+    filtros = _rotear(router, vetores, filtros)
+    documentos, de_resumos = retrieve_batch(vectorstore, perguntas, vetores, filtros, k,
+                                            collection_name=collection_name, modo=modo)
+
+    extraidas = [None] * len(perguntas)
+    if extractive_qa is not None:
+        paginas = [i for i, resumo in enumerate(de_resumos) if not resumo]
+        for i, extraida in zip(paginas, extractive_qa.answer_many([perguntas[i] for i in paginas],
+                                                                  [documentos[i] for i in paginas])):
+            extraidas[i] = extraida
+    pendentes = [i for i, extraida in enumerate(extraidas) if extraida is None]
+    entradas = [{"context": format_docs(documentos[i]), "question": perguntas[i], "resumo": de_resumos[i]}
+                for i in pendentes]
+    respostas = [extraida["answer"] if extraida else None for extraida in extraidas]
+    if entradas:
+        from langchain.schema.runnable import RunnableLambda
+        cadeias = {False: build_answer_chain(model), True: build_answer_chain(model, SUMMARY_TEMPLATE)}
+        cadeia = RunnableLambda(lambda x: cadeias[x["resumo"]].invoke(x))
+        for i, resposta in zip(pendentes, cadeia.batch(
+                entradas, config={"max_concurrency": max_concorrencia}, return_exceptions=True)):
+            respostas[i] = resposta
+
+    resultados = []
+    for pergunta, filtro, docs, resposta, extraida, resumo in zip(
+            perguntas, filtros, documentos, respostas, extraidas, de_resumos):
+        erro = isinstance(resposta, Exception)
+        resultados.append({
+            "pergunta": pergunta,
+            "resposta": None if erro else resposta.strip(),
+            "erro": str(resposta) if erro else None,
+            "origem": "extrativa" if extraida else ("resumos" if resumo else "llm"),
+            "filtro": filtro,
+            "contexto": docs,
+        })
+    return resultados
+
+
+def _ler_perguntas(caminho: str) -> List[Dict[str, Any]]:
+    """Lê o JSONL de entrada: {"pergunta": ..., "arquivo_id"?: ..., "filtro"?: {...}} por linha."""
+    with open(caminho, "r", encoding="utf-8") as f:
+        return [json.loads(linha) for linha in f if linha.strip()]
+
+
+def _filtro_da_entrada(entrada: Dict[str, Any]) -> Any:
+    if entrada.get("filtro"):
+        return entrada["filtro"]
+    if entrada.get("arquivo_id") not in (None, ""):
+        return build_arquivo_filter(entrada["arquivo_id"])
+    return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Respostas em lote para um JSONL de perguntas.")
+    parser.add_argument("entrada", help="JSONL com uma pergunta por linha.")
+    parser.add_argument("saida", help="JSONL de saída, na ordem das perguntas.")
+    parser.add_argument("--collection", default=COLLECTION_NAME)
+    parser.add_argument("--k", type=int, default=K, help="Documentos recuperados por pergunta.")
+    parser.add_argument("--concorrencia", type=int, default=MAX_CONCORRENCIA, help="Chamadas simultâneas ao LLM.")
+    parser.add_argument("--lote", type=int, default=TAMANHO_LOTE, help="Perguntas processadas por lote.")
+    parser.add_argument("--sem-roteamento", action="store_true", help="Não rotear perguntas sem filtro.")
+    parser.add_argument("--sem-extrativo", action="store_true", help="Não usar o QA extrativo local.")
+    args = parser.parse_args()
+
+    entradas = _ler_perguntas(args.entrada)
+    embeddings, model = create_embeddings(), create_llm()
+    vectorstore = open_vectorstore(embeddings, args.collection)
+    router = None if args.sem_roteamento else QueryRouter.load(args.collection)
+    extractive_qa = None if args.sem_extrativo else get_extractive_qa(CONFIG)
+
+    inicio = time.perf_counter()
+    n_erros = 0
+    with open(args.saida, "w", encoding="utf-8") as f:
+        for i in range(0, len(entradas), args.lote):
+            lote = entradas[i:i + args.lote]
+            resultados = answer_batch(
+                [e["pergunta"] for e in lote], [_filtro_da_entrada(e) for e in lote],
+                embeddings, model, vectorstore, args.k, args.concorrencia, router, extractive_qa,
+                args.collection
+            )
+            for entrada, resultado in zip(lote, resultados):
+                n_erros += resultado["erro"] is not None
+                resultado["fontes"] = [doc.metadata for doc in resultado.pop("contexto")]
+                f.write(json.dumps({**entrada, **resultado}, ensure_ascii=False) + "\n")
+            f.flush()
+            print(f"{min(i + args.lote, len(entradas))}/{len(entradas)} perguntas respondidas.")
+
+    duracao = time.perf_counter() - inicio
+    print(f"{len(entradas)} perguntas em {duracao:.1f}s ({len(entradas) / max(duracao, 1e-9):.2f}/s), "
+          f"{n_erros} erro(s). Resultados em {args.saida}")
@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+# Qdrant e LangChain são importados no primeiro uso, como no batch_qa.py
+if TYPE_CHECKING:
+    from langchain_core.documents import Document
+
+# Diretórios principais
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # Diretório base do script
+DIR_SRC = os.path.dirname(BASE_DIR)  # Diretório src
+DIR_PAI = os.path.dirname(DIR_SRC)  # Diretório pai
+if DIR_PAI not in sys.path:  # Adicionando o diretório pai no path do script
+    sys.path.append(DIR_PAI)
+
+from src.vector_store.collection_params import collection_grid
+from src.models.rag_common import (
+    CONFIG, EMBEDDINGS_MODEL, VECTOR_STORE_CONFIG,
+    build_arquivo_filter, create_embeddings, get_search_params, open_vectorstore, with_condition, without_summaries
+)
+
+# Parâmetros padrão (sobrescritos pela seção "fanout" do config.json)
+DEFAULT_FANOUT_CONFIG = {
+    "collections": None,   # Collections comparadas por padrão (None: todas as do grid)
+    "k": 4,                # Documentos recuperados por collection
+    "max_concurrency": 8,  # Buscas simultâneas
+    "timeout_s": 10,       # Tempo máximo de cada busca; as demais não esperam por ela
+}
+
+
+def get_fanout_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    fanout_config = dict(DEFAULT_FANOUT_CONFIG)
+    fanout_config.update(config.get("fanout") or {})
+    return fanout_config
+
+
+def fanout_targets(config: Dict[str, Any], collections: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Collections a consultar, com o modelo de embeddings de cada uma (pelo grid do config.json).
+
+    Sem `collections`, usa "fanout.collections" ou, se vazio, todo o grid. Nomes fora do grid são
+    aceitos e consultados com o modelo de embeddings padrão.
+    """
+    grid = {item["collection_name"]: item for item in collection_grid(config)}
+    nomes = collections or get_fanout_config(config)["collections"] or list(grid)
+    return [
+        {"collection_name": nome, "embeddings_model": grid.get(nome, {}).get("embeddings_model", EMBEDDINGS_MODEL)}
+        for nome in dict.fromkeys(nomes)
+    ]
+
+
+def embed_por_modelo(pergunta: str, alvos: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Um único embedding da pergunta por modelo, compartilhado pelas collections que o usam."""
+    vetores = {}
+    for modelo in dict.fromkeys(alvo["embeddings_model"] for alvo in alvos):
+        inicio = time.perf_counter()
+        vetor = create_embeddings(modelo).embed_query(pergunta)
+        vetores[modelo] = {"vetor": vetor, "latencia_ms": (time.perf_counter() - inicio) * 1000}
+    return vetores
+
+
+def _filtro_da_collection(nome: str, filtro: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    # Collections hierárquicas: busca apenas nos trechos filhos (as páginas não entram na comparação).
+    # Os resumos ficam de fora em todas: a comparação é sobre as páginas
+    from src.vector_store.hierarchical import NIVEL_FILHO, is_hierarchical_collection
+    if is_hierarchical_collection(nome):
+        filtro = with_condition(filtro, "metadata.nivel", NIVEL_FILHO)
+    return without_summaries(filtro)
+
+
+async def _buscar_qdrant(cliente, nome: str, vetor: List[float], filtro: Optional[Dict[str, Any]], k: int,
+                         search_params) -> List[Document]:
+    from qdrant_client import models
+    from langchain_core.documents import Document
+
+    resposta = await cliente.query_points(
+        collection_name=nome,
+        query=vetor,
+        query_filter=models.Filter.model_validate(filtro) if filtro else None,
+        limit=k,
+        search_params=search_params,
+        with_payload=True,
+    )
+    return [
+        Document(page_content=ponto.payload.get("page_content", ""),
+                 metadata={**ponto.payload.get("metadata", {}), "score": ponto.score})
+        for ponto in resposta.points
+    ]
+
+
+async def _buscar_local(nome: str, modelo: str, vetor: List[float], filtro: Optional[Dict[str, Any]],
+                        k: int) -> List[Document]:
+    # O índice local roda em processo: a busca vai para uma thread para não bloquear as demais
+    from langchain_core.documents import Document
+
+    def buscar():
+        vectorstore = open_vectorstore(create_embeddings(modelo), nome)
+        return [
+            Document(page_content=doc.page_content, metadata={**doc.metadata, "score": score})
+            for doc, score in vectorstore.similarity_search_with_score_by_vector(vetor, k=k, filter=filtro)
+        ]
+    return await asyncio.to_thread(buscar)
+
+
+async def _buscar_todas(alvos: List[Dict[str, Any]], vetores: Dict[str, Dict[str, Any]],
+                        filtro: Optional[Dict[str, Any]], k: int, max_concurrency: int,
+                        timeout_s: float) -> List[Dict[str, Any]]:
+    cliente = None
+    if VECTOR_STORE_CONFIG["backend"] != "local":
+        from qdrant_client import AsyncQdrantClient
+        cliente = AsyncQdrantClient(url=os.getenv("QDRANT_URL"), api_key=os.getenv("QDRANT_API_KEY"))
+    search_params = get_search_params()
+    semaforo = asyncio.Semaphore(max_concurrency)
+
+    async def buscar(alvo):
+        nome, modelo = alvo["collection_name"], alvo["embeddings_model"]
+        filtro_collection = _filtro_da_collection(nome, filtro)
+        vetor = vetores[modelo]["vetor"]
+        async with semaforo:
+            inicio = time.perf_counter()
+            try:
+                if cliente is None:
+                    busca = _buscar_local(nome, modelo, vetor, filtro_collection, k)
+                else:
+                    busca = _buscar_qdrant(cliente, nome, vetor, filtro_collection, k, search_params)
+                docs, erro = await asyncio.wait_for(busca, timeout_s), None
+            except asyncio.TimeoutError:
+                docs, erro = [], f"Tempo limite de {timeout_s}s excedido."
+            except Exception as e:
+                docs, erro = [], str(e)
+            latencia_ms = (time.perf_counter() - inicio) * 1000
+        return {
+            "collection": nome,
+            "embeddings_model": modelo,
+            "docs": docs,
+            "latencia_ms": latencia_ms,
+            "embedding_ms": vetores[modelo]["latencia_ms"],
+            "erro": erro,
+        }
+
+    try:
+        return await asyncio.gather(*(buscar(alvo) for alvo in alvos))
+    finally:
+        if cliente is not None:
+            await cliente.close()
+
+
+def fanout_search(pergunta: str, collections: Optional[List[str]] = None, filtro: Optional[Dict[str, Any]] = None,
+                  k: Optional[int] = None, config: Dict[str, Any] = CONFIG) -> List[Dict[str, Any]]:
+    """
+    Envia a mesma pergunta a várias collections ao mesmo tempo, para comparar configurações do grid.
+
+    A pergunta é embedada uma vez por modelo; as buscas rodam concorrentemente no AsyncQdrantClient
+    (ou em threads, no backend local). Uma collection com erro ou acima do tempo limite não
+    interrompe as demais: o erro vem no campo "erro" do resultado correspondente.
+
+    Returns:
+        list: {"collection", "embeddings_model", "docs", "latencia_ms", "embedding_ms", "erro"},
+        na ordem das collections.
+    """
+    fanout_config = get_fanout_config(config)
+    alvos = fanout_targets(config, collections)
+    vetores = embed_por_modelo(pergunta, alvos)
+    return asyncio.run(_buscar_todas(
+        alvos, vetores, filtro, k or fanout_config["k"], fanout_config["max_concurrency"], fanout_config["timeout_s"]
+    ))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compara a recuperação de uma pergunta em várias collections.")
+    parser.add_argument("pergunta")
+    parser.add_argument("--collections", nargs="*", help="Collections a consultar (padrão: config.json).")
+    parser.add_argument("--arquivo-id", type=int, help="Restringe a busca a um manual.")
+    parser.add_argument("--k", type=int, help="Documentos recuperados por collection.")
+    parser.add_argument("--json", action="store_true", help="Saída em JSON.")
+    args = parser.parse_args()
+
+    filtro = build_arquivo_filter(args.arquivo_id) if args.arquivo_id is not None else None
+    resultados = fanout_search(args.pergunta, args.collections, filtro, args.k)
+
+    if args.json:
+        for r in resultados:
+            r["docs"] = [{"source": d.metadata.get("source"), "score": d.metadata.get("score")} for d in r["docs"]]
+        print(json.dumps(resultados, ensure_ascii=False, indent=4))
+    else:
+        for r in resultados:
+            status = r["erro"] or f"{len(r['docs'])} documento(s)"
+            print(f"{r['collection']:<70} {r['latencia_ms']:>8.1f} ms  {status}")
+            for doc in r["docs"]:
+                print(f"    {doc.metadata.get('score', 0):.3f}  {doc.metadata.get('source', '')}")
@@ -0,0 +1,155 @@
+import os
+import re
+import sys
+import json
+from functools import lru_cache
+from dotenv import load_dotenv
+
+# Diretórios principais
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # Diretório base do script
+DIR_SRC = os.path.dirname(BASE_DIR)  # Diretório src
+DIR_PAI = os.path.dirname(DIR_SRC)  # Diretório pai
+if DIR_PAI not in sys.path:  # Adicionando o diretório pai no path do script
+    sys.path.append(DIR_PAI)
+DIR_DATA = os.path.join(DIR_PAI, "data")  # Diretório de dados
+DIR_LOCAL_INDEX = os.path.join(DIR_DATA, "local_index")  # Índices vetoriais locais (backend "local")
+CONFIG_VECTORSTORE = os.path.join(DIR_SRC, "vector_store", "config.json")  # Config da indexação
+
+
+# Modelos, clientes e as bibliotecas que os criam (HuggingFace, LangChain, Qdrant) são carregados
+# no primeiro uso; `warmup` antecipa esse custo quando desejado.
+# Carrega variáveis de ambiente do .env (inclusive VECTOR_STORE_BACKEND)
+load_dotenv()
+
+# Collection consultada (a variável COLLECTION_NAME permite usar outra do grid, p. ex. a hierárquica)
+COLLECTION_NAME = os.getenv("COLLECTION_NAME", "fluidos_chunkby-page_overlap0_multilingual-e5-large")
+
+EMBEDDINGS_MODEL = "intfloat/multilingual-e5-large"
+LLM_MODEL = "gpt-3.5-turbo"
+
+RAG_TEMPLATE = """
+    Você é um assistente para tarefas de perguntas e respostas. Use os seguintes trechos de contexto recuperado para responder à pergunta.
+    Se você não souber a resposta, simplesmente diga que não sabe.
+    <context>{context}</context> Responda à seguinte pergunta: {question}
+    """
+
+# Perguntas de visão geral são respondidas com os resumos pré-calculados (src/models/summarize.py)
+SUMMARY_TEMPLATE = """
+    Responda à pergunta usando apenas os resumos do manual abaixo. Se eles não bastarem, diga que não sabe.
+    <resumos>{context}</resumos> Pergunta: {question}
+    """
+OVERVIEW_PATTERN = re.compile(
+    r"\b(resum(a|e|o|os|ir)|sum[aá]rio|vis[aã]o geral|panorama|sobre o que (trata|fala))\b", re.IGNORECASE
+)
+
+
+# Configuração da indexação (config.json do vector_store)
+def load_config():
+    if os.path.exists(CONFIG_VECTORSTORE):
+        with open(CONFIG_VECTORSTORE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return {}
+
+CONFIG = load_config()
+
+# Configuração do armazenamento vetorial (seção "vector_store" do config.json)
+VECTOR_STORE_CONFIG = dict(CONFIG.get("vector_store", {}))
+VECTOR_STORE_CONFIG["backend"] = os.getenv("VECTOR_STORE_BACKEND", VECTOR_STORE_CONFIG.get("backend", "qdrant"))
+
+# Oversampling e rescoring para collections quantizadas (seção "search" do config.json)
+@lru_cache(maxsize=None)
+def get_search_params():
+    from src.vector_store.collection_params import build_search_params
+    return build_search_params(CONFIG.get("search"))
+
+
+# Função para formatar documentos recuperados
+def format_docs(docs):
+    return "\n\n".join(doc.page_content for doc in docs if doc.page_content)
+
+
+# Filtro de busca restrito a um manual
+def build_arquivo_filter(arquivo_id):
+    return {
+        "must": [
+            {"key": "metadata.arquivo_id", "match": {"value": int(arquivo_id)}}
+        ]
+    }
+
+
+# Indica se a pergunta pede uma visão geral (respondida a partir dos resumos)
+def is_overview_question(question):
+    return bool(OVERVIEW_PATTERN.search(question or ""))
+
+
+# Acrescenta uma condição de igualdade a um filtro no formato de dicionário do Qdrant
+def with_condition(filtro, key, value):
+    filtro = dict(filtro or {})
+    filtro["must"] = list(filtro.get("must") or []) + [{"key": key, "match": {"value": value}}]
+    return filtro
+
+
+# Exclui os resumos (metadata tipo="resumo") de um filtro: só as perguntas de visão geral os consultam
+def without_summaries(filtro):
+    if hasattr(filtro, "model_dump"):  # models.Filter
+        filtro = filtro.model_dump(exclude_none=True)
+    filtro = dict(filtro or {})
+    filtro["must_not"] = list(filtro.get("must_not") or []) + [{"key": "metadata.tipo", "match": {"value": "resumo"}}]
+    return filtro
+
+
+# Funções para criar o modelo de embeddings e o LLM (uma instância por processo e modelo)
+def create_embeddings(model_name=EMBEDDINGS_MODEL):
+    return _create_embeddings(model_name)
+
+
+@lru_cache(maxsize=None)
+def _create_embeddings(model_name):
+    from langchain_huggingface import HuggingFaceEmbeddings
+    return HuggingFaceEmbeddings(
+        model_name=model_name,
+        model_kwargs={'trust_remote_code': True}
+    )
+
+
+@lru_cache(maxsize=None)
+def create_llm():
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(
+        model_name=LLM_MODEL,
+        temperature=0,
+        openai_api_key=os.getenv("OPENAI_API_KEY"),
+        max_retries=int(os.getenv("OPENAI_MAX_RETRIES", 2))
+    )
+
+
+# Função para abrir a collection no backend configurado
+def open_vectorstore(embeddings, collection_name=COLLECTION_NAME):
+    if VECTOR_STORE_CONFIG["backend"] == "local":
+        from src.vector_store.collection_params import local_index_name
+        from src.vector_store.local_index import LocalVectorStore
+        index_dir = VECTOR_STORE_CONFIG.get("local_dir") or DIR_LOCAL_INDEX
+        return LocalVectorStore.from_existing_index(
+            os.path.join(index_dir, local_index_name(collection_name)),
+            embeddings,
+            nprobe=VECTOR_STORE_CONFIG.get("nprobe", 16),
+        )
+    from langchain_qdrant import QdrantVectorStore
+    return QdrantVectorStore.from_existing_collection(
+        embedding=embeddings,
+        collection_name=collection_name,
+        url=os.getenv("QDRANT_URL"),
+        api_key=os.getenv("QDRANT_API_KEY")
+    )
+
+
+# Aquecimento explícito e opcional: carrega os modelos e executa uma inferência de cada um
+def warmup(extractive=True):
+    create_embeddings().embed_query("aquecimento")
+    create_llm()
+    get_search_params()
+    if extractive:
+        from src.models.transformer_pipeline import get_extractive_qa
+        extractive_qa = get_extractive_qa(CONFIG)
+        if extractive_qa is not None:
+            extractive_qa.warmup()
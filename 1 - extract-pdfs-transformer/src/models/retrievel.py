@@ -1,50 +1,41 @@
 import os
+import sys
 import streamlit as st
 from dotenv import load_dotenv
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_openai import ChatOpenAI
-from langchain.prompts import ChatPromptTemplate
-from langchain.schema.runnable import RunnableParallel, RunnablePassthrough, RunnableLambda
-from langchain_qdrant import QdrantVectorStore
-from ragas.evaluation import evaluate, EvaluationDataset
-from ragas.metrics import Faithfulness, AnswerRelevancy, ContextPrecision, ContextRecall
-from ragas.llms.base import LangchainLLMWrapper
+
+# Diretórios principais
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # Diretório base do script
+DIR_SRC = os.path.dirname(BASE_DIR)  # Diretório src
+DIR_PAI = os.path.dirname(DIR_SRC)  # Diretório pai
+if DIR_PAI not in sys.path:  # Adicionando o diretório pai no path do script
+    sys.path.append(DIR_PAI)
+
+# LangChain, RAGAS, modelos e clientes são carregados sob demanda (primeira pergunta ou botão de
+# pré-carregamento), para que a página abra sem esperar por eles.
+from src.models.transformer_pipeline import get_extractive_qa
+from src.models.rag_common import (
+    COLLECTION_NAME, CONFIG, RAG_TEMPLATE, SUMMARY_TEMPLATE, VECTOR_STORE_CONFIG,
+    build_arquivo_filter, create_embeddings, create_llm, format_docs, get_search_params,
+    is_overview_question, open_vectorstore, warmup
+)
 
 # Carrega variáveis de ambiente do .env
 load_dotenv()
 
 # Função para validar variáveis de ambiente
 def validate_env_vars():
-    required_vars = ["QDRANT_URL", "QDRANT_API_KEY", "OPENAI_API_KEY"]
+    required_vars = ["OPENAI_API_KEY"]
+    if VECTOR_STORE_CONFIG["backend"] == "qdrant":
+        required_vars += ["QDRANT_URL", "QDRANT_API_KEY"]
     for var in required_vars:
         if not os.getenv(var):
             st.error(f"Variável de ambiente {var} não definida. Verifique o arquivo .env.")
             raise EnvironmentError(f"Missing required environment variable: {var}")
 
-validate_env_vars()
-
-# Carregando variáveis de ambiente
-QDRANT_URL = os.getenv("QDRANT_URL")
-QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-
-# Função para formatar documentos recuperados
-def format_docs(docs):
-    return "\n\n".join(doc.page_content for doc in docs if doc.page_content)
-
 # Função para inicializar embeddings e modelo
 def initialize_embeddings_and_model():
     try:
-        embeddings = HuggingFaceEmbeddings(
-            model_name="intfloat/multilingual-e5-large",
-            model_kwargs={'trust_remote_code': True}
-        )
-        model = ChatOpenAI(
-            model_name="gpt-3.5-turbo",
-            temperature=0,
-            openai_api_key=OPENAI_API_KEY
-        )
-        return embeddings, model
+        return create_embeddings(), create_llm()
     except Exception as e:
         st.error("Erro ao inicializar embeddings ou modelo.")
         st.exception(e)
@@ -53,20 +44,17 @@ def initialize_embeddings_and_model():
 # Função para carregar o vetorstore
 def load_vectorstore(embeddings):
     try:
-        vectorstore = QdrantVectorStore.from_existing_collection(
-            embedding=embeddings,
-            collection_name="fluidos_chunkby-page_overlap0_multilingual-e5-large",
-            url=QDRANT_URL,
-            api_key=QDRANT_API_KEY
-        )
-        return vectorstore
+        return open_vectorstore(embeddings, COLLECTION_NAME)
     except Exception as e:
-        st.error("Erro ao conectar ou carregar a coleção Qdrant.")
+        st.error(f"Erro ao conectar ou carregar a coleção ({VECTOR_STORE_CONFIG['backend']}).")
         st.exception(e)
         raise
 
 # Função para calcular métricas RAGAS
 def calculate_ragas_metrics(question, answer, docs, reference, llm):
+    from ragas.evaluation import evaluate, EvaluationDataset
+    from ragas.metrics import Faithfulness, AnswerRelevancy, ContextPrecision, ContextRecall
+
     try:
         evaluation_dataset = EvaluationDataset.from_list([{
             "user_input": question,
@@ -89,9 +77,49 @@ def calculate_ragas_metrics(question, answer, docs, reference, llm):
         st.exception(e)
         return None
 
+# Função para comparar a recuperação em várias collections do grid, lado a lado
+def show_fanout(question, arquivo_id):
+    from src.models.fanout import fanout_search, fanout_targets
+
+    nomes = [alvo["collection_name"] for alvo in fanout_targets(CONFIG)]
+    collections = st.multiselect("Collections comparadas:", nomes, default=nomes)
+    if not collections:
+        st.write("Selecione ao menos uma collection.")
+        return
+
+    filtro = None
+    if arquivo_id:
+        try:
+            filtro = build_arquivo_filter(int(arquivo_id))
+        except ValueError:
+            st.error("O 'arquivo_id' deve ser um número inteiro.")
+            return
+
+    with st.spinner(f"Consultando {len(collections)} collections..."):
+        resultados = fanout_search(question, collections, filtro)
+
+    for coluna, r in zip(st.columns(len(resultados)), resultados):
+        with coluna:
+            st.markdown(f"**{r['collection']}**")
+            st.caption(f"Busca: {r['latencia_ms']:.0f} ms | Embedding: {r['embedding_ms']:.0f} ms")
+            if r["erro"]:
+                st.error(r["erro"])
+                continue
+            for i, doc in enumerate(r["docs"], 1):
+                st.markdown(f"**{i}.** {doc.metadata.get('source', '').strip()} "
+                            f"({doc.metadata.get('score', 0):.3f})")
+                st.caption(f"{doc.page_content[:300].strip()}...")
+
 # Função principal
 def main():
     st.title("Vehicle Manuals QA with RAGAS Evaluation")
+    validate_env_vars()
+
+    # Pré-carregamento opcional dos modelos (senão, carregados na primeira pergunta)
+    if st.sidebar.button("Pré-carregar modelos"):
+        with st.spinner("Carregando modelos..."):
+            warmup()
+        st.sidebar.write("Modelos carregados.")
 
     # Inputs do usuário
     question = st.text_input("Digite sua pergunta:")
@@ -102,14 +130,27 @@ def main():
         st.write("Por favor, insira uma pergunta acima.")
         return
 
+    # Modo de comparação: apenas a recuperação, em várias collections ao mesmo tempo
+    if st.sidebar.checkbox("Comparar collections (fan-out)"):
+        show_fanout(question, arquivo_id)
+        return
+
     if not reference_answer:
         st.write("Por favor, insira a resposta de referência acima.")
         return
 
+    from langchain.prompts import ChatPromptTemplate
+    from langchain.schema.runnable import RunnableParallel, RunnablePassthrough, RunnableLambda
+    from src.models.batch_qa import retrieve_batch
+    from src.models.router import QueryRouter
+    from src.vector_store.hierarchical import is_hierarchical_collection
+
+    search_params = get_search_params()
+
     st.write("Inicializando embeddings e modelo...")
     embeddings, model = initialize_embeddings_and_model()
 
-    st.write("Carregando coleção existente do Qdrant...")
+    st.write(f"Carregando coleção existente ({VECTOR_STORE_CONFIG['backend']})...")
     vectorstore = load_vectorstore(embeddings)
 
     # Aplicar filtro com base no arquivo_id
@@ -117,25 +158,53 @@ def main():
     if arquivo_id:
         try:
             arquivo_id = int(arquivo_id)  # Garante que seja inteiro
-            filter_condition = {
-                "must": [
-                    {"key": "metadata.arquivo_id", "match": {"value": arquivo_id}}
-                ]
-            }
+            filter_condition = build_arquivo_filter(arquivo_id)
             st.write(f"Filtrando resultados para 'arquivo_id': {arquivo_id}")
         except ValueError:
             st.error("O 'arquivo_id' deve ser um número inteiro.")
             return
 
-    retriever = vectorstore.as_retriever(search_kwargs={"filter": filter_condition})
+    # Embedding da pergunta calculado uma única vez, usado no roteamento e na busca
+    query_vector = embeddings.embed_query(question)
+
+    # Sem arquivo_id informado: roteamento pelo centroide mais próximo (fallback para busca global)
+    if filter_condition is None:
+        router = QueryRouter.load(COLLECTION_NAME)
+        rota = router.route(query_vector) if router else None
+        if rota:
+            filter_condition = QueryRouter.build_filter(rota)
+            st.write(
+                f"Consulta roteada para '{rota['key']}' = {rota['value']} "
+                f"(similaridade {rota['similarity']:.3f}, margem {rota['margin']:.3f})"
+            )
+        else:
+            st.write("Nenhum manual previsto com confiança. Buscando em toda a coleção.")
+
+    # Collection hierárquica: busca nos trechos filhos e devolve spans mesclados ou a página inteira
+    modo = None
+    if is_hierarchical_collection(COLLECTION_NAME):
+        modo = st.radio("Contexto recuperado:", ["trechos", "pagina"],
+                        format_func=lambda m: "Trechos casados" if m == "trechos" else "Página expandida")
 
-    RAG_TEMPLATE = """
-    Você é um assistente para tarefas de perguntas e respostas. Use os seguintes trechos de contexto recuperado para responder à pergunta.
-    Se você não souber a resposta, simplesmente diga que não sabe.
-    <context>{context}</context> Responda à seguinte pergunta: {question}
-    """
+    # Mesmo despacho do batch_qa.py: resumos para visão geral, trechos filhos ou páginas sem os resumos
+    try:
+        [docs], [de_resumos] = retrieve_batch(vectorstore, [question], [query_vector], [filter_condition], 4,
+                                              search_params, COLLECTION_NAME, modo)
+    except Exception as e:
+        st.error("Erro ao recuperar o contexto.")
+        st.exception(e)
+        return
+    if is_overview_question(question):
+        if de_resumos:
+            st.write("Pergunta de visão geral: respondendo a partir dos resumos pré-calculados.")
+        else:
+            st.write("Nenhum resumo indexado para esta consulta. Usando as páginas.")
+
+    # Pergunta de visão geral: resumos pré-calculados e prompt curto, em vez das páginas inteiras
+    template = SUMMARY_TEMPLATE if de_resumos else RAG_TEMPLATE
+    retriever = RunnableLambda(lambda q: docs)
 
-    rag_prompt = ChatPromptTemplate.from_template(RAG_TEMPLATE)
+    rag_prompt = ChatPromptTemplate.from_template(template)
 
     rag_chain_from_docs = (
         RunnablePassthrough.assign(context=(lambda x: format_docs(x["context"])))
@@ -144,13 +213,25 @@ def main():
         | RunnableLambda(lambda x: x.content if hasattr(x, 'content') else x)
     )
 
+    # Caminho rápido: QA extrativo local para perguntas factuais curtas; abaixo do limiar, segue para o LLM
+    extractive_qa = None if de_resumos else get_extractive_qa(CONFIG)
+    extraida = {}
+
+    def answer_with_fast_path(x):
+        if extractive_qa is not None:
+            resposta = extractive_qa.answer(x["question"], x["context"])
+            if resposta:
+                extraida.update(resposta)
+                return resposta["answer"]
+        return rag_chain_from_docs.invoke(x)
+
     rag_chain_with_source = (
         RunnableParallel(
             {
                 "context": RunnableLambda(lambda q: retriever.invoke(q)),
                 "question": RunnablePassthrough()
             }
-        ).assign(answer=rag_chain_from_docs)
+        ).assign(answer=RunnableLambda(answer_with_fast_path))
     )
 
     st.write("Invocando a cadeia RAG...")
@@ -162,6 +243,12 @@ def main():
         st.exception(e)
         return
 
+    if extraida:
+        st.write(
+            f"Resposta extraída localmente (confiança {extraida['score']:.2f}, "
+            f"{extraida['latency_ms']:.0f} ms), sem chamada ao LLM."
+        )
+
     # Exibição da pergunta e resposta
     st.subheader("Pergunta:")
     st.write(result.get('question', '').strip())
@@ -180,6 +267,7 @@ def main():
 
     # Avaliação RAGAS
     st.write("Calculando métricas RAGAS...")
+    from ragas.llms.base import LangchainLLMWrapper
     llm_for_ragas = LangchainLLMWrapper(model)
     ragas_scores = calculate_ragas_metrics(
         question=result.get('question', ''),
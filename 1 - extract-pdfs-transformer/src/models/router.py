@@ -0,0 +1,90 @@
+import os
+import json
+import numpy as np
+from typing import Any, Dict, List, Optional
+
+# Diretórios principais
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # Diretório base do script
+DIR_SRC = os.path.dirname(BASE_DIR)  # Diretório src
+DIR_PAI = os.path.dirname(DIR_SRC)  # Diretório pai
+DIR_DATA = os.path.join(DIR_PAI, "data")  # Diretório de dados
+DIR_ROUTER = os.path.join(DIR_DATA, "router")  # Centroides gerados pelo CollectionCreator
+CONFIG_VECTORSTORE = os.path.join(DIR_SRC, "vector_store", "config.json")  # Config da indexação
+
+# Limiares padrão (sobrescritos pela seção "routing" do config.json)
+MIN_SIMILARITY = 0.80  # Similaridade de cosseno mínima com o centroide vencedor
+MIN_MARGIN = 0.01  # Diferença mínima para o segundo colocado
+
+
+class QueryRouter:
+    """Prediz o manual (ou outra chave de metadados) de uma pergunta pelo centroide mais próximo.
+
+    Os centroides são calculados na indexação (CollectionCreator.save_routing_centroids) a partir
+    dos vetores dos documentos de cada valor. Quando a predição é confiável, a busca é restrita por
+    um filtro de payload; caso contrário, a busca continua global.
+    """
+
+    def __init__(self, centroids: Dict[str, Any], min_similarity: float = MIN_SIMILARITY,
+                 min_margin: float = MIN_MARGIN):
+        self.min_similarity = min_similarity
+        self.min_margin = min_margin
+        self.keys = []
+        for key, dados in centroids["keys"].items():
+            self.keys.append((key, dados["values"], np.asarray(dados["centroids"], dtype=np.float32)))
+
+    @classmethod
+    def load(cls, collection_name: str, config_file: str = CONFIG_VECTORSTORE) -> Optional["QueryRouter"]:
+        """Carrega o roteador de uma collection, ou None se os centroides não existirem."""
+        caminho = os.path.join(DIR_ROUTER, f"{collection_name}.json")
+        if not os.path.exists(caminho):
+            return None
+        with open(caminho, "r", encoding="utf-8") as f:
+            centroids = json.load(f)
+
+        routing_config = {}
+        if os.path.exists(config_file):
+            with open(config_file, "r", encoding="utf-8") as f:
+                routing_config = json.load(f).get("routing", {})
+        return cls(
+            centroids,
+            min_similarity=routing_config.get("min_similarity", MIN_SIMILARITY),
+            min_margin=routing_config.get("min_margin", MIN_MARGIN),
+        )
+
+    def route(self, query_vector: List[float]) -> Optional[Dict[str, Any]]:
+        """
+        Prediz o valor de metadados mais provável para a pergunta.
+
+        As chaves são avaliadas na ordem do config ("routing.keys"); a primeira com predição
+        confiável é usada.
+
+        Args:
+            query_vector (list): Embedding da pergunta.
+
+        Returns:
+            dict | None: {"key", "value", "similarity", "margin"}, ou None se nenhuma predição for confiável.
+        """
+        vetor = np.asarray(query_vector, dtype=np.float32)
+        vetor /= np.linalg.norm(vetor) or 1.0
+        for key, valores, centroides in self.keys:
+            similaridades = centroides @ vetor
+            ordem = np.argsort(similaridades)[::-1]
+            melhor = float(similaridades[ordem[0]])
+            segundo = float(similaridades[ordem[1]]) if len(ordem) > 1 else -1.0
+            if melhor >= self.min_similarity and melhor - segundo >= self.min_margin:
+                return {
+                    "key": key,
+                    "value": valores[ordem[0]],
+                    "similarity": melhor,
+                    "margin": melhor - segundo,
+                }
+        return None
+
+    @staticmethod
+    def build_filter(rota: Dict[str, Any]) -> Dict[str, Any]:
+        """Filtro de payload do Qdrant para a rota prevista."""
+        return {
+            "must": [
+                {"key": f"metadata.{rota['key']}", "match": {"value": rota["value"]}}
+            ]
+        }
@@ -0,0 +1,274 @@
+import os
+import sys
+import json
+import hashlib
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+
+# Configuração do ambiente
+load_dotenv()
+
+# Configurações da OpenAI
+modelo = "gpt-4o-mini"
+
+# Diretórios
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # Diretório base do script
+DIR_SRC = os.path.dirname(BASE_DIR)  # Diretório src
+DIR_PAI = os.path.dirname(DIR_SRC)  # Diretório pai
+if DIR_PAI not in sys.path:
+    sys.path.append(DIR_PAI)  # Adiciona o diretório pai ao PATH do sistema
+DIR_DATA = os.path.join(DIR_PAI, "data")  # Diretório para armazenamento de dados
+DIR_DATA_REFINEMENT = os.path.join(DIR_DATA, "outputs_vision_and_extractor")  # Páginas unificadas
+DIR_SUMMARIES = os.path.join(DIR_DATA, "outputs_final_summaries")  # Resumos por manual
+DIR_SUMMARY_CACHE = os.path.join(DIR_SUMMARIES, "cache")  # Um arquivo por nó da árvore (hash do conteúdo)
+DIR_LOGS = os.path.join(DIR_DATA, "logs")  # Diretório de logs
+
+from src.utils.logging_config import log_config
+from src.utils.openai_client import get_cliente
+logging = log_config(DIR_LOGS, "summarize")
+
+MAX_WORKERS = 8  # Chamadas simultâneas à OpenAI
+PAGINAS_POR_SECAO = 8  # Páginas consecutivas reduzidas em um resumo de seção
+FATOR_REDUCAO = 8  # Resumos combinados por nó nos níveis acima das seções
+VERSAO_PROMPTS = 1  # Incrementar ao alterar os prompts: invalida o cache
+
+PROMPT_PAGINA = """
+Resuma a página de manual técnico abaixo em até 5 tópicos curtos, mantendo valores, unidades,
+especificações e procedimentos. **Não invente informações nem faça avaliações.**
+
+### Página {pagina}:
+{texto}
+"""
+
+PROMPT_REDUCAO = """
+Combine os resumos abaixo, de partes consecutivas de um manual técnico, em um único resumo
+{escopo}. Elimine repetições e mantenha os valores, unidades e procedimentos mais importantes,
+organizados por assunto. **Use apenas as informações dos resumos.**
+
+{resumos}
+"""
+
+_cache = {}  # Cache em memória dos nós já lidos ou gerados
+_cache_lock = threading.Lock()
+
+
+# Funções do cache de nós (chave: hash do tipo do nó, do modelo, dos prompts e da entrada)
+def chave_no(tipo, entrada):
+    conteudo = json.dumps([tipo, modelo, VERSAO_PROMPTS, entrada], ensure_ascii=False)
+    return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+
+def _ler_cache(chave):
+    """Retorna o resumo em cache para a chave (memória e depois disco) ou None."""
+    with _cache_lock:
+        if chave in _cache:
+            return _cache[chave]
+    caminho = os.path.join(DIR_SUMMARY_CACHE, f"{chave}.txt")
+    if os.path.exists(caminho):
+        with open(caminho, "r", encoding="utf-8") as f:
+            texto = f.read()
+        with _cache_lock:
+            _cache[chave] = texto
+        return texto
+    return None
+
+def _gravar_cache(chave, texto):
+    """Grava o resumo no cache em memória e em disco."""
+    with _cache_lock:
+        _cache[chave] = texto
+    try:
+        os.makedirs(DIR_SUMMARY_CACHE, exist_ok=True)
+        caminho = os.path.join(DIR_SUMMARY_CACHE, f"{chave}.txt")
+        temporario = f"{caminho}.{threading.get_ident()}.tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            f.write(texto)
+        os.replace(temporario, caminho)
+    except Exception as e:
+        logging.warning(f"Não foi possível gravar o cache de resumo {chave}: {e}")
+
+
+# Função para enviar um prompt de resumo para o OpenAI
+def enviar_para_openai(prompt, max_tokens):
+    """
+    Envia um prompt de resumo para o OpenAI e retorna o texto gerado.
+
+    Args:
+        prompt (str): Prompt completo.
+        max_tokens (int): Limite de tokens da resposta.
+
+    Returns:
+        str: Resumo gerado, ou None em caso de erro.
+    """
+    try:
+        resposta = get_cliente().chat.completions.create(
+            model=modelo,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.2,
+            max_tokens=max_tokens,
+        )
+        return resposta.choices[0].message.content.strip()
+    except Exception as e:
+        logging.error(f"Erro ao acessar a OpenAI: {e}")
+        return None
+
+
+def resumir_no(tipo, entrada, prompt, max_tokens):
+    """
+    Resume um nó da árvore, reaproveitando o cache quando a entrada não mudou.
+
+    Como a chave de um nó depende apenas da sua entrada (o texto da página ou os resumos dos filhos),
+    a alteração de uma página recalcula somente o caminho dela até a raiz.
+    """
+    chave = chave_no(tipo, entrada)
+    resumo = _ler_cache(chave)
+    if resumo is None:
+        resumo = enviar_para_openai(prompt, max_tokens)
+        if resumo:
+            _gravar_cache(chave, resumo)
+    return resumo
+
+
+def carregar_paginas(manual):
+    """
+    Carrega as páginas unificadas de um manual (saída do data_refinement), ordenadas pelo número.
+
+    Returns:
+        list: Tuplas (número da página, texto).
+    """
+    subpasta = os.path.join(DIR_DATA_REFINEMENT, manual)
+    paginas = []
+    for nome in os.listdir(subpasta):
+        if not nome.endswith("_resultado.json"):
+            continue
+        with open(os.path.join(subpasta, nome), "r", encoding="utf-8") as f:
+            dados = json.load(f)
+        texto = (dados.get("unified_analysis") or "").strip()
+        if texto:
+            paginas.append((int(dados["page"]), texto))
+    return sorted(paginas)
+
+
+def _reduzir(executor, itens, escopo, max_tokens):
+    """Resume cada grupo de itens [(primeira página, última página, resumo)] em paralelo."""
+    futuros = []
+    for inicio, fim, resumos in itens:
+        texto = "\n\n".join(f"### Páginas {a}-{b}:\n{r}" for a, b, r in resumos)
+        prompt = PROMPT_REDUCAO.format(escopo=escopo, resumos=texto)
+        futuros.append((inicio, fim, executor.submit(resumir_no, f"reducao:{escopo}", texto, prompt, max_tokens)))
+    return [(inicio, fim, futuro.result()) for inicio, fim, futuro in futuros]
+
+
+def resumir_manual(manual, max_workers=MAX_WORKERS, raise_errors=False):
+    """
+    Gera o resumo hierárquico de um manual: páginas -> seções -> ... -> manual.
+
+    As páginas são resumidas em paralelo (map). As seções agrupam páginas por faixa fixa de
+    numeração (1-8, 9-16, ...), de modo que a inclusão ou alteração de uma página não desloca as
+    demais seções; os níveis seguintes combinam FATOR_REDUCAO resumos por vez até restar um.
+
+    Args:
+        manual (str): Nome da subpasta em DIR_DATA_REFINEMENT (p. ex. "fluidos_13472").
+        max_workers (int): Chamadas simultâneas à OpenAI.
+        raise_errors (bool): Se True, um nó sem resumo (falha da OpenAI) interrompe o manual com
+            RuntimeError, em vez de ser omitido; os nós já resumidos ficam no cache para a nova tentativa.
+
+    Returns:
+        dict: {"manual", "resumo", "secoes": [{"paginas": [inicio, fim], "resumo"}]}, ou None.
+    """
+    paginas = carregar_paginas(manual)
+    if not paginas:
+        logging.warning(f"Nenhuma página refinada para o manual {manual}.")
+        if raise_errors:
+            raise RuntimeError(f"Nenhuma página refinada para o manual {manual}.")
+        return None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Map: um resumo por página
+        futuros = [
+            (numero, executor.submit(resumir_no, "pagina", texto,
+                                     PROMPT_PAGINA.format(pagina=numero, texto=texto), 300))
+            for numero, texto in paginas
+        ]
+        resumos_paginas = [(numero, numero, futuro.result()) for numero, futuro in futuros]
+        resumos_paginas = [r for r in resumos_paginas if r[2]]
+        falhas = len(paginas) - len(resumos_paginas)
+        if falhas:
+            logging.warning(f"{falhas} página(s) do manual {manual} sem resumo; omitidas da redução.")
+            if raise_errors:
+                raise RuntimeError(f"{falhas} página(s) do manual {manual} sem resumo.")
+
+        # Reduce: seções por faixa de páginas
+        faixas = {}
+        for item in resumos_paginas:
+            faixas.setdefault((item[0] - 1) // PAGINAS_POR_SECAO, []).append(item)
+        secoes = _reduzir(executor, [(g[0][0], g[-1][1], g) for g in faixas.values()], "da seção", 600)
+        if raise_errors and not all(s[2] for s in secoes):
+            raise RuntimeError(f"Seção(ões) do manual {manual} sem resumo.")
+        secoes = [s for s in secoes if s[2]]
+
+        # Reduce: níveis acima das seções, até o resumo do manual
+        nivel = secoes
+        while len(nivel) > 1:
+            grupos = [nivel[i:i + FATOR_REDUCAO] for i in range(0, len(nivel), FATOR_REDUCAO)]
+            escopo = "do manual" if len(grupos) == 1 else "da parte do manual"
+            nivel = [n for n in _reduzir(executor, [(g[0][0], g[-1][1], g) for g in grupos], escopo, 900) if n[2]]
+            if raise_errors and len(nivel) < len(grupos):
+                raise RuntimeError(f"Nível de redução do manual {manual} sem resumo.")
+
+    if not nivel:
+        logging.error(f"Não foi possível gerar o resumo do manual {manual}.")
+        if raise_errors:
+            raise RuntimeError(f"Não foi possível gerar o resumo do manual {manual}.")
+        return None
+    return {
+        "manual": manual,
+        "resumo": nivel[0][2],
+        "secoes": [{"paginas": [inicio, fim], "resumo": resumo} for inicio, fim, resumo in secoes],
+    }
+
+
+def salvar_resumo(resumo):
+    """Salva o resumo de um manual em DIR_SUMMARIES/<manual>.json."""
+    os.makedirs(DIR_SUMMARIES, exist_ok=True)
+    caminho = os.path.join(DIR_SUMMARIES, f"{resumo['manual']}.json")
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(resumo, f, ensure_ascii=False, indent=4)
+    os.replace(temporario, caminho)
+    logging.info(f"Resumo salvo em: {caminho}")
+
+
+def carregar_resumo(manual):
+    """Carrega o resumo salvo de um manual, ou None se ainda não foi gerado."""
+    caminho = os.path.join(DIR_SUMMARIES, f"{manual}.json")
+    if not os.path.exists(caminho):
+        return None
+    with open(caminho, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def processar_manuais(manuais=None, max_workers=MAX_WORKERS):
+    """Gera e salva os resumos dos manuais informados (ou de todos em DIR_DATA_REFINEMENT)."""
+    if not manuais:
+        manuais = sorted(d for d in os.listdir(DIR_DATA_REFINEMENT)
+                         if os.path.isdir(os.path.join(DIR_DATA_REFINEMENT, d)))
+    for manual in manuais:
+        logging.info(f"Resumindo o manual {manual}...")
+        resumo = resumir_manual(manual, max_workers)
+        if resumo:
+            salvar_resumo(resumo)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resumos map-reduce pré-calculados dos manuais.")
+    parser.add_argument("manuais", nargs="*", help="Subpastas de outputs_vision_and_extractor (padrão: todas).")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="Chamadas simultâneas à OpenAI.")
+    args = parser.parse_args()
+
+    logging.info("Início da geração de resumos.")
+    try:
+        processar_manuais(args.manuais, args.workers)
+    except Exception as e:
+        logging.critical(f"Erro crítico durante a geração de resumos: {e}")
+    logging.info("Geração de resumos concluída.")
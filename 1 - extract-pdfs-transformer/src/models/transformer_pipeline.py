@@ -0,0 +1,181 @@
+import re
+import time
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+# Parâmetros padrão (sobrescritos pela seção "extractive_qa" do config.json)
+DEFAULT_EXTRACTIVE_QA_CONFIG = {
+    "enabled": True,
+    "model": "deepset/xlm-roberta-base-squad2",  # QA extrativo multilíngue (SQuAD 2.0)
+    "min_score": 0.5,            # Confiança mínima para responder sem o LLM
+    "max_question_words": 15,    # Apenas perguntas curtas e factuais usam o caminho rápido
+    "max_batch_size": 16,        # Pares (pergunta, contexto) por forward
+    "max_wait_ms": 5,            # Espera máxima para completar um lote
+    "max_seq_len": 384,          # Tokens por janela de contexto
+    "doc_stride": 128,           # Sobreposição entre janelas de páginas longas
+    "max_answer_len": 48,        # Tokens da resposta extraída
+    "num_threads": None,         # Threads do PyTorch (None: padrão)
+}
+
+# Perguntas que pedem explicação, comparação ou resumo ficam com o LLM
+PERGUNTA_ABERTA = re.compile(
+    r"\b(por que|porque|como (funciona|fa[çz]o|devo)|explique|compare|diferen[çc]a|resum(a|e|o|ir)|vis[aã]o geral)\b",
+    re.IGNORECASE
+)
+
+
+def get_extractive_qa_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    extractive_qa_config = dict(DEFAULT_EXTRACTIVE_QA_CONFIG)
+    extractive_qa_config.update(config.get("extractive_qa") or {})
+    return extractive_qa_config
+
+
+class DynamicBatcher:
+    """
+    Agrupa requisições concorrentes em lotes para uma única chamada de `processar_lote`.
+
+    Uma thread consumidora espera o primeiro item e junta os que chegarem em até `max_wait_ms`,
+    até `max_batch_size` itens. Cada `submit` devolve um Future com o resultado do seu item.
+    """
+
+    def __init__(self, processar_lote: Callable[[List[Any]], List[Any]], max_batch_size: int = 16,
+                 max_wait_ms: float = 5):
+        self.processar_lote = processar_lote
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._fila: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(target=self._executar, daemon=True)
+        self._thread.start()
+
+    def submit(self, item: Any) -> Future:
+        futuro: Future = Future()
+        self._fila.put((item, futuro))
+        return futuro
+
+    def close(self):
+        self._fila.put(None)
+        self._thread.join()
+
+    def _coletar_lote(self, primeiro):
+        lote = [primeiro]
+        limite = time.monotonic() + self.max_wait
+        while len(lote) < self.max_batch_size:
+            restante = limite - time.monotonic()
+            try:
+                item = self._fila.get(timeout=restante) if restante > 0 else self._fila.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:  # Encerramento: processa o lote atual e repassa o sinal
+                self._fila.put(None)
+                break
+            lote.append(item)
+        return lote
+
+    def _executar(self):
+        while True:
+            primeiro = self._fila.get()
+            if primeiro is None:
+                return
+            lote = self._coletar_lote(primeiro)
+            try:
+                resultados = self.processar_lote([item for item, _ in lote])
+                for (_, futuro), resultado in zip(lote, resultados):
+                    futuro.set_result(resultado)
+            except Exception as e:
+                for _, futuro in lote:
+                    futuro.set_exception(e)
+
+
+class ExtractiveQA:
+    """
+    QA extrativo local em CPU sobre as páginas recuperadas, usado antes do LLM.
+
+    Cada página recuperada gera um par (pergunta, contexto); os pares de requisições concorrentes
+    passam juntos pelo modelo via DynamicBatcher. A resposta é o trecho de maior confiança, se a
+    confiança atingir `min_score`; caso contrário a pergunta segue para a cadeia com o LLM.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        from transformers import pipeline
+        import torch
+
+        self.config = get_extractive_qa_config(config or {})
+        if self.config["num_threads"]:
+            torch.set_num_threads(self.config["num_threads"])
+        self.pipeline = pipeline("question-answering", model=self.config["model"], device=-1)
+        self.batcher = DynamicBatcher(self._processar_lote, self.config["max_batch_size"],
+                                      self.config["max_wait_ms"])
+
+    def _processar_lote(self, pares: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+        resultados = self.pipeline(
+            question=[p["question"] for p in pares],
+            context=[p["context"] for p in pares],
+            batch_size=len(pares),
+            max_seq_len=self.config["max_seq_len"],
+            doc_stride=self.config["doc_stride"],
+            max_answer_len=self.config["max_answer_len"],
+            handle_impossible_answer=True,
+        )
+        return resultados if isinstance(resultados, list) else [resultados]
+
+    def is_eligible(self, question: str) -> bool:
+        """Perguntas curtas e factuais (capacidades, torques, especificações)."""
+        palavras = len((question or "").split())
+        return 0 < palavras <= self.config["max_question_words"] and not PERGUNTA_ABERTA.search(question)
+
+    def answer_many(self, questions: List[str], docs_per_question: List[List[Any]]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Responde várias perguntas; None para as inelegíveis ou abaixo do limiar de confiança.
+
+        Todos os pares são enviados ao batcher antes de aguardar qualquer resultado, de modo que
+        perguntas diferentes compartilham os mesmos lotes.
+
+        Returns:
+            list: {"answer", "score", "document", "latency_ms"} ou None, na ordem das perguntas.
+        """
+        inicio = time.perf_counter()
+        pendentes = []
+        for question, docs in zip(questions, docs_per_question):
+            docs = [d for d in docs if d.page_content] if self.is_eligible(question) else []
+            pendentes.append([
+                (doc, self.batcher.submit({"question": question, "context": doc.page_content})) for doc in docs
+            ])
+
+        respostas = []
+        for futuros in pendentes:
+            melhor = None
+            for doc, futuro in futuros:
+                resultado = futuro.result()
+                resposta = (resultado.get("answer") or "").strip()
+                if resposta and (melhor is None or resultado["score"] > melhor["score"]):
+                    melhor = {"answer": resposta, "score": float(resultado["score"]), "document": doc}
+            if melhor and melhor["score"] >= self.config["min_score"]:
+                melhor["latency_ms"] = (time.perf_counter() - inicio) * 1000
+                respostas.append(melhor)
+            else:
+                respostas.append(None)
+        return respostas
+
+    def answer(self, question: str, docs: List[Any]) -> Optional[Dict[str, Any]]:
+        return self.answer_many([question], [docs])[0]
+
+    def warmup(self):
+        """Executa um forward com entrada mínima (inicializa os kernels e as threads do PyTorch)."""
+        self.batcher.submit({"question": "Qual o valor?", "context": "O valor é 1."}).result()
+
+
+_extractive_qa: Optional[ExtractiveQA] = None
+_extractive_qa_lock = threading.Lock()
+
+
+def get_extractive_qa(config: Dict[str, Any]) -> Optional[ExtractiveQA]:
+    """Instância única por processo (o modelo é carregado uma vez), ou None se desabilitado no config."""
+    global _extractive_qa
+    if not get_extractive_qa_config(config)["enabled"]:
+        return None
+    with _extractive_qa_lock:
+        if _extractive_qa is None:
+            _extractive_qa = ExtractiveQA(config)
+    return _extractive_qa
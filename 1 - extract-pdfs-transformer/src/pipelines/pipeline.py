@@ -0,0 +1,245 @@
+import os
+import sys
+import time
+import socket
+import argparse
+import threading
+import traceback
+import json
+
+# Diretórios principais
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # Diretório base do script
+DIR_SRC = os.path.dirname(BASE_DIR)  # Diretório src
+DIR_PAI = os.path.dirname(DIR_SRC)  # Diretório pai
+if DIR_PAI not in sys.path:  # Adicionando o diretório pai no path do script
+    sys.path.append(DIR_PAI)
+DIR_DATA = os.path.join(DIR_PAI, "data")  # Diretório de dados
+DIR_DATA_RAW = os.path.join(DIR_DATA, "raw")  # Diretório dos PDFs
+DIR_DATA_PROCESSED = os.path.join(DIR_DATA, "processed")  # Diretório dos dados extraídos dos PDFs (pymu)
+DIR_DATA_PROCESSED_CLEAN = os.path.join(DIR_DATA, "processed_clean")  # Dados extraídos e limpos
+DIR_PDF_TO_IMAGE = os.path.join(DIR_DATA, "processed_pdf_to_images")  # Imagens processadas a partir de PDFs
+DIR_VISION = os.path.join(DIR_DATA, "outputs_vision")  # Descrições do Vision
+DIR_DATA_REFINEMENT = os.path.join(DIR_DATA, "outputs_vision_and_extractor")  # Páginas refinadas (Vision + pymu)
+DIR_LOGS = os.path.join(DIR_DATA, "logs")  # Diretório de logs
+ARQUIVO_FILA = os.path.join(DIR_DATA, "fila", "ingestao.sqlite")  # Fila de trabalho padrão
+CONFIG_VECTORSTORE = os.path.join(DIR_SRC, "vector_store", "config.json")  # Config da indexação
+
+from src.utils.logging_config import log_config
+from src.utils.file_utils import gravar_atomico
+from src.pipelines.work_queue import LeaseQueue
+logging = log_config(DIR_LOGS, "pipeline")
+
+# Fases da ingestão distribuída, executadas em ordem. Dentro de uma fase as tarefas são independentes.
+#   preparar:   extração (JSONL), limpeza e conversão em imagens de um manual
+#   enriquecer: Vision e refinamento de um manual (após a deduplicação, feita pelo coordenador)
+#   resumir:    resumos map-reduce de um manual, indexados junto com as páginas
+#   indexar:    criação de uma collection do grid do config.json
+FASES = ["preparar", "enriquecer", "resumir", "indexar"]
+LEASE_SEGUNDOS = 300  # Prazo do lease; renovado a cada LEASE_SEGUNDOS / 3 pelo heartbeat
+INTERVALO_POLL = 5  # Espera (s) quando não há tarefas disponíveis
+ESTADO_ENCERRADO = "encerrado"  # Chave de estado gravada pelo coordenador ao fim da execução
+
+
+def tarefa_preparar(payload):
+    """
+    Extrai, limpa e converte em imagens um manual de data/raw.
+
+    As etapas são chamadas com raise_errors=True: uma falha (PDF ilegível, erro em uma página,
+    extração sem páginas) interrompe a tarefa antes de publicar a saída, e a fila a repete.
+    """
+    from src.extract.pdf_parser import iter_pages_from_pdf, save_as_jsonl
+    from src.refine.process_clean import processar_arquivo
+    from src.utils.pdf_to_image import pdf_to_image
+
+    manual = payload["manual"]
+    pdf_path = os.path.join(DIR_DATA_RAW, f"{manual}.pdf")
+    os.makedirs(DIR_DATA_PROCESSED, exist_ok=True)
+    saida_jsonl = os.path.join(DIR_DATA_PROCESSED, f"{manual}.jsonl")
+
+    def extrair(temporario):
+        paginas = iter_pages_from_pdf(pdf_path, payload.get("ocr_mode", "pagina"), raise_errors=True)
+        if save_as_jsonl(paginas, temporario, raise_errors=True) == 0:
+            raise ValueError(f"Nenhuma página extraída de {pdf_path}.")
+
+    gravar_atomico(saida_jsonl, extrair)
+    processar_arquivo(f"{manual}.jsonl", raise_errors=True)
+
+    pasta_imagens = os.path.join(DIR_PDF_TO_IMAGE, manual)
+    os.makedirs(pasta_imagens, exist_ok=True)
+    pdf_to_image(pdf_path, pasta_imagens, raise_errors=True)
+
+
+def _exigir_saidas(etapa, manual, chaves, pasta, sufixo):
+    """Levanta RuntimeError se alguma página representante não tiver a saída `<chave><sufixo>` em `pasta`."""
+    faltando = [chave for chave in chaves if not os.path.exists(os.path.join(pasta, f"{chave}{sufixo}"))]
+    if faltando:
+        raise RuntimeError(f"{etapa}: {len(faltando)} página(s) de {manual} sem saída (p. ex. {faltando[:5]}).")
+
+
+def tarefa_enriquecer(payload):
+    """
+    Executa o Vision e o refinamento de um manual, retomando páginas já processadas.
+
+    As duas etapas registram falhas da OpenAI no log e seguem para a próxima página; ao fim de cada
+    uma, a tarefa confere se toda página representante tem saída e falha caso contrário, para que a
+    fila a repita (apenas as páginas faltantes são reenviadas).
+    """
+    from src.extract.vision import processar_subpasta
+    from src.refine.data_refinement import processar_arquivo
+    from src.refine.dedup import carregar_grupos, eh_representante
+    from src.utils.file_utils import ler_jsonl
+
+    manual = payload["manual"]
+    grupos = carregar_grupos()
+
+    processar_subpasta(manual, grupos, retomar=True)
+    imagens = [os.path.splitext(f)[0] for f in os.listdir(os.path.join(DIR_PDF_TO_IMAGE, manual))
+               if f.lower().endswith((".jpg", ".jpeg", ".png"))]
+    _exigir_saidas("Vision", manual, [c for c in imagens if eh_representante(grupos, c)],
+                   os.path.join(DIR_VISION, manual), "_description.txt")
+
+    processar_arquivo(f"{manual}.jsonl", grupos, retomar=True)
+    jsonl_limpo = os.path.join(DIR_DATA_PROCESSED_CLEAN, f"{manual}.jsonl")
+    paginas = [f"{manual}_pag{pagina['page']}" for pagina in ler_jsonl(jsonl_limpo)]
+    _exigir_saidas("Refinamento", manual, [c for c in paginas if eh_representante(grupos, c)],
+                   os.path.join(DIR_DATA_REFINEMENT, manual), "_resultado.json")
+
+
+def tarefa_resumir(payload):
+    """Gera o resumo hierárquico de um manual (nós inalterados vêm do cache por hash)."""
+    from src.models.summarize import resumir_manual, salvar_resumo
+
+    # raise_errors: um resumo parcial não é salvo; a fila repete a tarefa com os nós prontos em cache
+    resumo = resumir_manual(payload["manual"], raise_errors=True)
+    salvar_resumo(resumo)
+
+
+def tarefa_indexar(payload):
+    """Cria um grupo do grid (variantes de quantização com os mesmos vetores), recriado do zero: idempotente."""
+    from src.vector_store.vectorstores import CollectionCreator
+
+    creator = CollectionCreator(payload["config_file"])
+    configs = creator.generate_collection_configs(creator.load_all_documents())
+    creator.create_collection(configs[payload["indice"]])
+
+
+TAREFAS = {
+    "preparar": tarefa_preparar,
+    "enriquecer": tarefa_enriquecer,
+    "resumir": tarefa_resumir,
+    "indexar": tarefa_indexar,
+}
+
+
+def executar_worker(fila, worker_id, lease_segundos=LEASE_SEGUNDOS):
+    """
+    Reivindica e executa tarefas até o coordenador encerrar a execução.
+
+    Uma thread de heartbeat renova o lease enquanto a tarefa roda. Se o lease for perdido,
+    a tarefa pode ser reexecutada por outro worker; as saídas de todas as etapas são idempotentes.
+    """
+    logging.info(f"Worker {worker_id} iniciado.")
+    while True:
+        tarefa = fila.claim(worker_id, lease_segundos)
+        if tarefa is None:
+            if fila.get_state(ESTADO_ENCERRADO):
+                break
+            time.sleep(INTERVALO_POLL)
+            continue
+
+        logging.info(f"Worker {worker_id}: tarefa {tarefa['id']} (tentativa {tarefa['tentativas']}).")
+        parar = threading.Event()
+
+        def heartbeat():
+            while not parar.wait(lease_segundos / 3):
+                if not fila.heartbeat(tarefa["id"], worker_id, lease_segundos):
+                    logging.warning(f"Worker {worker_id} perdeu o lease da tarefa {tarefa['id']}.")
+                    return
+
+        thread_heartbeat = threading.Thread(target=heartbeat, daemon=True)
+        thread_heartbeat.start()
+        try:
+            TAREFAS[tarefa["fase"]](tarefa["payload"])
+            if fila.complete(tarefa["id"], worker_id):
+                logging.info(f"Worker {worker_id}: tarefa {tarefa['id']} concluída.")
+            else:
+                # Lease perdido: a tarefa foi devolvida à fila ou já está com outro worker
+                logging.warning(f"Worker {worker_id}: tarefa {tarefa['id']} executada após perder o lease; "
+                                f"conclusão não registrada (outro worker a assumiu ou ela voltará para a fila).")
+        except Exception as e:
+            logging.error(f"Worker {worker_id}: erro na tarefa {tarefa['id']}: {e}")
+            fila.fail(tarefa["id"], worker_id, traceback.format_exc())
+        finally:
+            parar.set()
+            thread_heartbeat.join()
+    logging.info(f"Worker {worker_id} encerrado.")
+
+
+def _aguardar_fase(fila, fase, intervalo):
+    """Aguarda o fim de uma fase, registrando o progresso de todas as fases."""
+    while not fila.phase_done(fase):
+        logging.info(f"Progresso: {json.dumps(fila.progress(), ensure_ascii=False)}")
+        time.sleep(intervalo)
+    falhas = fila.failures(fase)
+    logging.info(f"Fase {fase} concluída ({len(falhas)} falha(s)).")
+    for falha in falhas:
+        logging.error(f"Tarefa {falha['id']} falhou após {falha['tentativas']} tentativas: {falha['erro']}")
+
+
+def executar_coordenador(fila, config_file=CONFIG_VECTORSTORE, ocr_mode="pagina", intervalo=30):
+    """
+    Enfileira as tarefas de cada fase, aguarda sua conclusão e reporta o progresso.
+
+    Pode ser reiniciado a qualquer momento: tarefas já enfileiradas não são duplicadas e as que
+    falharam na execução anterior voltam para a fila.
+    """
+    fila.set_state(ESTADO_ENCERRADO, "")
+    manuais = sorted(os.path.splitext(f)[0] for f in os.listdir(DIR_DATA_RAW) if f.lower().endswith(".pdf"))
+    logging.info(f"Coordenador: {len(manuais)} manuais em {DIR_DATA_RAW}.")
+
+    for manual in manuais:
+        fila.enqueue(f"preparar:{manual}", "preparar", {"manual": manual, "ocr_mode": ocr_mode})
+    _aguardar_fase(fila, "preparar", intervalo)
+
+    # A deduplicação compara páginas de todos os manuais: executada pelo coordenador, entre as fases
+    from src.refine.dedup import calcular_assinaturas, agrupar_paginas, salvar_grupos
+    salvar_grupos(agrupar_paginas(calcular_assinaturas()))
+
+    for manual in manuais:
+        fila.enqueue(f"enriquecer:{manual}", "enriquecer", {"manual": manual})
+    _aguardar_fase(fila, "enriquecer", intervalo)
+
+    for manual in manuais:
+        fila.enqueue(f"resumir:{manual}", "resumir", {"manual": manual})
+    _aguardar_fase(fila, "resumir", intervalo)
+
+    from src.vector_store.collection_params import embedding_groups
+    with open(config_file, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    n_grupos = len(embedding_groups(config))
+    for indice in range(n_grupos):
+        fila.enqueue(f"indexar:{indice}", "indexar", {"config_file": config_file, "indice": indice})
+    _aguardar_fase(fila, "indexar", intervalo)
+
+    fila.set_state(ESTADO_ENCERRADO, "1")
+    logging.info(f"Ingestão concluída: {json.dumps(fila.progress(), ensure_ascii=False)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingestão distribuída com fila de trabalho compartilhada.")
+    parser.add_argument("papel", choices=["coordenador", "worker", "progresso"])
+    parser.add_argument("--fila", default=ARQUIVO_FILA, help="Arquivo SQLite da fila (em diretório compartilhado).")
+    parser.add_argument("--config", default=CONFIG_VECTORSTORE, help="config.json da indexação.")
+    parser.add_argument("--ocr", choices=["pagina", "regioes"], default="pagina", help="Modo de OCR da extração.")
+    parser.add_argument("--worker-id", default=f"{socket.gethostname()}-{os.getpid()}")
+    parser.add_argument("--lease", type=float, default=LEASE_SEGUNDOS, help="Prazo do lease em segundos.")
+    parser.add_argument("--journal-mode", default="WAL", help="Use DELETE em sistemas de arquivos de rede.")
+    args = parser.parse_args()
+
+    fila = LeaseQueue(args.fila, journal_mode=args.journal_mode)
+    if args.papel == "coordenador":
+        executar_coordenador(fila, args.config, args.ocr)
+    elif args.papel == "worker":
+        executar_worker(fila, args.worker_id, args.lease)
+    else:
+        print(json.dumps(fila.progress(), ensure_ascii=False, indent=4))
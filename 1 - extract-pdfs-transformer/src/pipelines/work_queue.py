@@ -0,0 +1,196 @@
+import os
+import json
+import sqlite3
+import time
+from contextlib import closing
+from typing import Any, Dict, List, Optional
+
+# Estados de uma tarefa
+PENDENTE = "pendente"
+EM_EXECUCAO = "em_execucao"
+CONCLUIDA = "concluida"
+FALHOU = "falhou"
+
+
+class LeaseQueue:
+    """Fila de trabalho compartilhada com leases, armazenada em um arquivo SQLite.
+
+    Cada worker reivindica uma tarefa por vez e recebe um lease com prazo de expiração, renovado
+    por heartbeats. Se o worker morrer, o lease expira e a tarefa volta a ser reivindicável por
+    outro worker (processamento at-least-once: as etapas precisam gerar saídas idempotentes).
+
+    O arquivo pode ficar em um diretório compartilhado entre as máquinas. Em sistemas de arquivos
+    de rede, use `journal_mode="DELETE"`, pois o modo WAL depende de memória compartilhada local.
+    """
+
+    def __init__(self, db_path: str, max_tentativas: int = 3, journal_mode: str = "WAL"):
+        self.db_path = db_path
+        self.max_tentativas = max_tentativas
+        self.journal_mode = journal_mode
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with closing(self._conectar()) as conn:
+            conn.execute(f"PRAGMA journal_mode={journal_mode}")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS tarefas (
+                    id TEXT PRIMARY KEY,
+                    fase TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    worker TEXT,
+                    lease_ate REAL,
+                    tentativas INTEGER NOT NULL DEFAULT 0,
+                    erro TEXT,
+                    atualizado_em REAL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_tarefas_status ON tarefas (status, fase)")
+            conn.execute("CREATE TABLE IF NOT EXISTS estado (chave TEXT PRIMARY KEY, valor TEXT)")
+
+    def _conectar(self) -> sqlite3.Connection:
+        # Uma conexão por operação: a fila é usada por várias threads (worker e heartbeat)
+        conn = sqlite3.connect(self.db_path, timeout=60, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def enqueue(self, task_id: str, fase: str, payload: Dict[str, Any]) -> bool:
+        """Adiciona uma tarefa. Idempotente: uma tarefa pendente, em execução ou concluída não é alterada.
+
+        Uma tarefa que esgotou as tentativas (FALHOU) volta a ficar pendente, com as tentativas
+        zeradas e o payload atual: reiniciar o coordenador repete as falhas da execução anterior.
+
+        Returns:
+            bool: True se a tarefa foi criada ou reaberta agora.
+        """
+        with closing(self._conectar()) as conn:
+            cursor = conn.execute(
+                """
+                INSERT INTO tarefas (id, fase, payload, status, atualizado_em) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (id) DO UPDATE
+                SET payload = excluded.payload, status = excluded.status, worker = NULL, lease_ate = NULL,
+                    tentativas = 0, erro = NULL, atualizado_em = excluded.atualizado_em
+                WHERE tarefas.status = ?
+                """,
+                (task_id, fase, json.dumps(payload, ensure_ascii=False), PENDENTE, time.time(), FALHOU),
+            )
+            return cursor.rowcount == 1
+
+    def claim(self, worker: str, lease_segundos: float) -> Optional[Dict[str, Any]]:
+        """Reivindica a próxima tarefa pendente ou com lease expirado.
+
+        Returns:
+            dict | None: Tarefa com "id", "fase", "payload" e "tentativas", ou None se não houver.
+        """
+        agora = time.time()
+        conn = self._conectar()
+        try:
+            conn.execute("BEGIN IMMEDIATE")  # Bloqueia escritas concorrentes durante a reivindicação
+            # Leases expirados de tarefas que já esgotaram as tentativas não voltam para a fila
+            conn.execute(
+                "UPDATE tarefas SET status = ?, erro = COALESCE(erro, 'lease expirado'), atualizado_em = ? "
+                "WHERE status = ? AND lease_ate < ? AND tentativas >= ?",
+                (FALHOU, agora, EM_EXECUCAO, agora, self.max_tentativas),
+            )
+            linha = conn.execute(
+                """
+                SELECT id, fase, payload, tentativas FROM tarefas
+                WHERE status = ? OR (status = ? AND lease_ate < ?)
+                ORDER BY rowid LIMIT 1
+                """,
+                (PENDENTE, EM_EXECUCAO, agora),
+            ).fetchone()
+            if linha is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                """
+                UPDATE tarefas SET status = ?, worker = ?, lease_ate = ?, tentativas = tentativas + 1,
+                                   atualizado_em = ?
+                WHERE id = ?
+                """,
+                (EM_EXECUCAO, worker, agora + lease_segundos, agora, linha["id"]),
+            )
+            conn.execute("COMMIT")
+            return {
+                "id": linha["id"],
+                "fase": linha["fase"],
+                "payload": json.loads(linha["payload"]),
+                "tentativas": linha["tentativas"] + 1,
+            }
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def heartbeat(self, task_id: str, worker: str, lease_segundos: float) -> bool:
+        """Renova o lease de uma tarefa.
+
+        Returns:
+            bool: False se o worker perdeu o lease (expirado e reivindicado por outro worker).
+        """
+        with closing(self._conectar()) as conn:
+            cursor = conn.execute(
+                "UPDATE tarefas SET lease_ate = ?, atualizado_em = ? WHERE id = ? AND worker = ? AND status = ?",
+                (time.time() + lease_segundos, time.time(), task_id, worker, EM_EXECUCAO),
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, task_id: str, worker: str) -> bool:
+        """Marca a tarefa como concluída, se o worker ainda detém o lease."""
+        with closing(self._conectar()) as conn:
+            cursor = conn.execute(
+                "UPDATE tarefas SET status = ?, lease_ate = NULL, erro = NULL, atualizado_em = ? "
+                "WHERE id = ? AND worker = ? AND status = ?",
+                (CONCLUIDA, time.time(), task_id, worker, EM_EXECUCAO),
+            )
+            return cursor.rowcount == 1
+
+    def fail(self, task_id: str, worker: str, erro: str):
+        """Registra a falha. A tarefa volta para a fila até atingir `max_tentativas`."""
+        with closing(self._conectar()) as conn:
+            conn.execute(
+                """
+                UPDATE tarefas
+                SET status = CASE WHEN tentativas >= ? THEN ? ELSE ? END,
+                    lease_ate = NULL, erro = ?, atualizado_em = ?
+                WHERE id = ? AND worker = ? AND status = ?
+                """,
+                (self.max_tentativas, FALHOU, PENDENTE, erro, time.time(), task_id, worker, EM_EXECUCAO),
+            )
+
+    def progress(self) -> Dict[str, Dict[str, int]]:
+        """Contagem de tarefas por fase e status."""
+        with closing(self._conectar()) as conn:
+            linhas = conn.execute("SELECT fase, status, COUNT(*) AS n FROM tarefas GROUP BY fase, status").fetchall()
+        resumo: Dict[str, Dict[str, int]] = {}
+        for linha in linhas:
+            resumo.setdefault(linha["fase"], {})[linha["status"]] = linha["n"]
+        return resumo
+
+    def failures(self, fase: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Tarefas que esgotaram as tentativas."""
+        with closing(self._conectar()) as conn:
+            linhas = conn.execute(
+                "SELECT id, fase, tentativas, erro FROM tarefas WHERE status = ? AND (? IS NULL OR fase = ?)",
+                (FALHOU, fase, fase),
+            ).fetchall()
+        return [dict(linha) for linha in linhas]
+
+    def phase_done(self, fase: str) -> bool:
+        """Indica se todas as tarefas da fase terminaram (concluídas ou falhas)."""
+        with closing(self._conectar()) as conn:
+            linha = conn.execute(
+                "SELECT COUNT(*) AS n FROM tarefas WHERE fase = ? AND status IN (?, ?)",
+                (fase, PENDENTE, EM_EXECUCAO),
+            ).fetchone()
+        return linha["n"] == 0
+
+    def set_state(self, chave: str, valor: str):
+        """Grava um valor de estado compartilhado (por exemplo, o encerramento da execução)."""
+        with closing(self._conectar()) as conn:
+            conn.execute("INSERT OR REPLACE INTO estado (chave, valor) VALUES (?, ?)", (chave, valor))
+
+    def get_state(self, chave: str) -> Optional[str]:
+        with closing(self._conectar()) as conn:
+            linha = conn.execute("SELECT valor FROM estado WHERE chave = ?", (chave,)).fetchone()
+        return linha["valor"] if linha else None
@@ -1,11 +1,10 @@
 import os
 import json
-from openai import OpenAI
+import itertools
 from dotenv import load_dotenv
 import sys
 
 # Configurações do OpenAI
-cliente = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 modelo = "gpt-4o-mini"
 
 # Diretórios
@@ -22,7 +21,10 @@ DIR_LOGS = os.path.join(DIR_DATA, "logs")  # Diretório para logs
 
 # Configuração de logging
 from src.utils.logging_config import log_config
+from src.utils.openai_client import get_cliente
+from src.utils.file_utils import ler_jsonl
 logging = log_config(DIR_LOGS, "data_refinement")  # Nome do arquivo de log: data_refinement.log
+from src.refine.dedup import carregar_grupos, eh_representante, membros_para_replicar, separar_chave
 
 
 # Função para carregar um arquivo JSON
@@ -98,7 +100,7 @@ Gere uma resposta detalhada e unificada das informações técnicas descritas no
     }
     
     try:
-        resposta = cliente.chat.completions.create(
+        resposta = get_cliente().chat.completions.create(
             model=modelo,
             messages=[{"role": "user", "content": prompt}],
             **sistema,
@@ -109,69 +111,126 @@ Gere uma resposta detalhada e unificada das informações técnicas descritas no
         return None
 
 
-# Função principal para processar os arquivos
-def processar_arquivos():
+# Função para salvar o resultado unificado de uma página
+def salvar_resultado(subpasta_saida, base_nome, numero_pagina, resposta_openai):
     """
-    Processa os arquivos JSON e TXT, unificando informações e salvando os resultados.
+    Salva a análise unificada de uma página em JSON.
+
+    Args:
+        subpasta_saida (str): Diretório de saída do arquivo.
+        base_nome (str): Nome base do arquivo de origem.
+        numero_pagina (int): Número da página.
+        resposta_openai (str): Análise unificada gerada pelo OpenAI.
     """
-    # Cria o diretório de refinamento, se não existir
-    os.makedirs(DIR_DATA_REFINEMENT, exist_ok=True)
+    saida_arquivo = os.path.join(subpasta_saida, f"{base_nome}_pag{numero_pagina}_resultado.json")
+    try:
+        with open(saida_arquivo, "w", encoding="utf-8") as saida:
+            json.dump(
+                {"page": numero_pagina, "unified_analysis": resposta_openai},
+                saida,
+                ensure_ascii=False,
+                indent=4
+            )
+        logging.info(f"Resultado salvo em: {saida_arquivo}")
+    except Exception as e:
+        logging.error(f"Erro ao salvar resultado em {saida_arquivo}: {e}")
 
-    # Lista todos os arquivos JSON no diretório de entrada
-    arquivos_json = [f for f in os.listdir(DIR_DATA_PROCESSED_CLEAN) if f.endswith(".json")]
 
-    for arquivo_json in arquivos_json:
-        caminho_json = os.path.join(DIR_DATA_PROCESSED_CLEAN, arquivo_json)
+# Função para processar um arquivo
+def processar_arquivo(arquivo_json, grupos=None, retomar=False):
+    """
+    Unifica as páginas de um arquivo JSON/JSONL limpo com as descrições do Vision.
+
+    Args:
+        arquivo_json (str): Nome do arquivo em DIR_DATA_PROCESSED_CLEAN.
+        grupos (dict): Grupos de páginas quase duplicadas (ver `carregar_grupos`). Carregados se None.
+        retomar (bool): Se True, páginas que já possuem resultado salvo não são reenviadas ao OpenAI.
+    """
+    if grupos is None:
+        grupos = carregar_grupos()
+    os.makedirs(DIR_DATA_REFINEMENT, exist_ok=True)
+
+    caminho_json = os.path.join(DIR_DATA_PROCESSED_CLEAN, arquivo_json)
+    if arquivo_json.endswith(".jsonl"):
+        # Páginas lidas sob demanda; a primeira é lida já aqui para detectar arquivos vazios
+        paginas = ler_jsonl(caminho_json)
+        try:
+            primeira = next(paginas, None)
+        except OSError as e:
+            logging.error(f"Erro ao ler JSONL {caminho_json}: {e}")
+            primeira = None
+        json_data = itertools.chain([primeira], paginas) if primeira is not None else None
+    else:
         json_data = carregar_json(caminho_json)
 
-        # Verifica se o JSON foi carregado com sucesso
-        if not json_data:
-            logging.warning(f"Pular arquivo {arquivo_json} devido a erro no carregamento.")
+    # Verifica se o JSON foi carregado com sucesso
+    if not json_data:
+        logging.warning(f"Pular arquivo {arquivo_json}: vazio ou com erro no carregamento.")
+        return
+
+    base_nome = os.path.splitext(arquivo_json)[0]
+    subpasta_txt = os.path.join(DIR_VISION, base_nome)
+    subpasta_saida = os.path.join(DIR_DATA_REFINEMENT, base_nome)
+
+    # Cria a subpasta de saída correspondente
+    os.makedirs(subpasta_saida, exist_ok=True)
+
+    # Verifica se a subpasta de TXT existe
+    if not os.path.exists(subpasta_txt):
+        logging.warning(f"Subpasta correspondente não encontrada: {subpasta_txt}")
+        return
+
+    # Itera pelas páginas no JSON
+    for pagina in json_data:
+        numero_pagina = pagina["page"]
+        chave = f"{base_nome}_pag{numero_pagina}"
+        if not eh_representante(grupos, chave):
+            logging.info(f"Página {chave} é duplicata de {grupos[chave][0]}. Pulando.")
             continue
+        if retomar and os.path.exists(os.path.join(subpasta_saida, f"{base_nome}_pag{numero_pagina}_resultado.json")):
+            continue  # Resultado já gerado por uma execução anterior
+        nome_txt = f"{base_nome}_pag{numero_pagina}_description.txt"
+        caminho_txt = os.path.join(subpasta_txt, nome_txt)
+
+        # Verifica se o arquivo TXT da página existe
+        if os.path.exists(caminho_txt):
+            txt_data = carregar_txt(caminho_txt)
+
+            if txt_data:
+                resposta_openai = enviar_para_openai(pagina["text"], txt_data)
+
+                # Salva a resposta na subpasta correspondente
+                if resposta_openai:
+                    salvar_resultado(subpasta_saida, base_nome, numero_pagina, resposta_openai)
+
+                    # Replica o resultado para as páginas quase duplicadas, com a página de cada uma
+                    for membro in membros_para_replicar(grupos, chave):
+                        base_membro, pagina_membro = separar_chave(membro)
+                        subpasta_membro = os.path.join(DIR_DATA_REFINEMENT, base_membro)
+                        os.makedirs(subpasta_membro, exist_ok=True)
+                        salvar_resultado(subpasta_membro, base_membro, pagina_membro, resposta_openai)
+            else:
+                logging.warning(f"Dados TXT para página {numero_pagina} não carregados.")
+        else:
+            logging.warning(f"Arquivo TXT para página {numero_pagina} não encontrado: {nome_txt}")
 
-        base_nome = os.path.splitext(arquivo_json)[0]
-        subpasta_txt = os.path.join(DIR_VISION, base_nome)
-        subpasta_saida = os.path.join(DIR_DATA_REFINEMENT, base_nome)
 
-        # Cria a subpasta de saída correspondente
-        os.makedirs(subpasta_saida, exist_ok=True)
+# Função principal para processar os arquivos
+def processar_arquivos():
+    """
+    Processa os arquivos JSON e TXT, unificando informações e salvando os resultados.
+    """
+    # Cria o diretório de refinamento, se não existir
+    os.makedirs(DIR_DATA_REFINEMENT, exist_ok=True)
 
-        # Verifica se a subpasta de TXT existe
-        if not os.path.exists(subpasta_txt):
-            logging.warning(f"Subpasta correspondente não encontrada: {subpasta_txt}")
-            continue
+    # Grupos de páginas quase duplicadas (src/refine/dedup.py); vazio se não houver
+    grupos = carregar_grupos()
 
-        # Itera pelas páginas no JSON
-        for pagina in json_data:
-            numero_pagina = pagina["page"]
-            nome_txt = f"{base_nome}_pag{numero_pagina}_description.txt"
-            caminho_txt = os.path.join(subpasta_txt, nome_txt)
-
-            # Verifica se o arquivo TXT da página existe
-            if os.path.exists(caminho_txt):
-                txt_data = carregar_txt(caminho_txt)
-
-                if txt_data:
-                    resposta_openai = enviar_para_openai(pagina["text"], txt_data)
-
-                    # Salva a resposta na subpasta correspondente
-                    if resposta_openai:
-                        saida_arquivo = os.path.join(subpasta_saida, f"{base_nome}_pag{numero_pagina}_resultado.json")
-                        try:
-                            with open(saida_arquivo, "w", encoding="utf-8") as saida:
-                                json.dump(
-                                    {"page": numero_pagina, "unified_analysis": resposta_openai},
-                                    saida,
-                                    ensure_ascii=False,
-                                    indent=4
-                                )
-                            logging.info(f"Resultado salvo em: {saida_arquivo}")
-                        except Exception as e:
-                            logging.error(f"Erro ao salvar resultado em {saida_arquivo}: {e}")
-                else:
-                    logging.warning(f"Dados TXT para página {numero_pagina} não carregados.")
-            else:
-                logging.warning(f"Arquivo TXT para página {numero_pagina} não encontrado: {nome_txt}")
+    # Lista todos os arquivos JSON no diretório de entrada
+    arquivos_json = [f for f in os.listdir(DIR_DATA_PROCESSED_CLEAN) if f.endswith((".json", ".jsonl"))]
+
+    for arquivo_json in arquivos_json:
+        processar_arquivo(arquivo_json, grupos)
 
 
 # Ponto de entrada principal
@@ -0,0 +1,261 @@
+import os
+import json
+import re
+import sys
+import hashlib
+import random
+import numpy as np
+from logging import getLogger
+
+# Diretórios principais
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # Diretório atual
+DIR_SRC = os.path.dirname(BASE_DIR)  # Diretório src
+DIR_PAI = os.path.dirname(DIR_SRC)  # Diretório pai
+if DIR_PAI not in sys.path:  # Adicionando o diretório pai no path do script
+    sys.path.append(DIR_PAI)
+DIR_DATA = os.path.join(DIR_PAI, "data")  # Diretório de dados
+DIR_DATA_PROCESSED_CLEAN = os.path.join(DIR_DATA, "processed_clean")  # Diretório para dados processados e limpos
+DIR_PDF_TO_IMAGE = os.path.join(DIR_DATA, "processed_pdf_to_images")  # Imagens processadas a partir de PDFs
+DIR_DEDUP = os.path.join(DIR_DATA, "dedup")  # Diretório dos grupos de páginas quase duplicadas
+ARQUIVO_GRUPOS = os.path.join(DIR_DEDUP, "grupos.json")  # Grupos gerados por este módulo
+DIR_LOGS = os.path.join(DIR_DATA, "logs")  # Diretório de logs
+
+from src.utils.logging_config import log_config
+from src.utils.file_utils import ler_jsonl
+# O log só é configurado quando o módulo roda como script: vision e data_refinement importam este
+# módulo e mantêm os próprios arquivos de log (o primeiro basicConfig do processo prevalece).
+logging = getLogger(__name__)
+
+# Parâmetros da detecção de quase duplicatas
+TAMANHO_SHINGLE = 5  # Palavras por shingle
+NUM_PERMUTACOES = 64  # Tamanho da assinatura MinHash
+NUM_BANDAS = 16  # Bandas do LSH (NUM_PERMUTACOES / NUM_BANDAS linhas por banda)
+LIMIAR_JACCARD = 0.85  # Similaridade de Jaccard estimada mínima entre textos
+LIMIAR_HAMMING = 6  # Distância de Hamming máxima entre hashes perceptuais (de 64 bits)
+MIN_PALAVRAS = 20  # Páginas com menos palavras não são agrupadas (pouco texto para comparar)
+
+_PRIMO = (1 << 61) - 1
+_rng = random.Random(42)  # Semente fixa: assinaturas reprodutíveis entre execuções
+_PERM_A = np.array([_rng.randrange(1, 1 << 29) for _ in range(NUM_PERMUTACOES)], dtype=np.uint64)
+_PERM_B = np.array([_rng.randrange(0, 1 << 29) for _ in range(NUM_PERMUTACOES)], dtype=np.uint64)
+
+
+def chave_pagina(base_nome, pagina):
+    """Identificador de uma página, no mesmo formato dos nomes de arquivo do pipeline."""
+    return f"{base_nome}_pag{pagina}"
+
+
+def separar_chave(chave):
+    """Separa um identificador de página em (base_nome, pagina)."""
+    base_nome, pagina = chave.rsplit("_pag", 1)
+    return base_nome, int(pagina)
+
+
+def assinatura_minhash(texto):
+    """
+    Calcula a assinatura MinHash do texto, a partir de shingles de palavras.
+
+    Args:
+        texto (str): Texto limpo da página.
+
+    Returns:
+        numpy.ndarray | None: Assinatura com NUM_PERMUTACOES valores, ou None se o texto for curto demais.
+    """
+    palavras = re.findall(r"\w+", texto.lower())
+    if len(palavras) < MIN_PALAVRAS:
+        return None
+    shingles = {
+        " ".join(palavras[i:i + TAMANHO_SHINGLE])
+        for i in range(len(palavras) - TAMANHO_SHINGLE + 1)
+    }
+    # Hashes de 32 bits para que a * h + b caiba em 64 bits sem overflow
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "big") for s in shingles),
+        dtype=np.uint64,
+        count=len(shingles),
+    )
+    return ((_PERM_A[:, None] * hashes[None, :] + _PERM_B[:, None]) % _PRIMO).min(axis=1)
+
+
+def hash_perceptual(caminho_imagem):
+    """
+    Calcula o hash perceptual (dHash de 64 bits) de uma imagem de página.
+
+    Args:
+        caminho_imagem (str): Caminho da imagem.
+
+    Returns:
+        int | None: Hash perceptual, ou None se a imagem não puder ser lida.
+    """
+    from PIL import Image
+
+    try:
+        with Image.open(caminho_imagem) as img:
+            pixels = np.asarray(img.convert("L").resize((9, 8)), dtype=np.int16)
+    except Exception as e:
+        logging.warning(f"Não foi possível calcular o hash perceptual de {caminho_imagem}: {e}")
+        return None
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return int("".join("1" if b else "0" for b in bits), 2)
+
+
+def _distancia_hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+def _sao_quase_duplicatas(pa, pb):
+    """Similaridade estimada do texto (e dos hashes perceptuais, se ambas têm imagem) dentro dos limiares."""
+    if float(np.mean(pa["minhash"] == pb["minhash"])) < LIMIAR_JACCARD:
+        return False
+    if pa["phash"] is not None and pb["phash"] is not None:
+        return _distancia_hamming(pa["phash"], pb["phash"]) <= LIMIAR_HAMMING
+    return True
+
+
+def agrupar_paginas(paginas):
+    """
+    Agrupa páginas quase duplicadas.
+
+    Candidatos são encontrados por LSH sobre as assinaturas MinHash e confirmados pela similaridade
+    estimada do texto e, quando as duas páginas têm imagem, pela distância entre os hashes perceptuais.
+    Os grupos usam ligação completa: dois grupos só se unem se todas as páginas de um forem quase
+    duplicatas de todas as do outro, de modo que A≈B e B≈C não juntam A e C quando A e C diferem
+    (o resultado do representante é replicado para todos os membros).
+
+    Args:
+        paginas (dict): chave da página -> {"minhash": ndarray | None, "phash": int | None}.
+
+    Returns:
+        list: Grupos com mais de uma página, cada um como lista ordenada de chaves.
+            O primeiro elemento de cada grupo é o representante.
+    """
+    chaves = [c for c, p in paginas.items() if p["minhash"] is not None]
+
+    linhas = NUM_PERMUTACOES // NUM_BANDAS
+    candidatos = set()
+    for banda in range(NUM_BANDAS):
+        baldes = {}
+        for chave in chaves:
+            trecho = paginas[chave]["minhash"][banda * linhas:(banda + 1) * linhas].tobytes()
+            baldes.setdefault(trecho, []).append(chave)
+        for membros in baldes.values():
+            for i in range(len(membros)):
+                for j in range(i + 1, len(membros)):
+                    candidatos.add((membros[i], membros[j]))
+
+    # Pares confirmados, dos mais parecidos para os menos (ordem determinística entre execuções)
+    pares = sorted(
+        ((float(np.mean(paginas[a]["minhash"] == paginas[b]["minhash"])), a, b)
+         for a, b in candidatos if _sao_quase_duplicatas(paginas[a], paginas[b])),
+        key=lambda par: (-par[0], separar_chave(par[1]), separar_chave(par[2])),
+    )
+
+    grupo_de = {c: [c] for c in chaves}
+    for _, a, b in pares:
+        grupo_a, grupo_b = grupo_de[a], grupo_de[b]
+        if grupo_a is grupo_b:
+            continue
+        if all(_sao_quase_duplicatas(paginas[x], paginas[y]) for x in grupo_a for y in grupo_b):
+            grupo_a.extend(grupo_b)
+            for membro in grupo_b:
+                grupo_de[membro] = grupo_a
+
+    grupos = {id(g): g for g in grupo_de.values() if len(g) > 1}
+    return [sorted(g, key=separar_chave) for g in grupos.values()]
+
+
+def _iterar_paginas_limpas(caminho):
+    """Lê as páginas de um arquivo JSON ou JSONL de DIR_DATA_PROCESSED_CLEAN."""
+    if caminho.endswith(".jsonl"):
+        yield from ler_jsonl(caminho)
+        return
+    with open(caminho, "r", encoding="utf-8") as arquivo:
+        yield from json.load(arquivo)
+
+
+def calcular_assinaturas():
+    """
+    Calcula as assinaturas de texto e de imagem de todas as páginas limpas.
+
+    Returns:
+        dict: chave da página -> {"minhash": ndarray | None, "phash": int | None}.
+    """
+    paginas = {}
+    arquivos = [f for f in os.listdir(DIR_DATA_PROCESSED_CLEAN) if f.endswith((".json", ".jsonl"))]
+    for arquivo_nome in arquivos:
+        base_nome = os.path.splitext(arquivo_nome)[0]
+        try:
+            for pagina in _iterar_paginas_limpas(os.path.join(DIR_DATA_PROCESSED_CLEAN, arquivo_nome)):
+                chave = chave_pagina(base_nome, pagina["page"])
+                caminho_imagem = os.path.join(DIR_PDF_TO_IMAGE, base_nome, f"{chave}.jpg")
+                paginas[chave] = {
+                    "minhash": assinatura_minhash(pagina.get("text", "")),
+                    "phash": hash_perceptual(caminho_imagem) if os.path.exists(caminho_imagem) else None,
+                }
+        except Exception as e:
+            logging.error(f"Erro ao calcular assinaturas de {arquivo_nome}: {e}")
+    return paginas
+
+
+def salvar_grupos(grupos, caminho=ARQUIVO_GRUPOS):
+    """Salva os grupos de quase duplicatas em JSON."""
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    dados = {
+        "parametros": {
+            "tamanho_shingle": TAMANHO_SHINGLE,
+            "num_permutacoes": NUM_PERMUTACOES,
+            "limiar_jaccard": LIMIAR_JACCARD,
+            "limiar_hamming": LIMIAR_HAMMING,
+        },
+        "grupos": [{"representante": g[0], "membros": g} for g in grupos],
+    }
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(dados, f, ensure_ascii=False, indent=4)
+    logging.info(f"{len(grupos)} grupos salvos em {caminho}")
+
+
+def carregar_grupos(caminho=ARQUIVO_GRUPOS):
+    """
+    Carrega os grupos gerados por este módulo.
+
+    Returns:
+        dict: chave da página -> lista de membros do grupo (o primeiro é o representante).
+            Páginas fora de qualquer grupo não aparecem. Vazio se o arquivo não existir.
+    """
+    if not os.path.exists(caminho):
+        return {}
+    with open(caminho, "r", encoding="utf-8") as f:
+        dados = json.load(f)
+    grupo_de = {}
+    for grupo in dados.get("grupos", []):
+        for membro in grupo["membros"]:
+            grupo_de[membro] = grupo["membros"]
+    return grupo_de
+
+
+def eh_representante(grupo_de, chave):
+    """Indica se a página deve ser processada (representante do grupo ou página sem duplicatas)."""
+    membros = grupo_de.get(chave)
+    return membros is None or membros[0] == chave
+
+
+def membros_para_replicar(grupo_de, chave):
+    """Retorna os demais membros do grupo que devem receber o resultado do representante."""
+    membros = grupo_de.get(chave)
+    if not membros or membros[0] != chave:
+        return []
+    return membros[1:]
+
+
+if __name__ == "__main__":
+    log_config(DIR_LOGS, "dedup")
+    logging.info("Início da detecção de páginas quase duplicadas.")
+    try:
+        paginas = calcular_assinaturas()
+        grupos = agrupar_paginas(paginas)
+        salvar_grupos(grupos)
+        redundantes = sum(len(g) - 1 for g in grupos)
+        logging.info(f"{len(paginas)} páginas analisadas, {redundantes} redundantes em {len(grupos)} grupos.")
+    except Exception as e:
+        logging.critical(f"Erro crítico durante a deduplicação: {e}")
+    logging.info("Processamento concluído.")
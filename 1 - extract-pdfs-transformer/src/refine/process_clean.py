@@ -16,6 +16,7 @@ DIR_DATA_PROCESSED_CLEAN = os.path.join(DIR_DATA, "processed_clean")  # Diretór
 DIR_LOGS =  os.path.join(DIR_DATA, "logs") # Diretório de logs
 
 from src.utils.logging_config import log_config
+from src.utils.file_utils import gravar_atomico, ler_jsonl
 logging = log_config(DIR_LOGS, "process_clean")
 
 # Lista de padrões abrangendo variações da frase
@@ -48,42 +49,113 @@ def limpar_texto(texto, frases):
         logging.error(f"Erro ao limpar texto: {e}")
         return texto
 
+def limpar_paginas(paginas, frases=frases_a_remover):
+    """
+    Limpa um fluxo de páginas, uma de cada vez.
+
+    Pode ser encadeado diretamente com `iter_pages_from_pdf` para limpar a página 1
+    enquanto as páginas seguintes ainda estão sendo extraídas.
+
+    Args:
+        paginas (iterable): Dicionários de página com a chave "text".
+        frases (list): Lista de padrões regex a serem removidos.
+
+    Yields:
+        dict: Página com o texto limpo.
+    """
+    for pagina in paginas:
+        if "text" in pagina:
+            pagina["text"] = limpar_texto(pagina["text"], frases)
+        yield pagina
+
+def processar_arquivo_jsonl(arquivo_nome, raise_errors=False):
+    """
+    Limpa um arquivo JSONL de DIR_DATA_PROCESSED linha a linha, com memória constante.
+
+    A saída é gravada por meio de um temporário: uma falha no meio do arquivo (ou um arquivo sem
+    páginas) não deixa um JSONL truncado em DIR_DATA_PROCESSED_CLEAN.
+
+    Args:
+        arquivo_nome (str): Nome do arquivo .jsonl a ser processado.
+        raise_errors (bool): Se True, erros (e arquivos sem páginas) são repassados ao chamador.
+    """
+    caminho_completo_entrada = os.path.join(DIR_DATA_PROCESSED, arquivo_nome)
+    caminho_completo_saida = os.path.join(DIR_DATA_PROCESSED_CLEAN, arquivo_nome)
+    total = 0
+
+    def escrever(temporario):
+        nonlocal total
+        with open(temporario, "w", encoding="utf-8") as saida:
+            for pagina in limpar_paginas(ler_jsonl(caminho_completo_entrada)):
+                saida.write(json.dumps(pagina, ensure_ascii=False) + "\n")
+                total += 1
+        if total == 0:
+            raise ValueError(f"Nenhuma página em {arquivo_nome}.")
+
+    try:
+        os.makedirs(DIR_DATA_PROCESSED_CLEAN, exist_ok=True)
+        gravar_atomico(caminho_completo_saida, escrever)
+        logging.info(f"Arquivo processado com sucesso: {arquivo_nome} ({total} páginas)")
+    except Exception as e:
+        logging.error(f"Erro ao processar arquivo {arquivo_nome}: {e}")
+        if raise_errors:
+            raise
+
+def processar_arquivo(arquivo_nome, raise_errors=False):
+    """
+    Limpa um arquivo JSON ou JSONL de DIR_DATA_PROCESSED e salva em DIR_DATA_PROCESSED_CLEAN.
+
+    Args:
+        arquivo_nome (str): Nome do arquivo a ser processado.
+        raise_errors (bool): Se True, erros são repassados ao chamador (tarefas do pipeline).
+    """
+    if arquivo_nome.endswith(".jsonl"):
+        processar_arquivo_jsonl(arquivo_nome, raise_errors)
+        return
+
+    caminho_completo_entrada = os.path.join(DIR_DATA_PROCESSED, arquivo_nome)
+    caminho_completo_saida = os.path.join(DIR_DATA_PROCESSED_CLEAN, arquivo_nome)
+
+    try:
+        # Abrir e carregar o arquivo JSON
+        with open(caminho_completo_entrada, "r", encoding="utf-8") as arquivo:
+            dados = json.load(arquivo)
+
+        # Processar cada página
+        dados = list(limpar_paginas(dados))
+
+        # Salvar o arquivo JSON processado no diretório de saída
+        def escrever(temporario):
+            with open(temporario, "w", encoding="utf-8") as arquivo:
+                json.dump(dados, arquivo, ensure_ascii=False, indent=4)
+
+        os.makedirs(DIR_DATA_PROCESSED_CLEAN, exist_ok=True)
+        gravar_atomico(caminho_completo_saida, escrever)
+        
+        logging.info(f"Arquivo processado com sucesso: {arquivo_nome}")
+
+    except json.JSONDecodeError as e:
+        logging.error(f"Erro ao decodificar JSON {arquivo_nome}: {e}")
+        if raise_errors:
+            raise
+    except Exception as e:
+        logging.error(f"Erro ao processar arquivo {arquivo_nome}: {e}")
+        if raise_errors:
+            raise
+
 # Processamento dos arquivos
 def processar_arquivos():
     """
-    Processa os arquivos JSON no diretório DIR_DATA_PROCESSED, limpa o texto e salva no diretório DIR_DATA_PROCESSED_CLEAN.
+    Processa os arquivos JSON e JSONL no diretório DIR_DATA_PROCESSED, limpa o texto e salva no diretório DIR_DATA_PROCESSED_CLEAN.
     """
-    arquivos = [f for f in os.listdir(DIR_DATA_PROCESSED) if f.endswith(".json")]
+    os.makedirs(DIR_DATA_PROCESSED_CLEAN, exist_ok=True)
+    arquivos = [f for f in os.listdir(DIR_DATA_PROCESSED) if f.endswith((".json", ".jsonl"))]
     if not arquivos:
         logging.warning("Nenhum arquivo JSON encontrado para processar.")
         return
 
     for arquivo_nome in arquivos:
-        caminho_completo_entrada = os.path.join(DIR_DATA_PROCESSED, arquivo_nome)
-        caminho_completo_saida = os.path.join(DIR_DATA_PROCESSED_CLEAN, arquivo_nome)
-
-        try:
-            # Abrir e carregar o arquivo JSON
-            with open(caminho_completo_entrada, "r", encoding="utf-8") as arquivo:
-                dados = json.load(arquivo)
-
-            # Processar cada página
-            for pagina in dados:
-                if "text" in pagina:
-                    texto_original = pagina["text"]
-                    texto_limpo = limpar_texto(texto_original, frases_a_remover)
-                    pagina["text"] = texto_limpo
-
-            # Salvar o arquivo JSON processado no diretório de saída
-            with open(caminho_completo_saida, "w", encoding="utf-8") as arquivo:
-                json.dump(dados, arquivo, ensure_ascii=False, indent=4)
-            
-            logging.info(f"Arquivo processado com sucesso: {arquivo_nome}")
-
-        except json.JSONDecodeError as e:
-            logging.error(f"Erro ao decodificar JSON {arquivo_nome}: {e}")
-        except Exception as e:
-            logging.error(f"Erro ao processar arquivo {arquivo_nome}: {e}")
+        processar_arquivo(arquivo_nome)
 
 if __name__ == "__main__":
     logging.info("Início do processamento de limpeza de dados.")
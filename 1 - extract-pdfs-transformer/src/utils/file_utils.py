@@ -1,4 +1,7 @@
 import os
+import json
+import socket
+import logging
 
 # Diretórios
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # Diretório base do script
@@ -13,6 +16,7 @@ DIR_PDF_TO_IMAGE = os.path.join(DIR_DATA, "processed_pdf_to_images")  # Diretór
 DIR_VISION = os.path.join(DIR_DATA, "outputs_vision")  # Diretório de saída do processamento do Vision
 DIR_DATA_REFINEMENT =  os.path.join(DIR_DATA, "outputs_vision_and_extractor") # Diretório de refinamento dos dados (Vision + pymu)
 DIR_SUMMARIES = os.path.join(DIR_DATA, "outputs_final_summaries")  # Diretório para salvar sumários finais
+DIR_OCR_CACHE = os.path.join(DIR_DATA, "ocr_cache")  # Cache de OCR por imagem (hash do conteúdo)
 
 # Função de criação de diretórios principais
 def cria_diretorios():
@@ -24,4 +28,47 @@ def cria_diretorios():
     os.makedirs(DIR_PDF_TO_IMAGE, exist_ok=True)
     os.makedirs(DIR_VISION, exist_ok=True)
     os.makedirs(DIR_DATA_REFINEMENT, exist_ok=True)
-    os.makedirs(DIR_SUMMARIES, exist_ok=True)
\ No newline at end of file
+    os.makedirs(DIR_SUMMARIES, exist_ok=True)
+    os.makedirs(DIR_OCR_CACHE, exist_ok=True)
+
+# Função de gravação atômica de arquivos
+def gravar_atomico(caminho, escrever):
+    """
+    Grava um arquivo por meio de um temporário e os.replace: leitores nunca veem saídas parciais.
+
+    Args:
+        caminho (str): Caminho final do arquivo.
+        escrever (callable): Recebe o caminho do temporário e grava o conteúdo nele. Se levantar uma
+            exceção, o temporário é removido e o arquivo final não é alterado.
+    """
+    temporario = f"{caminho}.{socket.gethostname()}.{os.getpid()}.tmp"
+    try:
+        escrever(temporario)
+        os.replace(temporario, caminho)
+    finally:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+
+# Função de leitura de arquivos JSON Lines
+def ler_jsonl(caminho):
+    """
+    Lê um arquivo JSON Lines linha a linha, sem carregar o arquivo inteiro em memória.
+
+    Linhas vazias são ignoradas; linhas inválidas são registradas no log do módulo chamador e
+    puladas, sem interromper a leitura das demais.
+
+    Args:
+        caminho (str): Caminho do arquivo JSONL.
+
+    Yields:
+        dict: Uma página por linha.
+    """
+    with open(caminho, "r", encoding="utf-8") as arquivo:
+        for numero_linha, linha in enumerate(arquivo, 1):
+            linha = linha.strip()
+            if not linha:
+                continue
+            try:
+                yield json.loads(linha)
+            except json.JSONDecodeError as e:
+                logging.getLogger(__name__).error(f"Linha {numero_linha} inválida em {caminho}: {e}")
@@ -0,0 +1,112 @@
+import os
+import re
+import sys
+import json
+import argparse
+import subprocess
+
+# Diretórios principais
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # Diretório base do script
+DIR_SRC = os.path.dirname(BASE_DIR)  # Diretório src
+DIR_PAI = os.path.dirname(DIR_SRC)  # Diretório pai
+
+# Módulos de entrada (CLIs, workers e app) e o orçamento de importação de cada um, em ms.
+# Dependências pesadas devem ser importadas dentro das funções que as usam, não no topo do módulo.
+ORCAMENTO_MS = {
+    "src.extract.vision": 300,
+    "src.refine.data_refinement": 300,
+    "src.refine.dedup": 300,
+    "src.models.summarize": 300,
+    "src.models.rag_common": 300,
+    "src.models.batch_qa": 300,
+    "src.models.transformer_pipeline": 300,
+    "src.vector_store.vectorstores": 300,
+    "src.vector_store.collection_params": 100,
+    "src.vector_store.benchmark": 300,
+    "src.pipelines.pipeline": 300,
+    "src.pipelines.work_queue": 100,
+}
+N_MAIS_PESADOS = 5  # Importações mais caras listadas para cada módulo acima do orçamento
+
+# Linha do -X importtime: "import time: <self us> | <cumulativo us> | <indentação><módulo>"
+LINHA_IMPORTTIME = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+
+def medir_importacao(modulo):
+    """
+    Importa o módulo em um processo Python novo com -X importtime.
+
+    Returns:
+        tuple: (tempo cumulativo do módulo em ms, lista [(ms cumulativo, dependência)] de primeiro nível),
+        ou (None, mensagem de erro) se a importação falhar.
+    """
+    ambiente = dict(os.environ)
+    ambiente["PYTHONPATH"] = os.pathsep.join(filter(None, [DIR_PAI, ambiente.get("PYTHONPATH")]))
+    processo = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        cwd=DIR_PAI, env=ambiente, capture_output=True, text=True,
+    )
+    if processo.returncode != 0:
+        return None, processo.stderr.strip().splitlines()[-1]
+
+    # A saída é pós-ordem: as dependências diretas (um nível de indentação abaixo) aparecem antes
+    # da linha do módulo que as importou.
+    total, dependencias, pendentes = None, [], []
+    for linha in processo.stderr.splitlines():
+        encontrado = LINHA_IMPORTTIME.match(linha)
+        if not encontrado:
+            continue
+        cumulativo_ms = int(encontrado.group(2)) / 1000
+        nivel = len(encontrado.group(3))
+        nome = encontrado.group(4)
+        if nivel == 3:
+            pendentes.append((cumulativo_ms, nome))
+        elif nivel == 1:
+            if nome == modulo:
+                total, dependencias = cumulativo_ms, pendentes
+            pendentes = []
+    return total, sorted(dependencias, reverse=True)
+
+
+def executar_benchmark(orcamento, modulos=None):
+    """Mede cada módulo e retorna uma linha por módulo: {modulo, ms, orcamento_ms, ok, mais_pesados|erro}."""
+    resultados = []
+    for modulo in modulos or orcamento:
+        limite = orcamento.get(modulo, max(orcamento.values()))
+        total, detalhes = medir_importacao(modulo)
+        if total is None:
+            resultados.append({"modulo": modulo, "ms": None, "orcamento_ms": limite, "ok": False, "erro": detalhes})
+            continue
+        resultados.append({
+            "modulo": modulo,
+            "ms": round(total, 1),
+            "orcamento_ms": limite,
+            "ok": total <= limite,
+            "mais_pesados": [f"{nome} ({ms:.0f} ms)" for ms, nome in detalhes[:N_MAIS_PESADOS]],
+        })
+    return resultados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verifica o tempo de importação dos módulos de entrada.")
+    parser.add_argument("modulos", nargs="*", help="Módulos a medir (padrão: todos os do orçamento).")
+    parser.add_argument("--fator", type=float, default=1.0, help="Multiplica os orçamentos (máquinas lentas).")
+    parser.add_argument("--json", action="store_true", help="Saída em JSON.")
+    args = parser.parse_args()
+
+    orcamento = {modulo: ms * args.fator for modulo, ms in ORCAMENTO_MS.items()}
+    resultados = executar_benchmark(orcamento, args.modulos)
+
+    if args.json:
+        print(json.dumps(resultados, ensure_ascii=False, indent=4))
+    else:
+        for r in resultados:
+            status = "ok" if r["ok"] else "ACIMA DO ORÇAMENTO" if r["ms"] is not None else "ERRO"
+            tempo = f"{r['ms']:.0f} ms" if r["ms"] is not None else "-"
+            print(f"{r['modulo']:<40} {tempo:>8} / {r['orcamento_ms']:.0f} ms  {status}")
+            if r["ms"] is None:
+                print(f"    {r['erro']}")
+            elif not r["ok"]:
+                print(f"    mais pesados: {', '.join(r['mais_pesados'])}")
+
+    sys.exit(0 if all(r["ok"] for r in resultados) else 1)
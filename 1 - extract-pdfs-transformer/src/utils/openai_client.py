@@ -0,0 +1,15 @@
+import os
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def get_cliente():
+    """
+    Cliente da OpenAI criado no primeiro uso e reaproveitado pelo processo.
+
+    O pacote openai só é importado aqui, de modo que importar os módulos das etapas não tem custo de
+    inicialização. A URL da API vem de OPENAI_BASE_URL, se definida, e o número de novas tentativas
+    automáticas de OPENAI_MAX_RETRIES (padrão do SDK: 2).
+    """
+    from openai import OpenAI
+    return OpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=int(os.getenv("OPENAI_MAX_RETRIES", 2)))
@@ -18,13 +18,14 @@ DIR_LOGS =  os.path.join(DIR_DATA, "logs") # Diretório de logs
 from src.utils.logging_config import log_config
 logging = log_config(DIR_LOGS, "pdf_to_image")
 
-def pdf_to_image(pdf_path, output_dir):
+def pdf_to_image(pdf_path, output_dir, raise_errors=False):
     """
     Converte todas as páginas de um arquivo PDF para imagens no formato .jpg.
 
     Args:
         pdf_path (str): Caminho completo do arquivo PDF.
         output_dir (str): Caminho do diretório onde as imagens serão salvas.
+        raise_errors (bool): Se True, erros ao abrir o PDF ou em uma página são repassados ao chamador.
 
     Returns:
         None
@@ -50,12 +51,16 @@ def pdf_to_image(pdf_path, output_dir):
             except Exception as page_error:
                 # Registra erro ao processar uma página específica
                 logging.error(f"Erro ao processar a página {page_num + 1}: {page_error}")
+                if raise_errors:
+                    raise
 
         pdf_document.close()  # Fecha o arquivo PDF
         logging.info(f"Processamento concluído para o PDF: {pdf_path}")
     except Exception as pdf_error:
         # Registra erro ao abrir ou processar o PDF
         logging.error(f"Erro ao abrir ou processar o PDF {pdf_path}: {pdf_error}")
+        if raise_errors:
+            raise
 
 if __name__ == "__main__":
     # Itera sobre todos os arquivos na pasta de entrada
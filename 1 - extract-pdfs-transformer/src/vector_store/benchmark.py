@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+from typing import TYPE_CHECKING, Any, Dict, List
+from dotenv import load_dotenv
+
+# pandas, Qdrant e HuggingFace são importados no primeiro uso, como no vectorstores.py
+if TYPE_CHECKING:
+    import pandas as pd
+    from qdrant_client import QdrantClient, models
+
+# Diretórios principais
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # Diretório base do script
+DIR_SRC = os.path.dirname(BASE_DIR)  # Diretório src
+DIR_PAI = os.path.dirname(DIR_SRC)  # Diretório pai
+if DIR_PAI not in sys.path:  # Adicionando o diretório pai no path do script
+    sys.path.append(DIR_PAI)
+DIR_DATA = os.path.join(DIR_PAI, "data")  # Diretório de dados
+DIR_BENCHMARKS = os.path.join(DIR_DATA, "benchmarks")  # Resultados dos benchmarks
+
+from src.vector_store.collection_params import (
+    collection_grid, build_search_params, estimate_vector_memory, vectors_on_disk
+)
+
+
+def exact_search_params() -> models.SearchParams:
+    """Busca exata sobre os vetores originais: referência para o cálculo do recall."""
+    from qdrant_client import models
+    return models.SearchParams(exact=True, quantization=models.QuantizationSearchParams(ignore=True))
+
+
+def load_queries(client: QdrantClient, collection_name: str, benchmark_config: Dict[str, Any]) -> List[str]:
+    """
+    Perguntas do benchmark: arquivo "queries_file" (uma por linha) ou, na falta dele, o início do
+    texto de pontos amostrados da collection.
+    """
+    n_queries = benchmark_config.get("n_queries", 100)
+    queries_file = benchmark_config.get("queries_file")
+    if queries_file and os.path.exists(queries_file):
+        with open(queries_file, "r", encoding="utf-8") as f:
+            return [linha.strip() for linha in f if linha.strip()][:n_queries]
+
+    pontos, _ = client.scroll(collection_name, limit=n_queries, with_payload=True, with_vectors=False)
+    return [p.payload.get("page_content", "")[:300] for p in pontos if p.payload.get("page_content")]
+
+
+def search_ids(client: QdrantClient, collection_name: str, vector: List[float], k: int,
+               params: models.SearchParams):
+    """Executa uma busca e retorna (ids, latência em ms)."""
+    inicio = time.perf_counter()
+    resposta = client.query_points(collection_name, query=vector, limit=k, search_params=params,
+                                   with_payload=False)
+    latencia = (time.perf_counter() - inicio) * 1000
+    return [p.id for p in resposta.points], latencia
+
+
+def benchmark_collection(client: QdrantClient, grid_item: Dict[str, Any], config: Dict[str, Any],
+                         query_vectors: List[List[float]]) -> List[Dict[str, Any]]:
+    """Mede latência e recall@k de uma collection para cada valor de oversampling do benchmark."""
+    benchmark_config = config.get("benchmark", {})
+    k = benchmark_config.get("k", 10)
+    collection_name = grid_item["collection_name"]
+    quantization = grid_item["quantization"]
+
+    info = client.get_collection(collection_name)
+    n_points = info.points_count or 0
+    dim = info.config.params.vectors.size
+    memoria = estimate_vector_memory(n_points, dim, quantization, vectors_on_disk(config, quantization))
+
+    exata = exact_search_params()
+    referencia = [search_ids(client, collection_name, v, k, exata)[0] for v in query_vectors]
+
+    quantizada = quantization.get("type", "none") != "none"
+    variantes = [(False, None)]
+    if quantizada:
+        variantes += [(True, o) for o in benchmark_config.get("oversampling", [1.0, 2.0, 4.0])]
+
+    linhas = []
+    for rescore, oversampling in variantes:
+        search_config = dict(config.get("search") or {})
+        search_config.update({"rescore": rescore, "oversampling": oversampling})
+        params = build_search_params(search_config)
+        latencias, recalls = [], []
+        for vetor, esperados in zip(query_vectors, referencia):
+            ids, latencia = search_ids(client, collection_name, vetor, k, params)
+            latencias.append(latencia)
+            recalls.append(len(set(ids) & set(esperados)) / max(len(esperados), 1))
+        linhas.append({
+            "collection": collection_name,
+            "quantizacao": quantization.get("name", "none"),
+            "rescore": rescore,
+            "oversampling": oversampling,
+            "pontos": n_points,
+            **{chave: round(valor, 2) for chave, valor in memoria.items()},
+            "latencia_p50_ms": round(float(np.percentile(latencias, 50)), 2),
+            "latencia_p95_ms": round(float(np.percentile(latencias, 95)), 2),
+            f"recall@{k}": round(float(np.mean(recalls)), 4),
+        })
+    return linhas
+
+
+def run_benchmark(config_file: str) -> pd.DataFrame:
+    """Executa o benchmark de memória, latência e recall sobre todas as collections do grid."""
+    import pandas as pd
+    from qdrant_client import QdrantClient
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    with open(config_file, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    load_dotenv()
+    client = QdrantClient(url=os.getenv("QDRANT_URL"), api_key=os.getenv("QDRANT_API_KEY"))
+
+    grid = [g for g in collection_grid(config) if client.collection_exists(g["collection_name"])]
+    if not grid:
+        print("Nenhuma collection do grid encontrada no Qdrant.")
+        return pd.DataFrame()
+
+    # Perguntas embedadas uma única vez por modelo de embeddings
+    linhas = []
+    for modelo in dict.fromkeys(g["embeddings_model"] for g in grid):
+        itens = [g for g in grid if g["embeddings_model"] == modelo]
+        embeddings = HuggingFaceEmbeddings(model_name=modelo, model_kwargs={'trust_remote_code': True})
+        queries = load_queries(client, itens[0]["collection_name"], config.get("benchmark", {}))
+        query_vectors = embeddings.embed_documents(queries)
+        for item in itens:
+            print(f"Benchmark da collection {item['collection_name']} ({len(queries)} perguntas)...")
+            linhas.extend(benchmark_collection(client, item, config, query_vectors))
+    return pd.DataFrame(linhas)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de quantização: memória x latência x recall.")
+    parser.add_argument("--config", default=os.path.join(BASE_DIR, "config.json"))
+    args = parser.parse_args()
+
+    resultado = run_benchmark(args.config)
+    if not resultado.empty:
+        os.makedirs(DIR_BENCHMARKS, exist_ok=True)
+        caminho = os.path.join(DIR_BENCHMARKS, f"quantizacao_{time.strftime('%Y%m%d_%H%M%S')}.csv")
+        resultado.to_csv(caminho, index=False)
+        print(resultado.to_string(index=False))
+        print(f"Resultados salvos em {caminho}")
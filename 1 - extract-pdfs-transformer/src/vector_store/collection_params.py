@@ -0,0 +1,154 @@
+import itertools
+from typing import Any, Dict, List, Optional
+
+# O qdrant_client só é importado pelas funções que montam objetos do Qdrant: collection_grid e
+# estimate_vector_memory são usados pelo coordenador e por dry-runs sem esse custo de inicialização.
+
+# Tipos de quantização aceitos nas entradas de "quantizations" do config.json
+QUANTIZATION_TYPES = ("none", "scalar", "binary")
+QUANTIZATION_SUFFIX = "_q-"  # Sufixo do nome das collections quantizadas ("_q-<nome>")
+
+
+def collection_grid(config: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Gera as combinações (modelo, chunk, overlap, quantização) do config, com o nome de cada collection.
+
+    Collections sem quantização mantêm o nome original; as demais recebem o sufixo "_q-<nome>".
+    O chunk_size "Hierarchical" gera uma única collection por modelo e quantização (os overlaps do grid
+    não se aplicam; ver src/vector_store/hierarchical.py).
+    """
+    quantizations = config.get("quantizations") or [{"name": "none"}]
+    combos = itertools.product(
+        config['embeddings_models'], config['chunk_sizes'], config['chunk_overlaps'], quantizations
+    )
+    grid = []
+    for emb_model, c_size, c_overlap, quantization in combos:
+        if c_size == "Hierarchical":
+            # Tamanho e sobreposição dos filhos em tokens, da seção "hierarchical": uma única collection
+            hierarchical = config.get("hierarchical") or {}
+            c_overlap = hierarchical.get("child_overlap_tokens", 32)
+            chunk_display = f"hier{hierarchical.get('child_tokens', 128)}t"
+        else:
+            chunk_display = c_size if c_size != "Page" else "by-page"
+        collection_name = (
+            f"{config['collection_name']}_chunk{chunk_display}_overlap{c_overlap}_"
+            f"{emb_model.split('/')[-1]}"
+        )
+        if quantization.get("name", "none") != "none":
+            collection_name += f"{QUANTIZATION_SUFFIX}{quantization['name']}"
+        if any(item["collection_name"] == collection_name for item in grid):
+            continue
+        grid.append({
+            "collection_name": collection_name,
+            "chunk_size": c_size,
+            "chunk_overlap": c_overlap,
+            "embeddings_model": emb_model,
+            "quantization": quantization,
+        })
+    return grid
+
+
+def local_index_name(collection_name: str) -> str:
+    """
+    Diretório do índice local de uma collection: o nome sem o sufixo de quantização.
+
+    O índice local não aplica a quantização do Qdrant (os vetores ficam em float16), então todas as
+    variantes de quantização de um grupo do grid compartilham um único índice.
+    """
+    return collection_name.split(QUANTIZATION_SUFFIX, 1)[0]
+
+
+def embedding_groups(config: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Agrupa o grid pelas combinações (modelo, chunk, overlap), que produzem os mesmos vetores.
+
+    As variantes de quantização de um grupo são criadas a partir de um único embedding do corpus
+    (ver CollectionCreator.create_collection).
+
+    Returns:
+        list: {"chunk_size", "chunk_overlap", "embeddings_model", "variants": [{"collection_name", "quantization"}]},
+        na ordem do grid.
+    """
+    grupos: Dict[tuple, Dict[str, Any]] = {}
+    for item in collection_grid(config):
+        chave = (item["embeddings_model"], item["chunk_size"], item["chunk_overlap"])
+        grupo = grupos.setdefault(chave, {
+            "chunk_size": item["chunk_size"],
+            "chunk_overlap": item["chunk_overlap"],
+            "embeddings_model": item["embeddings_model"],
+            "variants": [],
+        })
+        grupo["variants"].append({"collection_name": item["collection_name"], "quantization": item["quantization"]})
+    return list(grupos.values())
+
+
+def build_quantization_config(quantization: Optional[Dict[str, Any]]):
+    """Converte uma entrada de "quantizations" na configuração de quantização do Qdrant (ou None)."""
+    from qdrant_client import models
+
+    tipo = (quantization or {}).get("type", "none")
+    if tipo not in QUANTIZATION_TYPES:
+        raise ValueError(f"Quantização '{tipo}' inválida. Use um de {QUANTIZATION_TYPES}.")
+    if tipo == "scalar":
+        return models.ScalarQuantization(scalar=models.ScalarQuantizationConfig(
+            type=models.ScalarType.INT8,
+            quantile=quantization.get("quantile"),
+            always_ram=quantization.get("always_ram", True),
+        ))
+    if tipo == "binary":
+        return models.BinaryQuantization(binary=models.BinaryQuantizationConfig(
+            always_ram=quantization.get("always_ram", True),
+        ))
+    return None
+
+
+def build_hnsw_config(config: Dict[str, Any], quantization: Optional[Dict[str, Any]] = None):
+    """Parâmetros do HNSW: "hnsw_config" do config, sobrescrito pelo da entrada de quantização."""
+    from qdrant_client import models
+
+    hnsw = dict(config.get("hnsw_config") or {})
+    hnsw.update((quantization or {}).get("hnsw_config") or {})
+    return models.HnswConfigDiff(**hnsw) if hnsw else None
+
+
+def vectors_on_disk(config: Dict[str, Any], quantization: Optional[Dict[str, Any]] = None) -> bool:
+    """Indica se os vetores originais ficam em disco (apenas os quantizados em RAM)."""
+    return bool((quantization or {}).get("on_disk_vectors", config.get("on_disk_vectors", False)))
+
+
+def build_search_params(search_config: Optional[Dict[str, Any]]) -> Optional["models.SearchParams"]:
+    """
+    Parâmetros de busca da seção "search" do config.
+
+    Com `oversampling`, o Qdrant busca `limit * oversampling` candidatos nos vetores quantizados e,
+    com `rescore`, reordena-os pelos vetores originais antes de devolver os `limit` melhores.
+    """
+    if not search_config:
+        return None
+    from qdrant_client import models
+    return models.SearchParams(
+        hnsw_ef=search_config.get("hnsw_ef"),
+        exact=search_config.get("exact", False),
+        quantization=models.QuantizationSearchParams(
+            ignore=False,
+            rescore=search_config.get("rescore", True),
+            oversampling=search_config.get("oversampling"),
+        ),
+    )
+
+
+def estimate_vector_memory(n_points: int, dim: int, quantization: Optional[Dict[str, Any]],
+                           on_disk: bool) -> Dict[str, float]:
+    """Estimativa (MB) da memória dos vetores originais e quantizados mantidos em RAM."""
+    tipo = (quantization or {}).get("type", "none")
+    original = 0.0 if on_disk else n_points * dim * 4
+    quantizado = 0.0
+    if tipo == "scalar":
+        quantizado = n_points * dim * 1
+    elif tipo == "binary":
+        quantizado = n_points * dim / 8
+    if tipo != "none" and not (quantization or {}).get("always_ram", True):
+        quantizado = 0.0
+    mb = 1024 * 1024
+    return {"ram_original_mb": original / mb, "ram_quantizado_mb": quantizado / mb,
+            "ram_total_mb": (original + quantizado) / mb}
@@ -0,0 +1,202 @@
+import os
+import numpy as np
+from typing import Any, Dict, List, Optional, Tuple
+from langchain_core.documents import Document
+
+from src.models.rag_common import with_condition, without_summaries
+
+# Marcador do nome das collections hierárquicas (chunk_size "Hierarchical" no config.json)
+MARCADOR_COLLECTION = "_chunkhier"
+
+# Níveis dos pontos de uma collection hierárquica (metadata.nivel)
+NIVEL_PAI = "pai"  # Página inteira: expansão do contexto e busca por página
+NIVEL_FILHO = "filho"  # Trecho de poucos tokens: casamento preciso com a pergunta
+
+# Parâmetros padrão (sobrescritos pela seção "hierarchical" do config.json)
+DEFAULT_HIERARCHICAL_CONFIG = {
+    "child_tokens": 128,         # Tokens por trecho filho (tokenizer do modelo de embeddings)
+    "child_overlap_tokens": 32,  # Tokens compartilhados por trechos consecutivos
+    "k_children": 12,            # Filhos recuperados por consulta
+    "max_parents": 4,            # Páginas devolvidas após o agrupamento por pai
+    "mode": "trechos",           # "trechos": spans casados e mesclados; "pagina": página expandida
+}
+MODOS = ("trechos", "pagina")
+
+
+def get_hierarchical_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    hierarchical_config = dict(DEFAULT_HIERARCHICAL_CONFIG)
+    hierarchical_config.update(config.get("hierarchical") or {})
+    return hierarchical_config
+
+
+def is_hierarchical_collection(collection_name: str) -> bool:
+    return MARCADOR_COLLECTION in collection_name
+
+
+def token_windows(offsets: np.ndarray, child_tokens: int, overlap_tokens: int) -> np.ndarray:
+    """
+    Spans de caracteres (início, fim) das janelas de `child_tokens` tokens, com `overlap_tokens` de sobreposição.
+
+    `offsets` é o offset_mapping do tokenizer (n_tokens x 2). As janelas são calculadas de uma vez
+    sobre os arrays de offsets, sem decodificar tokens nem re-tokenizar trechos.
+    """
+    n_tokens = len(offsets)
+    if n_tokens == 0:
+        return np.zeros((0, 2), dtype=np.int64)
+    passo = max(child_tokens - overlap_tokens, 1)
+    inicios = np.arange(0, max(n_tokens - overlap_tokens, 1), passo)
+    fins = np.minimum(inicios + child_tokens, n_tokens) - 1
+    return np.stack([offsets[inicios, 0], offsets[fins, 1]], axis=1)
+
+
+def parent_id_of(doc: Document, indice: int) -> str:
+    """Identificador estável da página (nome do arquivo de resultado sem extensão)."""
+    source = doc.metadata.get("source")
+    return os.path.splitext(source)[0] if source else f"pagina_{indice}"
+
+
+def split_hierarchical(documents: List[Document], tokenizer, child_tokens: int,
+                       overlap_tokens: int, batch_size: int = 256) -> List[Document]:
+    """
+    Gera os pontos de uma collection hierárquica: cada página (nível "pai") seguida de seus trechos filhos.
+
+    As páginas são tokenizadas em lotes pelo tokenizer rápido do modelo de embeddings, com
+    return_offsets_mapping; os trechos são cortados do texto original pelos spans de caracteres, de
+    modo que cada filho guarda `parent_id`, `inicio` e `fim` para ser mesclado ou expandido na consulta.
+    """
+    if overlap_tokens >= child_tokens:
+        raise ValueError("child_overlap_tokens deve ser menor que child_tokens.")
+
+    splits = []
+    for lote_inicio in range(0, len(documents), batch_size):
+        lote = documents[lote_inicio:lote_inicio + batch_size]
+        codificado = tokenizer(
+            [doc.page_content for doc in lote],
+            add_special_tokens=False,
+            return_offsets_mapping=True,
+            return_attention_mask=False,
+        )
+        for i, (doc, offsets) in enumerate(zip(lote, codificado["offset_mapping"])):
+            parent_id = parent_id_of(doc, lote_inicio + i)
+            texto = doc.page_content
+            splits.append(Document(
+                page_content=texto,
+                metadata={**doc.metadata, "nivel": NIVEL_PAI, "parent_id": parent_id},
+            ))
+            spans = token_windows(np.asarray(offsets, dtype=np.int64).reshape(-1, 2), child_tokens, overlap_tokens)
+            for ordem, (inicio, fim) in enumerate(spans.tolist()):
+                trecho = texto[inicio:fim]
+                if not trecho.strip():
+                    continue
+                splits.append(Document(
+                    page_content=trecho,
+                    metadata={**doc.metadata, "nivel": NIVEL_FILHO, "parent_id": parent_id,
+                              "ordem": ordem, "inicio": inicio, "fim": fim},
+                ))
+    return splits
+
+
+def _mesclar_spans(filhos: List[Document]) -> List[Tuple[int, int, str]]:
+    """Mescla trechos sobrepostos ou contíguos da mesma página, reconstruindo o texto pelos offsets."""
+    mesclados: List[List[Any]] = []
+    for doc in sorted(filhos, key=lambda d: d.metadata["inicio"]):
+        inicio, fim, texto = doc.metadata["inicio"], doc.metadata["fim"], doc.page_content
+        if mesclados and inicio <= mesclados[-1][1]:
+            atual = mesclados[-1]
+            if fim > atual[1]:
+                atual[2] += texto[atual[1] - inicio:]
+                atual[1] = fim
+        else:
+            mesclados.append([inicio, fim, texto])
+    return [tuple(m) for m in mesclados]
+
+
+class HierarchicalRetriever:
+    """
+    Busca nos trechos filhos de uma collection hierárquica e agrupa o resultado por página.
+
+    Funciona com o QdrantVectorStore e com o LocalVectorStore. No modo "trechos", devolve um
+    documento por página com os spans casados mesclados; no modo "pagina", devolve a página inteira.
+    """
+
+    def __init__(self, vectorstore, k_children: int = DEFAULT_HIERARCHICAL_CONFIG["k_children"],
+                 max_parents: int = DEFAULT_HIERARCHICAL_CONFIG["max_parents"],
+                 mode: str = DEFAULT_HIERARCHICAL_CONFIG["mode"], search_params=None):
+        if mode not in MODOS:
+            raise ValueError(f"Modo '{mode}' inválido. Use um de {MODOS}.")
+        self.vectorstore = vectorstore
+        self.k_children = k_children
+        self.max_parents = max_parents
+        self.mode = mode
+        self.search_params = search_params
+
+    @classmethod
+    def from_config(cls, vectorstore, config: Dict[str, Any], search_params=None,
+                    mode: Optional[str] = None) -> "HierarchicalRetriever":
+        hierarchical_config = get_hierarchical_config(config)
+        return cls(vectorstore, hierarchical_config["k_children"], hierarchical_config["max_parents"],
+                   mode or hierarchical_config["mode"], search_params)
+
+    def _filtro_nativo(self, filtro: Dict[str, Any]):
+        # O QdrantVectorStore espera models.Filter; o índice local aceita o dicionário
+        if hasattr(self.vectorstore, "client"):
+            from qdrant_client import models
+            return models.Filter.model_validate(filtro)
+        return filtro
+
+    def _buscar_filhos(self, query_vector: List[float], filtro: Optional[Dict[str, Any]]):
+        kwargs = {"search_params": self.search_params} if self.search_params is not None else {}
+        filtro = without_summaries(with_condition(filtro, "metadata.nivel", NIVEL_FILHO))
+        return self.vectorstore.similarity_search_with_score_by_vector(
+            query_vector, k=self.k_children, filter=self._filtro_nativo(filtro), **kwargs
+        )
+
+    def fetch_parents(self, parent_ids: List[str]) -> Dict[str, Document]:
+        """Carrega as páginas (nível "pai") pelos parent_ids, sem busca vetorial."""
+        filtro = with_condition({"must": [{"key": "metadata.parent_id", "match": {"any": list(parent_ids)}}]},
+                                "metadata.nivel", NIVEL_PAI)
+        if hasattr(self.vectorstore, "client"):
+            from qdrant_client import models
+            pontos, _ = self.vectorstore.client.scroll(
+                collection_name=self.vectorstore.collection_name,
+                scroll_filter=models.Filter.model_validate(filtro),
+                limit=len(parent_ids),
+                with_payload=True,
+                with_vectors=False,
+            )
+            payloads = [p.payload for p in pontos]
+            chave_conteudo = self.vectorstore.content_payload_key
+            chave_metadata = self.vectorstore.metadata_payload_key
+        else:
+            indice = self.vectorstore.index
+            payloads = [indice.payload(i) for i in np.flatnonzero(indice.filter_mask(filtro))]
+            chave_conteudo, chave_metadata = "page_content", "metadata"
+        pais = {}
+        for payload in payloads:
+            metadata = payload.get(chave_metadata, {})
+            pais[metadata["parent_id"]] = Document(page_content=payload.get(chave_conteudo, ""), metadata=metadata)
+        return pais
+
+    def retrieve(self, query_vector: List[float], filtro: Optional[Dict[str, Any]] = None) -> List[Document]:
+        """Recupera filhos, agrupa-os por página (ordem do melhor filho) e devolve spans ou páginas."""
+        grupos: Dict[str, Dict[str, Any]] = {}
+        for doc, score in self._buscar_filhos(query_vector, filtro):
+            grupo = grupos.setdefault(doc.metadata["parent_id"], {"score": score, "filhos": []})
+            grupo["filhos"].append(doc)
+        selecionados = list(grupos.items())[:self.max_parents]
+
+        pais = self.fetch_parents([pid for pid, _ in selecionados]) if self.mode == "pagina" else {}
+        documentos = []
+        for parent_id, grupo in selecionados:
+            base = {k: v for k, v in grupo["filhos"][0].metadata.items() if k not in ("ordem", "inicio", "fim")}
+            base.update({"score": grupo["score"], "n_filhos": len(grupo["filhos"])})
+            if self.mode == "pagina" and parent_id in pais:
+                documentos.append(Document(page_content=pais[parent_id].page_content,
+                                           metadata={**base, "nivel": NIVEL_PAI}))
+                continue
+            spans = _mesclar_spans(grupo["filhos"])
+            documentos.append(Document(
+                page_content="\n[...]\n".join(texto for _, _, texto in spans),
+                metadata={**base, "spans": [[inicio, fim] for inicio, fim, _ in spans]},
+            ))
+        return documentos
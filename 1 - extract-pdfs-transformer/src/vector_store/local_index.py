@@ -0,0 +1,351 @@
+import os
+import json
+import mmap
+import shutil
+import threading
+import numpy as np
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+# Arquivos de um índice local (um diretório por collection)
+ARQUIVO_MANIFESTO = "manifest.json"
+ARQUIVO_VETORES = "vectors.f16"  # Matriz float16 (n x dim) de vetores normalizados, lida via mmap
+ARQUIVO_PAYLOADS = "payloads.jsonl"  # Um payload por linha ({"page_content", "metadata"})
+ARQUIVO_OFFSETS = "payload_offsets.npy"  # Posição (bytes) de cada payload em payloads.jsonl
+ARQUIVO_COLUNAS = "columns.json"  # Vocabulário das colunas de payload usadas nos filtros
+ARQUIVO_IVF = "ivf.npz"  # Centroides, ordem dos vetores por lista e offsets das listas
+
+MIN_VETORES_IVF = 4096  # Abaixo disso a busca exata é mais rápida que o IVF
+NPROBE = 16  # Listas do IVF visitadas por consulta
+ITERACOES_KMEANS = 10
+AMOSTRA_KMEANS = 65536  # Vetores usados para treinar os centroides do IVF
+TAMANHO_BLOCO = 65536  # Linhas convertidas para float32 por vez durante a busca
+CLAUSULAS_FILTRO = ("must", "should", "must_not")  # Subconjunto dos filtros do Qdrant aceito pelo índice local
+
+
+def _colunas_do_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Valores escalares do payload, com chaves no formato dos filtros do Qdrant ("metadata.arquivo_id")."""
+    colunas = {}
+    for chave, valor in payload.get("metadata", {}).items():
+        if isinstance(valor, (str, int, float, bool)):
+            colunas[f"metadata.{chave}"] = valor
+    return colunas
+
+
+class LocalIndexWriter:
+    """Grava um índice local de forma incremental, com memória limitada ao lote corrente.
+
+    Os vetores são normalizados e gravados em float16; as colunas de payload são codificadas por
+    dicionário (códigos int32 + vocabulário). Ao fechar, o índice IVF é treinado sobre a matriz em disco.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._vetores = open(os.path.join(path, ARQUIVO_VETORES), "wb")
+        self._payloads = open(os.path.join(path, ARQUIVO_PAYLOADS), "wb")
+        self._offsets: List[int] = []
+        self._vocab: Dict[str, Dict[Any, int]] = {}
+        self._codigos: Dict[str, List[int]] = {}
+        self.n = 0
+        self.dim: Optional[int] = None
+
+    def add(self, vetores: List[List[float]], payloads: List[Dict[str, Any]]):
+        if len(vetores) == 0:
+            return
+        matriz = np.asarray(vetores, dtype=np.float32)
+        if self.dim is None:
+            self.dim = matriz.shape[1]
+        matriz /= np.maximum(np.linalg.norm(matriz, axis=1, keepdims=True), 1e-12)
+        self._vetores.write(matriz.astype(np.float16).tobytes())
+
+        for payload in payloads:
+            self._offsets.append(self._payloads.tell())
+            self._payloads.write((json.dumps(payload, ensure_ascii=False) + "\n").encode("utf-8"))
+            colunas = _colunas_do_payload(payload)
+            for chave in set(self._codigos) | set(colunas):
+                if chave not in self._codigos:
+                    self._codigos[chave] = [-1] * self.n  # Coluna nova: ausente nos pontos anteriores
+                    self._vocab[chave] = {}
+                if chave in colunas:
+                    vocab = self._vocab[chave]
+                    valor = colunas[chave]
+                    chave_vocab = (type(valor).__name__, valor)  # Evita colisão entre 1, 1.0 e True
+                    self._codigos[chave].append(vocab.setdefault(chave_vocab, len(vocab)))
+                else:
+                    self._codigos[chave].append(-1)
+            self.n += 1
+
+    def close(self, nlist: Optional[int] = None):
+        """Finaliza os arquivos e treina o IVF."""
+        self._vetores.close()
+        self._payloads.close()
+        np.save(os.path.join(self.path, ARQUIVO_OFFSETS), np.asarray(self._offsets + [os.path.getsize(
+            os.path.join(self.path, ARQUIVO_PAYLOADS))], dtype=np.int64))
+
+        colunas = {}
+        for i, (chave, codigos) in enumerate(self._codigos.items()):
+            arquivo = f"col_{i}.npy"
+            np.save(os.path.join(self.path, arquivo), np.asarray(codigos, dtype=np.int32))
+            vocab = sorted(self._vocab[chave].items(), key=lambda item: item[1])
+            colunas[chave] = {"arquivo": arquivo, "valores": [valor for (_, valor), _ in vocab]}
+        with open(os.path.join(self.path, ARQUIVO_COLUNAS), "w", encoding="utf-8") as f:
+            json.dump(colunas, f, ensure_ascii=False)
+
+        ivf = False
+        if self.n >= MIN_VETORES_IVF:
+            self._treinar_ivf(nlist or int(np.sqrt(self.n)))
+            ivf = True
+
+        with open(os.path.join(self.path, ARQUIVO_MANIFESTO), "w", encoding="utf-8") as f:
+            json.dump({"n": self.n, "dim": self.dim, "dtype": "float16", "ivf": ivf}, f)
+
+    def _treinar_ivf(self, nlist: int):
+        """K-means esférico sobre uma amostra; depois atribui todos os vetores às listas, em blocos."""
+        vetores = np.memmap(os.path.join(self.path, ARQUIVO_VETORES), dtype=np.float16, mode="r",
+                            shape=(self.n, self.dim))
+        rng = np.random.default_rng(0)
+        amostra_idx = np.sort(rng.choice(self.n, size=min(self.n, AMOSTRA_KMEANS), replace=False))
+        amostra = np.asarray(vetores[amostra_idx], dtype=np.float32)
+        centroides = amostra[rng.choice(len(amostra), size=nlist, replace=False)]
+        for _ in range(ITERACOES_KMEANS):
+            atribuicao = np.argmax(amostra @ centroides.T, axis=1)
+            somas = np.zeros_like(centroides)
+            np.add.at(somas, atribuicao, amostra)
+            vazios = ~somas.any(axis=1)
+            somas[vazios] = centroides[vazios]  # Mantém centroides sem pontos
+            centroides = somas / np.maximum(np.linalg.norm(somas, axis=1, keepdims=True), 1e-12)
+
+        atribuicao = np.empty(self.n, dtype=np.int32)
+        for inicio in range(0, self.n, AMOSTRA_KMEANS):
+            bloco = np.asarray(vetores[inicio:inicio + AMOSTRA_KMEANS], dtype=np.float32)
+            atribuicao[inicio:inicio + len(bloco)] = np.argmax(bloco @ centroides.T, axis=1)
+        ordem = np.argsort(atribuicao, kind="stable").astype(np.int64)
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(atribuicao, minlength=nlist))]).astype(np.int64)
+        np.savez(os.path.join(self.path, ARQUIVO_IVF), centroides=centroides, ordem=ordem, offsets=offsets)
+
+
+class LocalVectorIndex:
+    """Índice vetorial embutido, lido via mmap: sem serviço externo e com carga a frio rápida.
+
+    A busca é por produto interno (cosseno, pois os vetores são normalizados). Com IVF, apenas as
+    `nprobe` listas mais próximas são visitadas; filtros muito seletivos usam busca exata sobre os
+    pontos que passam no filtro.
+    """
+
+    def __init__(self, path: str, nprobe: int = NPROBE):
+        self.path = path
+        self.nprobe = nprobe
+        with open(os.path.join(path, ARQUIVO_MANIFESTO), "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        self.n, self.dim = self.manifest["n"], self.manifest["dim"] or 0
+        if self.n:
+            self.vetores = np.memmap(os.path.join(path, ARQUIVO_VETORES), dtype=np.float16, mode="r",
+                                     shape=(self.n, self.dim))
+        else:
+            self.vetores = np.zeros((0, self.dim), dtype=np.float16)
+        self.offsets = np.load(os.path.join(path, ARQUIVO_OFFSETS), mmap_mode="r")
+        with open(os.path.join(path, ARQUIVO_PAYLOADS), "rb") as f:
+            self._payloads = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self.n else b""
+        with open(os.path.join(path, ARQUIVO_COLUNAS), "r", encoding="utf-8") as f:
+            self._colunas_meta = json.load(f)
+        self._colunas: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+        self.ivf = None
+        if self.manifest.get("ivf"):
+            dados = np.load(os.path.join(path, ARQUIVO_IVF), mmap_mode="r")
+            self.ivf = (np.asarray(dados["centroides"]), dados["ordem"], np.asarray(dados["offsets"]))
+
+    def close(self):
+        """Libera os arquivos mapeados (necessário antes de substituir o diretório do índice)."""
+        if isinstance(self._payloads, mmap.mmap):
+            self._payloads.close()
+        self._payloads = b""
+        self.vetores = self.offsets = self.ivf = None
+        self._colunas = {}
+
+    def payload(self, idx: int) -> Dict[str, Any]:
+        return json.loads(self._payloads[int(self.offsets[idx]):int(self.offsets[idx + 1])])
+
+    def _coluna(self, chave: str) -> Optional[np.ndarray]:
+        if chave not in self._colunas_meta:
+            return None
+        with self._lock:
+            if chave not in self._colunas:
+                self._colunas[chave] = np.load(
+                    os.path.join(self.path, self._colunas_meta[chave]["arquivo"]), mmap_mode="r")
+        return self._colunas[chave]
+
+    def _mascara_condicao(self, condicao: Dict[str, Any]) -> np.ndarray:
+        if "key" not in condicao:  # Filtro aninhado
+            return self.filter_mask(condicao)
+        match = condicao.get("match")
+        if set(condicao) != {"key", "match"} or not isinstance(match, dict) or set(match) not in ({"value"}, {"any"}):
+            # Condições fora do subconjunto (range, text, except, ...) não podem virar "sem filtro"
+            raise NotImplementedError(f"Condição de filtro não suportada pelo índice local: {condicao}")
+        coluna = self._coluna(condicao["key"])
+        if coluna is None:
+            return np.zeros(self.n, dtype=bool)
+        aceitos = match["any"] if "any" in match else [match["value"]]
+        vocab = self._colunas_meta[condicao["key"]]["valores"]
+        codigos = [i for i, valor in enumerate(vocab) if any(
+            valor == a and type(valor) is type(a) for a in aceitos)]
+        return np.isin(coluna, codigos)
+
+    def filter_mask(self, filtro: Any) -> Optional[np.ndarray]:
+        """
+        Converte um filtro no formato do Qdrant (dict ou models.Filter) em máscara booleana.
+
+        Aceita must/should/must_not com condições `match.value` ou `match.any` (e filtros aninhados);
+        qualquer outra forma levanta NotImplementedError, em vez de ser ignorada.
+        """
+        if filtro is None:
+            return None
+        if hasattr(filtro, "model_dump"):
+            filtro = filtro.model_dump(exclude_none=True)
+        if not isinstance(filtro, dict) or set(filtro) - set(CLAUSULAS_FILTRO):
+            raise NotImplementedError(f"Filtro não suportado pelo índice local: {filtro}")
+        clausulas = {}
+        for nome in CLAUSULAS_FILTRO:
+            condicoes = filtro.get(nome) or []
+            clausulas[nome] = [condicoes] if isinstance(condicoes, dict) else condicoes  # Condição única
+        mascara = np.ones(self.n, dtype=bool)
+        for condicao in clausulas["must"]:
+            mascara &= self._mascara_condicao(condicao)
+        if clausulas["should"]:
+            alguma = np.zeros(self.n, dtype=bool)
+            for condicao in clausulas["should"]:
+                alguma |= self._mascara_condicao(condicao)
+            mascara &= alguma
+        for condicao in clausulas["must_not"]:
+            mascara &= ~self._mascara_condicao(condicao)
+        return mascara
+
+    def _candidatos(self, consulta: np.ndarray, mascara: Optional[np.ndarray], k: int) -> Optional[np.ndarray]:
+        """Índices a pontuar, ou None para todos. Usa o IVF quando ele reduz o trabalho."""
+        if mascara is not None and mascara.sum() <= max(k, self.n // 10):
+            return np.flatnonzero(mascara)  # Filtro seletivo: busca exata sobre os pontos filtrados
+        if self.ivf is None:
+            return None if mascara is None else np.flatnonzero(mascara)
+        centroides, ordem, offsets = self.ivf
+        listas = np.argsort(centroides @ consulta)[::-1][:self.nprobe]
+        candidatos = np.concatenate([ordem[offsets[l]:offsets[l + 1]] for l in listas])
+        if mascara is not None:
+            candidatos = candidatos[mascara[candidatos]]
+        if len(candidatos) < k:  # Listas visitadas insuficientes: volta para a busca exata
+            return None if mascara is None else np.flatnonzero(mascara)
+        return np.sort(candidatos)  # Acesso sequencial ao mmap
+
+    def _pontuar(self, vetor: np.ndarray, candidatos: Optional[np.ndarray]) -> np.ndarray:
+        """Similaridade com os candidatos (ou todos), convertendo o mmap para float32 em blocos."""
+        total = self.n if candidatos is None else len(candidatos)
+        scores = np.empty(total, dtype=np.float32)
+        for inicio in range(0, total, TAMANHO_BLOCO):
+            fim = min(inicio + TAMANHO_BLOCO, total)
+            bloco = self.vetores[inicio:fim] if candidatos is None else self.vetores[candidatos[inicio:fim]]
+            scores[inicio:fim] = np.asarray(bloco, dtype=np.float32) @ vetor
+        return scores
+
+    def search(self, consulta: List[float], k: int = 4, filtro: Any = None) -> List[Tuple[int, float]]:
+        """Retorna os `k` pontos mais similares como (índice, similaridade de cosseno)."""
+        if self.n == 0:
+            return []
+        vetor = np.asarray(consulta, dtype=np.float32)
+        vetor /= np.linalg.norm(vetor) or 1.0
+        candidatos = self._candidatos(vetor, self.filter_mask(filtro), k)
+        indices = np.arange(self.n) if candidatos is None else candidatos
+        if len(indices) == 0:
+            return []
+        scores = self._pontuar(vetor, candidatos)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(indices[i]), float(scores[i])) for i in top]
+
+
+class LocalVectorStore(VectorStore):
+    """VectorStore do LangChain sobre um LocalVectorIndex, com a mesma interface usada para o Qdrant."""
+
+    def __init__(self, index: LocalVectorIndex, embedding: Embeddings):
+        self.index = index
+        self.embedding = embedding
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding
+
+    @classmethod
+    def from_existing_index(cls, path: str, embedding: Embeddings, nprobe: int = NPROBE) -> "LocalVectorStore":
+        return cls(LocalVectorIndex(path, nprobe=nprobe), embedding)
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[dict]] = None,
+                   path: Optional[str] = None, **kwargs: Any) -> "LocalVectorStore":
+        if path is None:
+            raise ValueError("Informe o diretório do índice local (path).")
+        metadatas = metadatas or [{} for _ in texts]
+        writer = LocalIndexWriter(path)
+        writer.add(embedding.embed_documents(list(texts)),
+                   [{"page_content": t, "metadata": m} for t, m in zip(texts, metadatas)])
+        writer.close()
+        return cls.from_existing_index(path, embedding)
+
+    def _to_document(self, idx: int) -> Document:
+        payload = self.index.payload(idx)
+        return Document(page_content=payload.get("page_content", ""), metadata=payload.get("metadata", {}))
+
+    def similarity_search_with_score_by_vector(self, embedding: List[float], k: int = 4,
+                                               filter: Any = None, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return [(self._to_document(i), score) for i, score in self.index.search(embedding, k, filter)]
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4,
+                                    filter: Any = None, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k, filter)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4,
+                                     filter: Any = None, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self.embedding.embed_query(query), k, filter)
+
+    def similarity_search(self, query: str, k: int = 4, filter: Any = None, **kwargs: Any) -> List[Document]:
+        return self.similarity_search_by_vector(self.embedding.embed_query(query), k, filter)
+
+    def _select_relevance_score_fn(self):
+        return self._cosine_relevance_score_fn
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None, **kwargs: Any) -> List[str]:
+        """
+        Acrescenta textos ao índice: regrava os pontos existentes e os novos em um diretório temporário
+        (retreinando o IVF), substitui o diretório do índice e o recarrega. O custo é proporcional ao
+        índice inteiro; para cargas grandes, prefira recriar a collection com o CollectionCreator.
+
+        Returns:
+            list: Posições dos novos pontos no índice (como texto).
+        """
+        texts = list(texts)
+        if not texts:
+            return []
+        metadatas = metadatas or [{} for _ in texts]
+        path, nprobe, inicio = self.index.path, self.index.nprobe, self.index.n
+        temporario = f"{path}.tmp"
+        shutil.rmtree(temporario, ignore_errors=True)
+
+        writer = LocalIndexWriter(temporario)
+        for bloco in range(0, inicio, TAMANHO_BLOCO):
+            fim = min(bloco + TAMANHO_BLOCO, inicio)
+            writer.add(np.asarray(self.index.vetores[bloco:fim], dtype=np.float32),
+                       [self.index.payload(i) for i in range(bloco, fim)])
+        writer.add(self.embedding.embed_documents(texts),
+                   [{"page_content": t, "metadata": m} for t, m in zip(texts, metadatas)])
+        writer.close()
+
+        self.index.close()
+        antigo = f"{path}.old"
+        shutil.rmtree(antigo, ignore_errors=True)
+        os.replace(path, antigo)
+        os.replace(temporario, path)
+        shutil.rmtree(antigo, ignore_errors=True)
+        self.index = LocalVectorIndex(path, nprobe=nprobe)
+        return [str(i) for i in range(inicio, self.index.n)]
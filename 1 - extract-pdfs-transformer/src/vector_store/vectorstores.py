@@ -1,15 +1,24 @@
+from __future__ import annotations
+
 import os
 import json
-import pandas as pd
-import itertools
-from typing import List, Dict, Any
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.schema import Document
-from langchain_qdrant import QdrantVectorStore
+import argparse
+import numpy as np
+from functools import cached_property
+from typing import TYPE_CHECKING, List, Dict, Any
 from dotenv import load_dotenv
+import queue
+import threading
+import uuid
 import sys
 
+# Dependências pesadas (pandas, HuggingFace, LangChain, Qdrant) são importadas no primeiro uso,
+# de modo que ler o config ou executar um dry-run não paga o custo de inicialização delas.
+if TYPE_CHECKING:
+    from langchain_core.documents import Document
+    from langchain_core.embeddings import Embeddings
+    from qdrant_client import QdrantClient
+
 # Diretórios principais
 BASE_DIR = os.path.dirname(os.path.abspath(__file__)) # Diretório base do script
 DIR_SRC = os.path.dirname(BASE_DIR) # Diretório src
@@ -20,19 +29,87 @@ DIR_DATA = os.path.join(DIR_PAI, "data")  # Diretório de dados
 DIR_DATA_RAW = os.path.join(DIR_DATA, "raw")  # Diretório para dados brutos
 DIR_LOGS = os.path.join(DIR_DATA, "logs")  # Diretório de logs
 DIR_DATA_REFINEMENT = os.path.join(DIR_DATA, "outputs_vision_and_extractor")  # Diretório de refinamento
+DIR_ROUTER = os.path.join(DIR_DATA, "router")  # Centroides por manual/subcategoria para o roteamento de consultas
+DIR_LOCAL_INDEX = os.path.join(DIR_DATA, "local_index")  # Índices vetoriais locais (backend "local")
+DIR_SUMMARIES = os.path.join(DIR_DATA, "outputs_final_summaries")  # Resumos dos manuais (src/models/summarize.py)
+
+from src.vector_store.collection_params import (
+    collection_grid, embedding_groups, local_index_name, build_quantization_config, build_hnsw_config,
+    vectors_on_disk
+)
+
+
+# Parâmetros padrão da indexação em pipeline (sobrescritos pela seção "upload" do config.json)
+DEFAULT_UPLOAD_CONFIG = {
+    "embed_batch_size": 64,      # Textos por chamada ao modelo de embeddings
+    "upload_batch_size": 256,    # Pontos por upsert no Qdrant
+    "upload_workers": 4,         # Upserts concorrentes
+    "queue_maxsize": 8,          # Lotes aguardando upload (limita a memória usada)
+    "prefer_grpc": False,        # Usa a interface gRPC do Qdrant
+    "parallel_upload": True,     # False: um único worker de upload (ainda sobreposto ao embedding)
+}
+
+# Backends de armazenamento vetorial (seção "vector_store" do config.json)
+VECTOR_STORE_BACKENDS = ("qdrant", "local")
+
+# Chaves de metadados usadas no roteamento de consultas (sobrescritas por "routing.keys" no config.json)
+DEFAULT_ROUTING_KEYS = ["arquivo_id"]
+
+# Páginas quase duplicadas (src/refine/dedup.py) fora do índice, pela seção "dedup.drop_from_index":
+# "none" indexa todas; "same_manual" remove as duplicatas do mesmo manual do representante (filtros por
+# arquivo_id continuam encontrando a página); "all" mantém apenas o representante de cada grupo.
+DEDUP_DROP_MODES = ("none", "same_manual", "all")
 
 
 class CollectionCreator:
-    def __init__(self, config_file: str):
+    def __init__(self, config_file: str, dry_run: bool = False):
         self.config = self.load_config(config_file)
         load_dotenv()
         self.qdrant_url = os.getenv("QDRANT_URL")
         self.qdrant_api_key = os.getenv("QDRANT_API_KEY")
 
-        if not self.qdrant_url or not self.qdrant_api_key:
+        vector_store_config = self.config.get("vector_store", {})
+        self.backend = vector_store_config.get("backend", "qdrant")
+        if self.backend not in VECTOR_STORE_BACKENDS:
+            raise ValueError(f"Backend '{self.backend}' inválido. Use um de {VECTOR_STORE_BACKENDS}.")
+        self.local_index_dir = vector_store_config.get("local_dir") or DIR_LOCAL_INDEX
+
+        if self.backend == "qdrant" and not dry_run and (not self.qdrant_url or not self.qdrant_api_key):
             raise ValueError("Variáveis QDRANT_URL ou QDRANT_API_KEY não encontradas!")
 
-        self.file_to_metadata = self.load_metadata_from_csv()
+    @cached_property
+    def file_to_metadata(self) -> Dict[int, Dict[str, Any]]:
+        """Metadados do CSV, carregados na primeira leitura de documentos."""
+        return self.load_metadata_from_csv()
+
+    @cached_property
+    def dedup_groups(self) -> Dict[str, List[str]]:
+        """Grupos de páginas quase duplicadas (vazio se o dedup não foi executado)."""
+        from src.refine.dedup import carregar_grupos
+        return carregar_grupos()
+
+    def dropped_duplicates(self, file_id: str, page_number: Any) -> List[str]:
+        """
+        Membros do grupo da página que ficam fora do índice, conforme "dedup.drop_from_index".
+
+        Para um membro removido, devolve [chave do membro]; para o representante, as chaves das
+        duplicatas que ele substitui no índice; para as demais páginas, lista vazia.
+        """
+        from src.refine.dedup import chave_pagina, separar_chave
+
+        modo = self.config.get("dedup", {}).get("drop_from_index", "same_manual")
+        if modo not in DEDUP_DROP_MODES:
+            raise ValueError(f"dedup.drop_from_index '{modo}' inválido. Use um de {DEDUP_DROP_MODES}.")
+        chave = chave_pagina(file_id, page_number)
+        membros = self.dedup_groups.get(chave)
+        if modo == "none" or not membros:
+            return []
+        representante = membros[0]
+        removidos = [m for m in membros[1:]
+                     if modo == "all" or separar_chave(m)[0] == separar_chave(representante)[0]]
+        if chave == representante:
+            return removidos
+        return [chave] if chave in removidos else []
 
     def load_config(self, config_file: str) -> Dict[str, Any]:
         """Carrega o arquivo de configuração JSON."""
@@ -41,6 +118,8 @@ class CollectionCreator:
 
     def load_metadata_from_csv(self) -> Dict[str, Dict[str, Any]]:
         """Carrega o CSV e cria um mapeamento arquivo_id -> metadados."""
+        import pandas as pd
+
         csv_path = os.path.join(DIR_DATA, "subcategoria_name.csv")
         df = pd.read_csv(csv_path)
         metadata_dict = df.set_index("arquivo_id").to_dict(orient="index")
@@ -49,6 +128,8 @@ class CollectionCreator:
 
     def load_json_documents(self, file_id: str) -> List[Document]:
         """Carrega arquivos JSON, adiciona metadados do CSV e páginas."""
+        from langchain_core.documents import Document
+
         dir_path = os.path.join(self.config['pdf_dir'], file_id)
 
         if not os.path.isdir(dir_path):
@@ -56,6 +137,7 @@ class CollectionCreator:
             return []
 
         documents = []
+        n_removidas = 0
         for fname in os.listdir(dir_path):
             if fname.endswith("_resultado.json"):
                 fpath = os.path.join(dir_path, fname)
@@ -69,6 +151,14 @@ class CollectionCreator:
                     "pag": page_number
                 }
 
+                # Duplicatas removidas não são indexadas; o representante registra quais substitui
+                duplicatas = self.dropped_duplicates(file_id, page_number) if page_number is not None else []
+                if duplicatas and duplicatas[0] == f"{file_id}_pag{page_number}":
+                    n_removidas += 1
+                    continue
+                if duplicatas:
+                    metadata["duplicatas"] = duplicatas
+
                 try:
                     arquivo_id = int(fname.split("_")[1])  # Extrai arquivo_id do nome do arquivo
                     metadata["arquivo_id"] = arquivo_id
@@ -83,6 +173,33 @@ class CollectionCreator:
                 print("Metadados finais para o documento:", metadata)
                 documents.append(Document(page_content=text, metadata=metadata))
 
+        if n_removidas:
+            print(f"{n_removidas} páginas quase duplicadas de {file_id} fora do índice.")
+        return documents
+
+    def load_summary_documents(self, file_id: str, arquivo_metadata: Dict[str, Any] = None) -> List[Document]:
+        """
+        Carrega o resumo pré-calculado de um manual como documentos extras (metadata tipo="resumo").
+
+        Um documento para o resumo do manual e um por seção, com o intervalo de páginas coberto.
+        """
+        from langchain_core.documents import Document
+
+        caminho = os.path.join(DIR_SUMMARIES, f"{file_id}.json")
+        if not os.path.exists(caminho):
+            return []
+        with open(caminho, 'r', encoding='utf-8') as f:
+            resumo = json.load(f)
+
+        base = {"source": f"{file_id}_resumo", "tipo": "resumo", **(arquivo_metadata or {})}
+        documents = [Document(page_content=resumo["resumo"], metadata={**base, "escopo": "manual"})]
+        for secao in resumo.get("secoes", []):
+            inicio, fim = secao["paginas"]
+            documents.append(Document(
+                page_content=secao["resumo"],
+                metadata={**base, "source": f"{file_id}_resumo_pag{inicio}-{fim}", "escopo": "secao",
+                          "pag_inicio": inicio, "pag_fim": fim},
+            ))
         return documents
 
     def clean_metadata(self, metadata: dict) -> dict:
@@ -93,6 +210,15 @@ class CollectionCreator:
         }
 
     def create_collection(self, collection_config: Dict[str, Any]):
+        """
+        Cria as collections de um grupo do grid (ver collection_params.embedding_groups).
+
+        O corpus é dividido e embedado uma única vez; os mesmos vetores são enviados a cada variante
+        de quantização do grupo.
+        """
+        from langchain_huggingface import HuggingFaceEmbeddings
+        from langchain.text_splitter import RecursiveCharacterTextSplitter
+
         embeddings_model = collection_config['embeddings_model']
         local_embeddings = HuggingFaceEmbeddings(
             model_name=embeddings_model,
@@ -105,9 +231,11 @@ class CollectionCreator:
 
         if chunk_size == "Page":
             splits = documents
+        elif chunk_size == "Hierarchical":
+            splits = self.split_hierarchical(documents, embeddings_model)
         else:
             if isinstance(chunk_size, str):
-                raise ValueError("chunk_size deve ser 'Page' ou um inteiro.")
+                raise ValueError("chunk_size deve ser 'Page', 'Hierarchical' ou um inteiro.")
             if chunk_overlap is None:
                 chunk_overlap = 0
             text_splitter = RecursiveCharacterTextSplitter(
@@ -119,61 +247,351 @@ class CollectionCreator:
         for doc in splits:
             doc.metadata = self.clean_metadata(doc.metadata)
 
-        QdrantVectorStore.from_documents(
-            documents=splits,
-            embedding=local_embeddings,
+        variants = collection_config['variants']
+        collection_names = [variant['collection_name'] for variant in variants]
+        routing_keys = self.config.get("routing", {}).get("keys", DEFAULT_ROUTING_KEYS)
+        centroid_sums: Dict[str, Dict[Any, List]] = {key: {} for key in routing_keys}
+
+        if self.backend == "local":
+            # Um único índice (float16) por grupo, compartilhado pelas variantes de quantização
+            if any(variant["quantization"].get("type", "none") != "none" for variant in variants):
+                print("Quantização ignorada no backend local (vetores já armazenados em float16).")
+            total = self.write_local_index(local_index_name(collection_names[0]), splits, local_embeddings,
+                                           centroid_sums)
+        else:
+            from qdrant_client import models
+
+            client = self.get_qdrant_client()
+            total = self.upload_documents(client, variants, splits, local_embeddings, centroid_sums)
+            if total:
+                # "tipo" separa os resumos das páginas (excluídos das buscas fora da visão geral)
+                campos_keyword = ["metadata.tipo"] if any("tipo" in doc.metadata for doc in splits) else []
+                if chunk_size == "Hierarchical":
+                    campos_keyword += ["metadata.parent_id", "metadata.nivel"]
+                for collection_name in collection_names:
+                    self.create_payload_indexes(client, collection_name, centroid_sums)
+                    for field_name in campos_keyword:
+                        client.create_payload_index(collection_name=collection_name, field_name=field_name,
+                                                    field_schema=models.PayloadSchemaType.KEYWORD)
+
+        for collection_name in collection_names:
+            if total:
+                self.save_routing_centroids(collection_name, embeddings_model, centroid_sums)
+            print(f"Collection {collection_name} criada com sucesso ({total} pontos).")
+
+    def split_hierarchical(self, documents: List[Document], embeddings_model: str) -> List[Document]:
+        """
+        Páginas e trechos filhos de tamanho fixo em tokens do próprio modelo de embeddings.
+
+        Cada página é indexada junto com seus filhos na mesma collection (metadata "nivel" e
+        "parent_id"), de modo que a consulta casa trechos pequenos e expande para a página.
+        """
+        from transformers import AutoTokenizer
+        from src.vector_store.hierarchical import get_hierarchical_config, split_hierarchical
+
+        hierarchical_config = get_hierarchical_config(self.config)
+        tokenizer = AutoTokenizer.from_pretrained(embeddings_model, use_fast=True)
+        splits = split_hierarchical(
+            documents, tokenizer,
+            hierarchical_config["child_tokens"], hierarchical_config["child_overlap_tokens"],
+        )
+        print(f"{len(documents)} páginas divididas em {len(splits) - len(documents)} trechos filhos.")
+        return splits
+
+    def create_payload_indexes(self, client: QdrantClient, collection_name: str,
+                               centroid_sums: Dict[str, Dict[Any, List]]):
+        """Cria índices de payload nas chaves de roteamento, usadas nos filtros das consultas."""
+        from qdrant_client import models
+
+        for key, valores in centroid_sums.items():
+            if not valores:
+                continue
+            inteiro = all(isinstance(v, int) and not isinstance(v, bool) for v in valores)
+            client.create_payload_index(
+                collection_name=collection_name,
+                field_name=f"metadata.{key}",
+                field_schema=models.PayloadSchemaType.INTEGER if inteiro else models.PayloadSchemaType.KEYWORD,
+            )
+
+    def save_routing_centroids(self, collection_name: str, embeddings_model: str,
+                               centroid_sums: Dict[str, Dict[Any, List]]):
+        """Salva os centroides normalizados de cada valor das chaves de roteamento (ver src/models/router.py)."""
+        dados = {"collection_name": collection_name, "embeddings_model": embeddings_model, "keys": {}}
+        for key, valores in centroid_sums.items():
+            if not valores:
+                continue
+            nomes = list(valores)
+            centroides = np.stack([valores[v][0] / valores[v][1] for v in nomes])
+            centroides /= np.linalg.norm(centroides, axis=1, keepdims=True)
+            dados["keys"][key] = {
+                "values": nomes,
+                "counts": [valores[v][1] for v in nomes],
+                "centroids": centroides.round(6).tolist(),
+            }
+        os.makedirs(DIR_ROUTER, exist_ok=True)
+        caminho = os.path.join(DIR_ROUTER, f"{collection_name}.json")
+        with open(caminho, "w", encoding="utf-8") as f:
+            json.dump(dados, f, ensure_ascii=False)
+        print(f"Centroides de roteamento salvos em {caminho}")
+
+    def get_upload_config(self) -> Dict[str, Any]:
+        """Retorna os parâmetros de upload, com os padrões completados pela seção "upload" do config."""
+        upload_config = dict(DEFAULT_UPLOAD_CONFIG)
+        upload_config.update(self.config.get("upload", {}))
+        return upload_config
+
+    def get_qdrant_client(self) -> QdrantClient:
+        """Cria o cliente do Qdrant (REST ou gRPC, conforme o config)."""
+        from qdrant_client import QdrantClient
+
+        return QdrantClient(
             url=self.qdrant_url,
             api_key=self.qdrant_api_key,
-            collection_name=collection_config['collection_name'],
-            force_recreate=True
+            prefer_grpc=self.get_upload_config()["prefer_grpc"],
         )
 
-        print(f"Collection {collection_config['collection_name']} criada com sucesso.")
+    def recreate_collection(self, client: QdrantClient, collection_name: str, vector_size: int,
+                            quantization: Dict[str, Any] = None):
+        """
+        Apaga (se existir) e cria a collection com o tamanho de vetor informado.
 
-    def generate_collection_configs(self, documents_dict: Dict[str, List[Document]]) -> List[Dict[str, Any]]:
-        embeddings_models = self.config['embeddings_models']
-        chunk_sizes = self.config['chunk_sizes']
-        chunk_overlaps = self.config['chunk_overlaps']
+        Aplica a quantização da entrada de "quantizations", os parâmetros de "hnsw_config" e o
+        armazenamento em disco dos vetores originais ("on_disk_vectors").
+        """
+        from qdrant_client import models
+
+        if client.collection_exists(collection_name):
+            client.delete_collection(collection_name)
+        client.create_collection(
+            collection_name=collection_name,
+            vectors_config=models.VectorParams(
+                size=vector_size,
+                distance=models.Distance.COSINE,
+                on_disk=vectors_on_disk(self.config, quantization),
+            ),
+            hnsw_config=build_hnsw_config(self.config, quantization),
+            quantization_config=build_quantization_config(quantization),
+        )
+
+    def embed_in_batches(self, splits: List[Document], embeddings: Embeddings,
+                         centroid_sums: Dict[str, Dict[Any, List]] = None):
+        """
+        Embeda os documentos em lotes de `embed_batch_size` textos.
+
+        Textos idênticos (páginas quase duplicadas, ver src/refine/dedup.py) são embedados uma
+        única vez e o vetor é reaproveitado para todos os documentos com o mesmo texto.
+
+        Se `centroid_sums` for informado ({chave: {}}), acumula nele, para cada valor de cada chave de
+        metadados, a soma dos vetores e a contagem de documentos: {chave: {valor: [soma, contagem]}}.
+        Os resumos (tipo "resumo") não entram nos centroides, que representam as páginas.
+
+        Yields:
+            list: Pares (documento, vetor) de um lote.
+        """
+        embed_batch_size = self.get_upload_config()["embed_batch_size"]
+
+        # Agrupa documentos pelo texto para embedar cada texto distinto uma única vez
+        docs_por_texto: Dict[str, List[Document]] = {}
+        for doc in splits:
+            docs_por_texto.setdefault(doc.page_content, []).append(doc)
+        textos = list(docs_por_texto)
+        if len(textos) < len(splits):
+            print(f"{len(splits) - len(textos)} textos duplicados reaproveitados no embedding.")
+
+        for inicio in range(0, len(textos), embed_batch_size):
+            lote_textos = textos[inicio:inicio + embed_batch_size]
+            vetores = embeddings.embed_documents(lote_textos)
+            lote = []
+            for texto, vetor in zip(lote_textos, vetores):
+                for doc in docs_por_texto[texto]:
+                    if centroid_sums is not None and doc.metadata.get("tipo") != "resumo":
+                        self._accumulate_centroid(centroid_sums, doc.metadata, vetor)
+                    lote.append((doc, vetor))
+            yield lote
+
+    def write_local_index(self, collection_name: str, splits: List[Document], embeddings: Embeddings,
+                          centroid_sums: Dict[str, Dict[Any, List]] = None) -> int:
+        """
+        Grava os documentos em um índice local memory-mapped (ver src/vector_store/local_index.py).
+
+        Returns:
+            int: Quantidade de vetores gravados.
+        """
+        if not splits:
+            print(f"Nenhum documento para a collection {collection_name}. Pulando.")
+            return 0
+
+        from src.vector_store.local_index import LocalIndexWriter
+
+        writer = LocalIndexWriter(os.path.join(self.local_index_dir, collection_name))
+        for lote in self.embed_in_batches(splits, embeddings, centroid_sums):
+            writer.add(
+                [vetor for _, vetor in lote],
+                [{"page_content": doc.page_content, "metadata": doc.metadata} for doc, _ in lote],
+            )
+        writer.close(self.config.get("vector_store", {}).get("nlist"))
+        return writer.n
+
+    def upload_documents(self, client: QdrantClient, variants: List[Dict[str, Any]],
+                         splits: List[Document], embeddings: Embeddings,
+                         centroid_sums: Dict[str, Dict[Any, List]] = None) -> int:
+        """
+        Embeda e envia os documentos ao Qdrant em pipeline produtor/consumidor.
+
+        O embedding (CPU) roda na thread atual e entrega lotes de pontos a uma fila limitada,
+        consumida por workers de upsert (rede). As duas etapas se sobrepõem e no máximo
+        `queue_maxsize` lotes de vetores ficam em memória ao mesmo tempo. Cada lote embedado é
+        enviado a todas as `variants` ({"collection_name", "quantization"}), sem embedar de novo.
+
+        O payload segue o formato do langchain_qdrant ("page_content" e "metadata"), de modo que a
+        collection pode ser lida com QdrantVectorStore.from_existing_collection.
+
+        Returns:
+            int: Quantidade de pontos enviados a cada collection.
+        """
+        if not splits:
+            for variant in variants:
+                print(f"Nenhum documento para a collection {variant['collection_name']}. Pulando.")
+            return 0
+
+        from qdrant_client import models
 
+        upload_config = self.get_upload_config()
+        upload_batch_size = upload_config["upload_batch_size"]
+        n_workers = upload_config["upload_workers"] if upload_config["parallel_upload"] else 1
+
+        fila: queue.Queue = queue.Queue(maxsize=upload_config["queue_maxsize"])
+        erros: List[Exception] = []
+
+        def worker_upload():
+            while True:
+                item = fila.get()
+                try:
+                    if item is None:
+                        return
+                    if not erros:  # Após uma falha, apenas drena a fila
+                        collection_name, lote = item
+                        client.upsert(collection_name=collection_name, points=lote, wait=True)
+                except Exception as e:
+                    erros.append(e)
+                finally:
+                    fila.task_done()
+
+        workers = [threading.Thread(target=worker_upload, daemon=True) for _ in range(n_workers)]
+        for w in workers:
+            w.start()
+
+        total = 0
+        buffer: List[models.PointStruct] = []
+        try:
+            for i, lote in enumerate(self.embed_in_batches(splits, embeddings, centroid_sums)):
+                if erros:
+                    break
+                if i == 0:
+                    for variant in variants:
+                        self.recreate_collection(client, variant["collection_name"], len(lote[0][1]),
+                                                 variant["quantization"])
+
+                for doc, vetor in lote:
+                    buffer.append(models.PointStruct(
+                        id=uuid.uuid4().hex,
+                        vector=vetor,
+                        payload={"page_content": doc.page_content, "metadata": doc.metadata},
+                    ))
+                while len(buffer) >= upload_batch_size:
+                    for variant in variants:
+                        fila.put((variant["collection_name"], buffer[:upload_batch_size]))
+                    total += upload_batch_size
+                    buffer = buffer[upload_batch_size:]
+
+            if buffer and not erros:
+                for variant in variants:
+                    fila.put((variant["collection_name"], buffer))
+                total += len(buffer)
+        finally:
+            for _ in workers:
+                fila.put(None)
+            for w in workers:
+                w.join()
+
+        if erros:
+            raise erros[0]
+        return total
+
+    @staticmethod
+    def _accumulate_centroid(centroid_sums: Dict[str, Dict[Any, List]], metadata: dict, vetor: List[float]):
+        for key, valores in centroid_sums.items():
+            valor = metadata.get(key)
+            if valor is None or isinstance(valor, (list, dict)):
+                continue
+            if valor not in valores:
+                valores[valor] = [np.zeros(len(vetor), dtype=np.float64), 0]
+            valores[valor][0] += vetor
+            valores[valor][1] += 1
+
+    def generate_collection_configs(self, documents_dict: Dict[str, List[Document]]) -> List[Dict[str, Any]]:
         all_docs = []
         for docs in documents_dict.values():
             all_docs.extend(docs)
 
-        combos = itertools.product(embeddings_models, chunk_sizes, chunk_overlaps)
         configs = []
-        for emb_model, c_size, c_overlap in combos:
-            chunk_display = c_size if c_size != "Page" else "by-page"
-            collection_name = (
-                f"{self.config['collection_name']}_chunk{chunk_display}_overlap{c_overlap}_"
-                f"{emb_model.split('/')[-1]}"
-            )
-            extraction_config = {
-                "collection_name": collection_name,
-                "chunk_size": c_size,
-                "chunk_overlap": c_overlap,
-                "embeddings_model": emb_model,
-                "documents": all_docs,
-            }
+        for extraction_config in embedding_groups(self.config):
+            extraction_config["documents"] = all_docs
             configs.append(extraction_config)
 
         return configs
 
-    def create_collections(self):
+    def load_all_documents(self) -> Dict[str, List[Document]]:
+        """Carrega os documentos de todos os arquivo_ids do config."""
         documents_dict = {}
         for arquivo_id in self.config['arquivo_ids_to_process']:
             if not arquivo_id.startswith("fluidos_"):
                 continue
             docs = self.load_json_documents(arquivo_id)
+            if docs and self.config.get("summaries", {}).get("index", True):
+                # Apenas metadados do manual (arquivo_id e colunas do CSV); campos de página como
+                # "pag" e "duplicatas" não se aplicam ao resumo
+                id_manual = docs[0].metadata.get("arquivo_id")
+                manual_metadata = ({"arquivo_id": id_manual, **self.file_to_metadata.get(id_manual, {})}
+                                   if id_manual is not None else {})
+                docs += self.load_summary_documents(arquivo_id, manual_metadata)
             if docs:
                 documents_dict[arquivo_id] = docs
+        return documents_dict
+
+    def dry_run(self):
+        """
+        Valida o config e mostra o que seria indexado, sem carregar modelos nem conectar ao Qdrant.
+        """
+        print(f"Backend: {self.backend}")
+        for arquivo_id in self.config['arquivo_ids_to_process']:
+            dir_path = os.path.join(self.config['pdf_dir'], arquivo_id)
+            n_paginas = (sum(f.endswith("_resultado.json") for f in os.listdir(dir_path))
+                         if os.path.isdir(dir_path) else 0)
+            tem_resumo = os.path.exists(os.path.join(DIR_SUMMARIES, f"{arquivo_id}.json"))
+            print(f"  {arquivo_id}: {n_paginas} páginas{' + resumo' if tem_resumo else ''}")
+        grid = collection_grid(self.config)
+        print(f"{len(grid)} collections:")
+        for item in grid:
+            print(f"  {item['collection_name']} (chunk {item['chunk_size']}, overlap {item['chunk_overlap']}, "
+                  f"quantização {item['quantization'].get('name', 'none')})")
+
+    def create_collections(self):
+        documents_dict = self.load_all_documents()
 
         self.collection_configs = self.generate_collection_configs(documents_dict)
 
         for collection_config in self.collection_configs:
             self.create_collection(collection_config)
 
-
 if __name__ == "__main__":
-    config_file = os.path.join(BASE_DIR, "config.json")
-    processor = CollectionCreator(config_file)
-    processor.create_collections()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Criação das collections do grid do config.json.")
+    parser.add_argument("--config", default=os.path.join(BASE_DIR, "config.json"))
+    parser.add_argument("--dry-run", action="store_true", help="Apenas valida o config e lista as collections.")
+    args = parser.parse_args()
+
+    processor = CollectionCreator(args.config, dry_run=args.dry_run)
+    if args.dry_run:
+        processor.dry_run()
+    else:
+        processor.create_collections()
\ No newline at end of file